@@ -0,0 +1 @@
+"""여러 기업 리포트를 한 번에 생성하는 배치 실행 유틸리티."""
@@ -0,0 +1,44 @@
+from __future__ import annotations
+import json
+import os
+from typing import Any, Dict
+
+from rag_finance.utils.io_utils import ensure_dir
+
+
+class Checkpoint:
+    """
+    append-only JSONL 진행 기록. 키별 마지막 레코드가 현재 상태이며,
+    매 기록마다 flush+fsync 해서 프로세스가 죽어도 완료된 작업은 남는다.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.records: Dict[str, Dict[str, Any]] = {}
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 비정상 종료로 잘린 마지막 줄
+                    if isinstance(rec, dict) and rec.get("key"):
+                        self.records[str(rec["key"])] = rec
+
+    def status(self, key: str) -> str:
+        return str(self.records.get(key, {}).get("status", ""))
+
+    def is_done(self, key: str) -> bool:
+        return self.status(key) == "done"
+
+    def mark(self, key: str, status: str, **info: Any) -> None:
+        rec = {"key": key, "status": status, **info}
+        self.records[key] = rec
+        ensure_dir(os.path.dirname(self.path) or ".")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
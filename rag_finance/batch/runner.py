@@ -0,0 +1,313 @@
+from __future__ import annotations
+import asyncio
+import json
+import os
+import re
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from rag_finance.batch.checkpoint import Checkpoint
+from rag_finance.entities.company_maps import NAME_TO_CODE
+from rag_finance.utils.io_utils import ensure_dir, read_json, write_json, write_text
+from rag_finance.utils.pdf_utils import export_report_pdf, init_pdf_worker
+from rag_finance.utils.tabular_format import format_tabular_prompt, load_tabular_payload
+
+DEFAULT_QUERY_TEMPLATE = "{company}의 최근 동향에 대한 한국어 리포트를 작성해 줘."
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[\\/:*?\"<>|\s]+", "_", name).strip("_") or "unnamed"
+
+
+def _export_outputs(out_dir: str, key: str, report_text: str, tabular_payload: Optional[Dict[str, Any]], pdf: bool) -> Dict[str, Any]:
+    """(프로세스 풀 워커) 리포트 텍스트/PDF 저장."""
+    from rag_finance.llm.report_generator import parse_report_sections
+
+    start = time.perf_counter()
+    txt_path = os.path.join(out_dir, f"{key}.txt")
+    write_text(txt_path, report_text)
+    pdf_path = ""
+    if pdf:
+        pdf_path = os.path.join(out_dir, f"{key}.pdf")
+        export_report_pdf(pdf_path, parse_report_sections(report_text), tabular_payload)
+    return {"txt": txt_path, "pdf": pdf_path, "seconds": time.perf_counter() - start}
+
+
+class BatchRunner:
+    """
+    기업 목록에 대해 Retrieval(CPU 스레드 풀) → LLM(async I/O) → 저장/PDF(프로세스 풀)
+    3단계를 bounded queue 로 연결해 겹쳐 실행한다.
+    - 완료된 기업은 checkpoint.jsonl 에 기록되어 재실행 시 건너뛴다.
+    - LLM 결과는 .work/{기업}.json 으로 먼저 저장되므로, 저장 단계에서 죽어도 LLM 을 다시 부르지 않는다.
+    - Retrieval 스레드 풀과 저장/PDF 프로세스 풀은 처음 쓸 때 만들어 run_tasks 호출들(작업 큐의 claim 묶음마다)이
+      함께 쓴다 — PDF 워커의 폰트·스타일 준비(init_pdf_worker)가 워커 프로세스당 한 번이 되도록. 끝나면 close().
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        *,
+        engine,
+        llm_client,
+        out_dir: str,
+        model: str = "llama-3.3-70b-versatile",
+        topk: int = 10,
+        tabular_source: Optional[str] = None,
+        query_template: str = DEFAULT_QUERY_TEMPLATE,
+        pdf: bool = True,
+    ) -> None:
+        batch_cfg = config.get("batch", {}) or {}
+        self.engine = engine
+        self.llm_client = llm_client
+        self.out_dir = out_dir
+        self.model = model
+        self.topk = topk
+        self.tabular_source = tabular_source
+        self.query_template = query_template
+        self.pdf = pdf
+        self.retrieval_workers = max(1, int(batch_cfg.get("retrieval_workers", 1)))
+        self.llm_concurrency = max(1, int(batch_cfg.get("llm_concurrency", 4)))
+        self.export_workers = max(1, int(batch_cfg.get("export_workers", 2)))
+        self.queue_size = max(1, int(batch_cfg.get("queue_size", 8)))
+        self.work_dir = os.path.join(out_dir, ".work")
+        self.checkpoint = Checkpoint(os.path.join(out_dir, "checkpoint.jsonl"))
+        self.busy: Dict[str, float] = {"retrieval": 0.0, "llm": 0.0, "export": 0.0}
+        self._retrieval_pool: Optional[ThreadPoolExecutor] = None
+        self._export_pool: Optional[ProcessPoolExecutor] = None
+
+    # ---- pools --------------------------------------------------------
+    def _pools(self) -> Tuple[ThreadPoolExecutor, ProcessPoolExecutor]:
+        if self._retrieval_pool is None:
+            self._retrieval_pool = ThreadPoolExecutor(max_workers=self.retrieval_workers, thread_name_prefix="batch-retrieval")
+        if self._export_pool is None:
+            self._export_pool = ProcessPoolExecutor(max_workers=self.export_workers, initializer=init_pdf_worker)
+        return self._retrieval_pool, self._export_pool
+
+    def _drop_export_pool(self, pool: ProcessPoolExecutor) -> None:
+        """워커 프로세스가 죽어 깨진 풀은 버리고 다음 run_tasks 에서 새로 만든다."""
+        if self._export_pool is pool:
+            self._export_pool = None
+            pool.shutdown(wait=False)
+
+    def close(self) -> None:
+        if self._retrieval_pool is not None:
+            self._retrieval_pool.shutdown(wait=True)
+            self._retrieval_pool = None
+        if self._export_pool is not None:
+            self._export_pool.shutdown(wait=True)
+            self._export_pool = None
+
+    def __enter__(self) -> "BatchRunner":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---- stage bodies -------------------------------------------------
+    def _retrieve(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        docs, dbg = self.engine.retrieve(task["query"], self.topk)
+        company = dbg.get("company") or task["company"]
+        code = dbg.get("code") or task["code"]
+        tabular_payload = load_tabular_payload(self.tabular_source, company, code)
+        return {
+            **task,
+            "docs": docs,
+            "debug": dbg,
+            "tabular_payload": tabular_payload,
+            "tabular_text": format_tabular_prompt(tabular_payload),
+        }
+
+    async def _generate(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        from rag_finance.llm.report_generator import agenerate_finance_report
+
+        report_text, _messages, context_text = await agenerate_finance_report(
+            client=self.llm_client,
+            query=task["query"],
+            docs=task["docs"],
+            model=self.model,
+            tabular_text=task["tabular_text"],
+        )
+        work = {
+            "key": task["key"],
+            "company": task["company"],
+            "query": task["query"],
+            "debug": task["debug"],
+            "report_text": report_text,
+            "context_text": context_text,
+            "tabular_payload": task["tabular_payload"],
+        }
+        write_json(os.path.join(self.work_dir, f"{task['key']}.json"), work)
+        return work
+
+    # ---- pipeline -----------------------------------------------------
+    def make_task(self, company: str, *, key: Optional[str] = None, query_template: Optional[str] = None) -> Dict[str, Any]:
+        """기업 하나의 작업. key 는 출력 파일·체크포인트 키 (기본: 기업명), query_template 기본값은 runner 설정."""
+        return {
+            "key": key or _safe_name(company),
+            "company": company,
+            "code": NAME_TO_CODE.get(company, ""),
+            "query": (query_template or self.query_template).format(company=company),
+        }
+
+    def plan(self, companies: Sequence[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """checkpoint/.work 상태를 보고 (처음부터 / 저장만 남음 / 완료) 로 분류."""
+        return self.plan_tasks([self.make_task(c) for c in dict.fromkeys(companies)])
+
+    def plan_tasks(self, tasks: Sequence[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        fresh: List[Dict[str, Any]] = []
+        resumed: List[Dict[str, Any]] = []
+        done: List[Dict[str, Any]] = []
+        for task in {t["key"]: t for t in tasks}.values():
+            key = task["key"]
+            work_path = os.path.join(self.work_dir, f"{key}.json")
+            if self.checkpoint.is_done(key):
+                done.append(task)
+            elif os.path.isfile(work_path):
+                try:
+                    resumed.append(read_json(work_path))
+                except (OSError, json.JSONDecodeError):
+                    fresh.append(task)
+            else:
+                fresh.append(task)
+        return {"fresh": fresh, "resumed": resumed, "done": done}
+
+    async def _run(self, fresh: List[Dict[str, Any]], resumed: List[Dict[str, Any]]) -> None:
+        loop = asyncio.get_running_loop()
+        llm_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        export_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        retrieval_pool, export_pool = self._pools()
+        slots = asyncio.Semaphore(self.retrieval_workers)
+
+        async def retrieve_one(task: Dict[str, Any]) -> None:
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    result = await loop.run_in_executor(retrieval_pool, self._retrieve, task)
+                except Exception as exc:
+                    self._fail(task["key"], "retrieval", exc)
+                    return
+                finally:
+                    self.busy["retrieval"] += time.perf_counter() - start
+                if not result["docs"]:
+                    self._fail(task["key"], "retrieval", RuntimeError("no documents retrieved"))
+                    return
+                await llm_q.put(result)
+
+        async def retrieval_stage() -> None:
+            await asyncio.gather(*(retrieve_one(t) for t in fresh))
+            for _ in range(self.llm_concurrency):
+                await llm_q.put(None)
+
+        async def llm_worker() -> None:
+            while True:
+                task = await llm_q.get()
+                if task is None:
+                    return
+                start = time.perf_counter()
+                try:
+                    work = await self._generate(task)
+                except Exception as exc:
+                    self._fail(task["key"], "llm", exc)
+                    continue
+                finally:
+                    self.busy["llm"] += time.perf_counter() - start
+                await export_q.put(work)
+
+        async def feed_resumed() -> None:
+            for work in resumed:
+                await export_q.put(work)
+
+        async def llm_stage() -> None:
+            await asyncio.gather(feed_resumed(), *(llm_worker() for _ in range(self.llm_concurrency)))
+            for _ in range(self.export_workers):
+                await export_q.put(None)
+
+        async def export_worker() -> None:
+            while True:
+                work = await export_q.get()
+                if work is None:
+                    return
+                start = time.perf_counter()
+                try:
+                    info = await loop.run_in_executor(
+                        export_pool, _export_outputs,
+                        self.out_dir, work["key"], work["report_text"], work.get("tabular_payload"), self.pdf,
+                    )
+                except Exception as exc:
+                    if isinstance(exc, BrokenProcessPool):
+                        self._drop_export_pool(export_pool)
+                    self._fail(work["key"], "export", exc)
+                    continue
+                finally:
+                    self.busy["export"] += time.perf_counter() - start
+                self.checkpoint.mark(work["key"], "done", company=work["company"], **info)
+                print(f"[generate-batch] done {work['company']} -> {info['txt']}")
+
+        await asyncio.gather(
+            retrieval_stage(),
+            llm_stage(),
+            *(export_worker() for _ in range(self.export_workers)),
+        )
+
+    def _fail(self, key: str, stage: str, exc: BaseException) -> None:
+        self.checkpoint.mark(key, "failed", stage=stage, error=f"{type(exc).__name__}: {exc}")
+        print(f"[generate-batch] FAIL {key} at {stage}: {exc}", file=sys.stderr)
+
+    def run(self, companies: Sequence[str]) -> Dict[str, Any]:
+        return self.run_tasks([self.make_task(c) for c in dict.fromkeys(companies)])
+
+    def run_tasks(self, tasks: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        ensure_dir(self.work_dir)
+        plan = self.plan_tasks(tasks)
+        print(
+            f"[generate-batch] total={len(plan['fresh']) + len(plan['resumed']) + len(plan['done'])} "
+            f"fresh={len(plan['fresh'])} resume_export={len(plan['resumed'])} skip_done={len(plan['done'])}"
+        )
+        start = time.perf_counter()
+        asyncio.run(self._run(plan["fresh"], plan["resumed"]))
+        wall = time.perf_counter() - start
+
+        keys = [t["key"] for t in plan["fresh"]] + [w["key"] for w in plan["resumed"]]
+        summary = {
+            "wall_seconds": wall,
+            "stage_busy_seconds": dict(self.busy),
+            "done": sum(1 for k in keys if self.checkpoint.is_done(k)),
+            "failed": sum(1 for k in keys if self.checkpoint.status(k) == "failed"),
+            "skipped": len(plan["done"]),
+        }
+        print(
+            f"[generate-batch] wall={wall:.1f}s busy(retrieval={self.busy['retrieval']:.1f}s, "
+            f"llm={self.busy['llm']:.1f}s, export={self.busy['export']:.1f}s) "
+            f"done={summary['done']} failed={summary['failed']} skipped={summary['skipped']}"
+        )
+        return summary
+
+    def process(self, tasks: Sequence[Dict[str, Any]]) -> Dict[str, Tuple[bool, Dict[str, Any]]]:
+        """
+        작업 큐(batch.work_queue) 핸들러: 큐 작업 {key, company, template} 을 한 번의 파이프라인으로 처리하고
+        키별 (성공 여부, 결과) 반환. 결과에는 리포트 본문을 넣어 다른 노드에서도 모을 수 있게 한다.
+        """
+        self.run_tasks([self.make_task(t["company"], key=t["key"], query_template=t["template"]) for t in tasks])
+        outcomes: Dict[str, Tuple[bool, Dict[str, Any]]] = {}
+        for task in tasks:
+            rec = self.checkpoint.records.get(task["key"], {})
+            if rec.get("status") != "done":
+                outcomes[task["key"]] = (False, {"error": f"{rec.get('stage', '?')}: {rec.get('error', 'not completed')}"})
+                continue
+            try:
+                with open(rec["txt"], "r", encoding="utf-8") as f:
+                    report_text = f.read()
+            except OSError as exc:
+                outcomes[task["key"]] = (False, {"error": f"report file missing: {exc}"})
+                continue
+            outcomes[task["key"]] = (True, {
+                "host": socket.gethostname(),
+                "txt": os.path.abspath(rec["txt"]),
+                "pdf": os.path.abspath(rec["pdf"]) if rec.get("pdf") else "",
+                "report_text": report_text,
+            })
+        return outcomes
@@ -0,0 +1,314 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from rag_finance.utils.io_utils import ensure_dir
+
+QUEUE_SCHEMA_VERSION = 1
+STATUSES = ("pending", "leased", "done", "failed")
+
+# handler(tasks) → {key: (성공 여부, 성공이면 result dict / 실패면 {"error": ...})}
+TaskHandler = Callable[[List[Dict[str, Any]]], Dict[str, Tuple[bool, Dict[str, Any]]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tasks (
+    key TEXT PRIMARY KEY,
+    company TEXT NOT NULL,
+    template TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    payload TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT NOT NULL DEFAULT '',
+    lease_until REAL NOT NULL DEFAULT 0,
+    heartbeat_at REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    result TEXT NOT NULL DEFAULT '',
+    error TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (status, lease_until, created_at);
+"""
+
+
+def task_key(company: str, template: str, run_date: str) -> str:
+    """(기업, 질의 템플릿, 실행일) 의 멱등 키 — 같은 작업을 여러 번 넣어도 한 행만 생긴다. 파일 이름으로도 쓴다."""
+    digest = hashlib.sha1(f"{company}\x1f{template}\x1f{run_date}".encode("utf-8")).hexdigest()[:10]
+    safe = "".join(ch if ch.isalnum() else "_" for ch in company).strip("_") or "unnamed"
+    return f"{run_date}_{safe}_{digest}"
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def _row(row: sqlite3.Row) -> Dict[str, Any]:
+    out = dict(row)
+    out["payload"] = json.loads(out.get("payload") or "{}")
+    out["result"] = json.loads(out["result"]) if out.get("result") else None
+    return out
+
+
+class WorkQueue:
+    """
+    SQLite 파일 하나로 된 작업 큐 — 브로커 없이 여러 프로세스/노드가 같은 파일에서 작업을 가져간다.
+    - enqueue: (기업, 템플릿, 실행일) 멱등 키로 INSERT OR IGNORE
+    - claim: BEGIN IMMEDIATE 트랜잭션 안에서 대기 작업(또는 리스가 만료된 작업)을 lease_s 동안 점유
+    - heartbeat: 처리 중인 작업의 리스 연장 (죽은 워커의 작업은 리스 만료 후 다른 워커가 다시 가져간다)
+    - complete / fail: 현재 리스 소유자만 기록할 수 있다 (리스를 잃은 워커의 늦은 결과는 버린다)
+    - max_attempts 번 점유된 뒤에도 끝나지 않은 작업은 failed
+    여러 호스트에서 쓸 때는 fcntl 잠금이 제대로 동작하는 공유 파일시스템에 둔다 (WAL 은 쓰지 않는다).
+    """
+
+    def __init__(self, path: str, *, lease_s: float = 300.0, max_attempts: int = 3, busy_timeout_s: float = 30.0) -> None:
+        self.path = path
+        self.lease_s = max(1.0, float(lease_s))
+        self.max_attempts = max(1, int(max_attempts))
+        self.busy_timeout_s = float(busy_timeout_s)
+        ensure_dir(os.path.dirname(os.path.abspath(path)))
+        conn = sqlite3.connect(path, timeout=self.busy_timeout_s)
+        try:
+            conn.executescript(_SCHEMA)
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('schema_version', ?)", (str(QUEUE_SCHEMA_VERSION),))
+            conn.commit()
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        """호출마다 새 연결 + 쓰기 잠금을 먼저 잡는 트랜잭션 (스레드·프로세스 간 공유 연결 없음)."""
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_s, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    # ---- 생산자 ---------------------------------------------------------------
+
+    def enqueue(self, company: str, template: str, run_date: str, payload: Optional[Dict[str, Any]] = None) -> Tuple[str, bool]:
+        """반환: (키, 새로 추가됐는지)."""
+        added = self.enqueue_many([(company, template, run_date, payload)])
+        return task_key(company, template, run_date), bool(added)
+
+    def enqueue_many(self, items: Sequence[Tuple[str, str, str, Optional[Dict[str, Any]]]]) -> int:
+        """[(기업, 템플릿, 실행일, payload)] 일괄 추가. 이미 있는 키는 상태를 건드리지 않는다. 반환: 새로 추가된 수"""
+        now = time.time()
+        rows = [
+            (task_key(c, t, d), c, t, d, json.dumps(p or {}, ensure_ascii=False), now, now)
+            for c, t, d, p in items
+        ]
+        with self._tx() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (key, company, template, run_date, payload, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return conn.total_changes - before
+
+    def retry_failed(self) -> int:
+        """failed 작업을 attempts 를 비우고 다시 대기 상태로. 반환: 작업 수"""
+        with self._tx() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status='pending', attempts=0, owner='', error='', updated_at=? WHERE status='failed'",
+                (time.time(),),
+            )
+            return cur.rowcount
+
+    # ---- 워커 -----------------------------------------------------------------
+
+    def claim(self, owner: str, limit: int = 1) -> List[Dict[str, Any]]:
+        """대기 작업과 리스가 만료된 작업을 최대 limit 개 점유 (attempts 가 다 찬 만료 작업은 failed 로 정리)."""
+        now = time.time()
+        with self._tx() as conn:
+            conn.execute(
+                "UPDATE tasks SET status='failed', owner='', updated_at=?, "
+                "error=CASE WHEN error='' THEN 'lease expired after max attempts' ELSE error END "
+                "WHERE status='leased' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            keys = [
+                r["key"] for r in conn.execute(
+                    "SELECT key FROM tasks WHERE status='pending' OR (status='leased' AND lease_until < ?) "
+                    "ORDER BY created_at, key LIMIT ?",
+                    (now, max(1, int(limit))),
+                )
+            ]
+            if not keys:
+                return []
+            marks = ",".join("?" * len(keys))
+            conn.execute(
+                f"UPDATE tasks SET status='leased', owner=?, attempts=attempts+1, lease_until=?, heartbeat_at=?, updated_at=? "
+                f"WHERE key IN ({marks})",
+                (owner, now + self.lease_s, now, now, *keys),
+            )
+            return [_row(r) for r in conn.execute(f"SELECT * FROM tasks WHERE key IN ({marks}) ORDER BY created_at, key", keys)]
+
+    def heartbeat(self, owner: str, keys: Sequence[str]) -> List[str]:
+        """리스 연장. 반환: 아직 이 owner 가 점유 중인 키 (빠진 키는 리스를 잃은 것)."""
+        if not keys:
+            return []
+        now = time.time()
+        marks = ",".join("?" * len(keys))
+        with self._tx() as conn:
+            conn.execute(
+                f"UPDATE tasks SET lease_until=?, heartbeat_at=? WHERE owner=? AND status='leased' AND key IN ({marks})",
+                (now + self.lease_s, now, owner, *keys),
+            )
+            return [
+                r["key"] for r in conn.execute(
+                    f"SELECT key FROM tasks WHERE owner=? AND status='leased' AND key IN ({marks})", (owner, *keys),
+                )
+            ]
+
+    def complete(self, owner: str, key: str, result: Dict[str, Any]) -> bool:
+        """점유 중인 작업을 done 으로. 리스를 잃었으면(다른 워커가 가져감) False."""
+        with self._tx() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status='done', result=?, error='', lease_until=0, updated_at=? "
+                "WHERE key=? AND owner=? AND status='leased'",
+                (json.dumps(result, ensure_ascii=False), time.time(), key, owner),
+            )
+            return cur.rowcount == 1
+
+    def fail(self, owner: str, key: str, error: str) -> bool:
+        """처리 실패 기록: attempts 가 남았으면 다시 대기, 아니면 failed. 리스를 잃었으면 False."""
+        with self._tx() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status=CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "owner='', error=?, lease_until=0, updated_at=? "
+                "WHERE key=? AND owner=? AND status='leased'",
+                (self.max_attempts, error, time.time(), key, owner),
+            )
+            return cur.rowcount == 1
+
+    def release(self, owner: str) -> int:
+        """정상 종료 시 점유 중인 작업을 돌려놓는다 (이번 점유는 시도 횟수에서 뺀다). 반환: 작업 수"""
+        with self._tx() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status='pending', owner='', attempts=MAX(0, attempts-1), lease_until=0, updated_at=? "
+                "WHERE owner=? AND status='leased'",
+                (time.time(), owner),
+            )
+            return cur.rowcount
+
+    # ---- 조회 -----------------------------------------------------------------
+
+    def counts(self) -> Dict[str, int]:
+        with self._tx() as conn:
+            out = {s: 0 for s in STATUSES}
+            out.update({r["status"]: r["n"] for r in conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status")})
+            return out
+
+    def drained(self) -> bool:
+        """대기·점유 중인 작업이 없으면 True (done/failed 만 남음)."""
+        counts = self.counts()
+        return counts["pending"] == 0 and counts["leased"] == 0
+
+    def tasks(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._tx() as conn:
+            if status:
+                rows = conn.execute("SELECT * FROM tasks WHERE status=? ORDER BY created_at, key", (status,))
+            else:
+                rows = conn.execute("SELECT * FROM tasks ORDER BY created_at, key")
+            return [_row(r) for r in rows]
+
+
+class _Heartbeat:
+    """처리 중인 작업의 리스를 interval_s 마다 연장하는 데몬 스레드. lost 에는 리스를 잃은 키가 쌓인다."""
+
+    def __init__(self, queue: WorkQueue, owner: str, keys: Sequence[str], interval_s: float) -> None:
+        self.queue = queue
+        self.owner = owner
+        self.keys = list(keys)
+        self.interval_s = max(0.05, float(interval_s))
+        self.lost: List[str] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="queue-heartbeat", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                held = set(self.queue.heartbeat(self.owner, self.keys))
+            except sqlite3.Error as exc:  # 일시적 잠금 경합 등 — 다음 주기에 다시 시도
+                print(f"[work_queue] heartbeat failed: {exc}")
+                continue
+            self.lost.extend(k for k in self.keys if k not in held)
+            self.keys = [k for k in self.keys if k in held]
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.interval_s + 5.0)
+
+
+def run_worker(
+    queue: WorkQueue,
+    handler: TaskHandler,
+    *,
+    owner: Optional[str] = None,
+    claim_batch: int = 1,
+    heartbeat_s: Optional[float] = None,
+    poll_s: float = 5.0,
+    max_tasks: int = 0,
+) -> Dict[str, Any]:
+    """
+    큐가 빌 때까지(다른 워커가 점유 중인 작업도 끝날 때까지) claim → handler → complete/fail 반복.
+    다른 워커가 점유 중인 작업만 남으면 poll_s 마다 다시 확인한다 (그 워커가 죽으면 리스 만료 후 가져온다).
+    heartbeat_s 미지정 시 lease_s / 3. max_tasks > 0 이면 그만큼 처리하고 멈춘다.
+    반환: {"owner", "claimed", "done", "failed", "lost"}
+    """
+    owner = owner or default_owner()
+    interval = heartbeat_s if heartbeat_s else queue.lease_s / 3.0
+    summary: Dict[str, Any] = {"owner": owner, "claimed": 0, "done": 0, "failed": 0, "lost": 0}
+    try:
+        while not max_tasks or summary["claimed"] < max_tasks:
+            limit = max(1, int(claim_batch))
+            if max_tasks:
+                limit = min(limit, max_tasks - summary["claimed"])
+            tasks = queue.claim(owner, limit)
+            if not tasks:
+                if queue.drained():
+                    break
+                time.sleep(poll_s)
+                continue
+            summary["claimed"] += len(tasks)
+            print(f"[work_queue] {owner} claimed {len(tasks)}: {', '.join(t['key'] for t in tasks)}")
+            with _Heartbeat(queue, owner, [t["key"] for t in tasks], interval):
+                try:
+                    outcomes = handler(tasks)
+                except Exception as exc:
+                    outcomes = {t["key"]: (False, {"error": f"{type(exc).__name__}: {exc}"}) for t in tasks}
+            for task in tasks:
+                ok, info = outcomes.get(task["key"], (False, {"error": "handler returned no outcome"}))
+                if ok:
+                    recorded = queue.complete(owner, task["key"], info)
+                else:
+                    recorded = queue.fail(owner, task["key"], str(info.get("error", "failed")))
+                if not recorded:
+                    summary["lost"] += 1
+                    print(f"[work_queue] {owner} lost the lease on {task['key']}; result discarded")
+                else:
+                    summary["done" if ok else "failed"] += 1
+    finally:
+        queue.release(owner)
+    return summary
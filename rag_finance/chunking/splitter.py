@@ -1,33 +1,154 @@
 from __future__ import annotations
-from typing import Dict, List
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import Dict, List, Sequence, Tuple
 from tqdm import tqdm
 
 from rag_finance.entities.company_maps import resolve_company_from_text
 
+DEFAULT_SEPARATORS: Tuple[str, ...] = ("\n\n", "\n", ".", " ", "")
+
+Span = Tuple[int, int]
+
+
+def _piece_spans(text: str, start: int, end: int, separator: str) -> List[Span]:
+    """text[start:end] 를 separator 앞에서 자른 조각 span 들(구분자는 다음 조각의 앞에 붙음)."""
+    if not separator:
+        return [(i, i + 1) for i in range(start, end)]
+    cuts = [start]
+    pos = text.find(separator, start, end)
+    while pos != -1:
+        cuts.append(pos)
+        pos = text.find(separator, pos + len(separator), end)
+    cuts.append(end)
+    return [(a, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+
+
+def _strip_span(text: str, start: int, end: int) -> Span:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _emit_stripped(text: str, start: int, end: int, out: List[Span]) -> None:
+    start, end = _strip_span(text, start, end)
+    if end > start:
+        out.append((start, end))
+
+
+def _merge_spans(text: str, spans: List[Span], chunk_size: int, chunk_overlap: int, out: List[Span]) -> None:
+    """인접 조각들을 chunk_size 이하로 묶고, 다음 청크는 chunk_overlap 이하만큼 뒤쪽 조각을 이어받는다."""
+    current: List[Span] = []
+    head = 0
+    total = 0
+    for s, e in spans:
+        n = e - s
+        if total + n > chunk_size:
+            if len(current) > head:
+                _emit_stripped(text, current[head][0], current[-1][1], out)
+                while total > chunk_overlap or (total + n > chunk_size and total > 0):
+                    total -= current[head][1] - current[head][0]
+                    head += 1
+        current.append((s, e))
+        total += n
+    if len(current) > head:
+        _emit_stripped(text, current[head][0], current[-1][1], out)
+
+
+def _split_spans(
+    text: str,
+    start: int,
+    end: int,
+    separators: Sequence[str],
+    chunk_size: int,
+    chunk_overlap: int,
+    out: List[Span],
+) -> None:
+    separator = separators[-1]
+    rest: Sequence[str] = ()
+    for i, sep in enumerate(separators):
+        if sep == "":
+            separator = sep
+            break
+        if text.find(sep, start, end) != -1:
+            separator = sep
+            rest = separators[i + 1:]
+            break
+
+    if not separator and chunk_size > 1:
+        # 문자 단위 조각(길이 1)의 병합은 고정 폭 슬라이딩 윈도우와 같다.
+        step = chunk_size - min(chunk_overlap, chunk_size - 1)
+        pos = start
+        while pos + chunk_size < end:
+            _emit_stripped(text, pos, pos + chunk_size, out)
+            pos += step
+        _emit_stripped(text, pos, end, out)
+        return
+
+    good: List[Span] = []
+    for s, e in _piece_spans(text, start, end, separator):
+        if e - s < chunk_size:
+            good.append((s, e))
+            continue
+        if good:
+            _merge_spans(text, good, chunk_size, chunk_overlap, out)
+            good = []
+        if not rest:
+            out.append((s, e))
+        else:
+            _split_spans(text, s, e, rest, chunk_size, chunk_overlap, out)
+    if good:
+        _merge_spans(text, good, chunk_size, chunk_overlap, out)
+
+
+def _len_stripped(text: str, start: int, end: int) -> int:
+    s, e = _strip_span(text, start, end)
+    return e - s
+
+
+def split_text_offsets(
+    text: str,
+    chunk_size: int = 800,
+    chunk_overlap: int = 100,
+    separators: Sequence[str] = DEFAULT_SEPARATORS,
+) -> List[Span]:
+    """
+    RecursiveCharacterTextSplitter(keep_separator=True, strip_whitespace=True)와 같은 규칙으로
+    자르되, 문자열 복사 없이 text 안의 (start, end) 오프셋만 한 번의 재귀 패스로 계산한다.
+    text[start:end] 가 LangChain splitter 의 청크 문자열과 동일하다.
+    """
+    if chunk_overlap > chunk_size:
+        raise ValueError(f"chunk_overlap ({chunk_overlap}) must not exceed chunk_size ({chunk_size})")
+    out: List[Span] = []
+    if text:
+        _split_spans(text, 0, len(text), tuple(separators), chunk_size, chunk_overlap, out)
+    return out
+
 def make_chunks(
     cleaned_docs: List[Dict],
     chunk_size: int = 800,
     chunk_overlap: int = 100,
     min_char_len: int = 300,
+    near_dup=None,
 ) -> List[Dict]:
     """
     ingestion.loaders.load_and_clean_documents 결과(List[dict])를 입력 받아
     문서별로 청킹한 리스트를 반환.
+    near_dup(ingestion.dedup.NearDupIndex) 이 주어지면 같은 (소스 타입, 기업) 안에서 문서 간 근접 중복 청크를 제거한다.
     반환 아이템 예:
     {
       "file_name": str,
       "source_type": "report" | "etc",
       "chunk_index": int,
       "text": str,
+      "start_index": int,   # 정제 문서(text) 내 오프셋
+      "end_index": int,
+      "dup_count": int,     # 버려진 근접 중복 사본 수 (문서 단위 + 청크 단위)
+      "published_at": str,  # 문서 게시일 YYYY-MM-DD (미상이면 "")
+      "dup_dates": [str],   # 버려진 사본들의 다른 게시일 (since/until 판정에 함께 사용)
+      "dup_companies": [str],  # (있으면) 버려진 사본들의 다른 기업명
     }
     """
-    splitter = RecursiveCharacterTextSplitter(
-        separators=["\n\n", "\n", ".", " ", ""],
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-    )
-
     out: List[Dict] = []
     for row in tqdm(cleaned_docs, desc="[chunking] split docs", unit="doc"):
         text = row.get("text", "") or ""
@@ -40,16 +161,25 @@ def make_chunks(
         if source_type == "report":
             company_name, company_code = resolve_company_from_text(text)
 
-        chunks = splitter.split_text(text)
-        chunks = [c for c in chunks if len(c.strip()) >= min_char_len]
-        for i, ck in enumerate(chunks):
+        spans = split_text_offsets(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        spans = [(s, e) for s, e in spans if _len_stripped(text, s, e) >= min_char_len]
+        for i, (start, end) in enumerate(spans):
             out.append({
                 "file_name": row["file_name"],
                 "source_type": source_type,
                 "chunk_index": i,
-                "text": ck,
+                "text": text[start:end],
+                "start_index": start,
+                "end_index": end,
                 "chunk_id": f"{row['file_name']}_chunk_{i}",
                 "company": company_name,
                 "company_code": company_code,
+                "dup_count": int(row.get("dup_count", 0)),
+                "published_at": row.get("published_at", ""),
+                "dup_dates": list(row.get("dup_dates") or []),
             })
+    if near_dup is not None:
+        before = len(out)
+        out = near_dup.dedupe(out, key_fn=lambda c: c["chunk_id"], text_fn=lambda c: c["text"])
+        print(f"[dedup] chunks: {before} -> {len(out)} ({before - len(out)} near-duplicates dropped)")
     return out
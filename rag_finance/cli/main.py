@@ -2,9 +2,9 @@ from __future__ import annotations
 import argparse
 import os
 
-from rag_finance.config import load_config
-from rag_finance.indexing.faiss_index import _build_embedding  # 재사용
-from rag_finance.retrieval.pipeline import retrieve_with_keywords
+# 모듈 최상위에서는 표준 라이브러리만 import 한다: --help·인자 오류·thin client 와
+# spawn 워커(__mp_main__ 로 이 모듈을 다시 읽는다)가 langchain/torch 로딩을 기다리지 않게
+# 무거운 의존성은 각 하위 명령 안에서 import (scripts.bench_startup 으로 확인).
 
 def _print_results(docs, query: str, max_len: int = 320):
     print("=" * 100)
@@ -29,26 +29,241 @@ def main():
     sp_r.add_argument("--config", type=str, default="configs/default.yaml")
     sp_r.add_argument("--q", type=str, required=True, help="query text")
     sp_r.add_argument("--topk", type=int, default=10)
+    sp_r.add_argument("--server", type=str, default=None, help="상주 서비스 주소(예: 127.0.0.1:8765). 지정 시 thin client로 동작")
+    sp_r.add_argument("--since", type=str, default=None, help="게시일 하한 (YYYY, YYYY-MM, YYYY-MM-DD)")
+    sp_r.add_argument("--until", type=str, default=None, help="게시일 상한 (포함)")
+    sp_r.add_argument("--deadline-ms", type=float, default=None, help="지연 예산(ms). 초과가 예상되면 단계별로 품질을 낮춘다")
+
+    # serve
+    sp_s = sub.add_parser("serve", help="Run a long-lived retrieval/report service with warm models")
+    sp_s.add_argument("--config", type=str, default="configs/default.yaml")
+    sp_s.add_argument("--host", type=str, default=None)
+    sp_s.add_argument("--port", type=int, default=None)
+    sp_s.add_argument("--api-key", type=str, default=None, help="Groq API Key (/report 용, 미지정 시 환경변수)")
+    sp_s.add_argument("--env-file", type=str, default=None)
+    sp_s.add_argument("--verbose", action="store_true", help="요청 로그 출력")
+    sp_s.add_argument("--workers", type=int, default=None,
+                      help="pre-fork 워커 수 (>1 이면 부모가 모델·인덱스를 한 번 로드하고 fork, 기본: service.prefork.workers)")
+
+    # generate-batch
+    sp_b = sub.add_parser("generate-batch", help="Generate reports for many companies (retrieval/LLM/export overlapped, resumable)")
+    sp_b.add_argument("--config", type=str, default="configs/default.yaml")
+    sp_b.add_argument("--companies", nargs="*", default=None, help="기업명 목록 (기본: COMPANY_LIST 전체)")
+    sp_b.add_argument("--out-dir", type=str, default=None, help="리포트/PDF/체크포인트 저장 디렉터리")
+    sp_b.add_argument("--model", type=str, default="llama-3.3-70b-versatile")
+    sp_b.add_argument("--topk", type=int, default=10)
+    sp_b.add_argument("--tabular-dir", type=str, default=None, help="정형 데이터 디렉터리 또는 컴파일된 tabular 스토어")
+    sp_b.add_argument("--no-pdf", action="store_true", help="PDF 저장 생략")
+    sp_b.add_argument("--api-key", type=str, default=None)
+    sp_b.add_argument("--env-file", type=str, default=None)
+
+    # queue
+    sp_q = sub.add_parser("queue", help="Shared SQLite work queue: spread report generation over several nodes")
+    sp_q.add_argument("action", choices=["enqueue", "work", "status", "collect", "retry-failed"])
+    sp_q.add_argument("--config", type=str, default="configs/default.yaml")
+    sp_q.add_argument("--db", type=str, default=None, help="큐 파일 (기본: batch.work_queue.path)")
+    sp_q.add_argument("--companies", nargs="*", default=None, help="enqueue: 기업명 목록 (기본: COMPANY_LIST 전체)")
+    sp_q.add_argument("--date", type=str, default=None, help="enqueue: 실행일 (멱등 키의 일부, 기본: 오늘 YYYY-MM-DD)")
+    sp_q.add_argument("--template", type=str, default=None, help="enqueue: 질의 템플릿 (기본: batch.query_template)")
+    sp_q.add_argument("--out-dir", type=str, default=None,
+                      help="work: 리포트/PDF 저장 디렉터리 (기본: {batch.out_dir}/{호스트명}), collect: 모을 디렉터리")
+    sp_q.add_argument("--max-tasks", type=int, default=0, help="work: 처리할 최대 작업 수 (0 = 큐가 빌 때까지)")
+    sp_q.add_argument("--model", type=str, default="llama-3.3-70b-versatile")
+    sp_q.add_argument("--topk", type=int, default=10)
+    sp_q.add_argument("--tabular-dir", type=str, default=None)
+    sp_q.add_argument("--no-pdf", action="store_true")
+    sp_q.add_argument("--api-key", type=str, default=None)
+    sp_q.add_argument("--env-file", type=str, default=None)
+
+    # shard-worker
+    sp_w = sub.add_parser("shard-worker", help="Serve one index partition (FAISS+BM25 top-k) for scatter-gather retrieval")
+    sp_w.add_argument("--config", type=str, default="configs/default.yaml")
+    sp_w.add_argument("--part-dir", type=str, required=True, help="파티션 디렉터리 (예: indexes/all/<build_id>/parts/0)")
+    sp_w.add_argument("--host", type=str, default="127.0.0.1",
+                      help="바인드 주소 (loopback 이 아니면 공유 키 필수: RAG_FINANCE_PARTITION_KEY 또는 partitions.authkey_file)")
+    sp_w.add_argument("--port", type=int, required=True)
 
     args = ap.parse_args()
 
-    if args.cmd == "retrieve":
+    if args.cmd == "retrieve" and args.server:
+        from rag_finance.service.client import ServiceClient
+
+        docs, dbg = ServiceClient(args.server).retrieve(
+            args.q, topk=args.topk, since=args.since, until=args.until, deadline_ms=args.deadline_ms,
+        )
+        print(f"[dbg] {dbg}")
+        _print_results(docs, query=args.q)
+    elif args.cmd == "retrieve":
+        from rag_finance.config import load_config
+        from rag_finance.indexing.faiss_index import build_embedding_from_config
+        from rag_finance.retrieval.pipeline import retrieve_with_keywords
+
         cfg = load_config(args.config)
         emb_cfg = cfg["embedding"]
-        embedding = _build_embedding(
-            model_name=emb_cfg["model_name"],
-            device=emb_cfg["device"],
-            normalize=emb_cfg["normalize"],
-        )
+        embedding = build_embedding_from_config(emb_cfg)
         docs, dbg = retrieve_with_keywords(
             query=args.q,
             config=cfg,
             embedding_model=embedding,
             topk=args.topk,
             show_progress=True,
+            since=args.since,
+            until=args.until,
+            deadline_ms=args.deadline_ms,
         )
         print(f"[dbg] {dbg}")
         _print_results(docs, query=args.q)
+    elif args.cmd == "serve":
+        _serve(args)
+    elif args.cmd == "generate-batch":
+        _generate_batch(args)
+    elif args.cmd == "queue":
+        _queue(args)
+    elif args.cmd == "shard-worker":
+        _shard_worker(args)
+
+def _serve(args) -> None:
+    from rag_finance.config import load_config
+    from rag_finance.llm.report_generator import load_api_key
+    from rag_finance.service.engine import ServiceEngine
+    from rag_finance.service.server import serve
+
+    cfg = load_config(args.config)
+    svc_cfg = cfg.get("service", {}) or {}
+
+    llm_client = None
+    try:
+        from groq import Groq
+        llm_client = Groq(api_key=load_api_key(args.api_key, args.env_file))
+    except RuntimeError as exc:
+        print(f"[service] /report 비활성화: {exc}")
+
+    host = args.host or svc_cfg.get("host", "127.0.0.1")
+    port = args.port if args.port is not None else int(svc_cfg.get("port", 8765))
+    workers = args.workers if args.workers is not None else int((svc_cfg.get("prefork", {}) or {}).get("workers", 0) or 0)
+    if workers > 1:
+        from rag_finance.service.prefork import PreforkServer
+
+        # Groq 클라이언트는 fork 전에 만들지만 연결은 워커가 첫 요청 때 연다 (부모는 요청을 보내지 않는다)
+        PreforkServer(cfg, workers=workers, host=host, port=port, llm_client=llm_client, verbose=args.verbose).run()
+        return
+    engine = ServiceEngine(cfg, llm_client=llm_client)
+    serve(engine, host=host, port=port, verbose=args.verbose)
+
+def _batch_runner(args, cfg, out_dir: str):
+    """generate-batch / queue work 공용: AsyncGroq + 상주 엔진으로 BatchRunner 구성."""
+    from groq import AsyncGroq
+
+    from rag_finance.batch.runner import DEFAULT_QUERY_TEMPLATE, BatchRunner
+    from rag_finance.llm.report_generator import load_api_key
+    from rag_finance.service.engine import ServiceEngine
+
+    batch_cfg = cfg.get("batch", {}) or {}
+    try:
+        llm_client = AsyncGroq(api_key=load_api_key(args.api_key, args.env_file))
+    except RuntimeError as exc:
+        raise SystemExit(f"[{args.cmd}] {exc}")
+
+    tabular_source = args.tabular_dir
+    if tabular_source is None:
+        store = cfg["paths"].get("tabular_store")
+        tabular_source = store if store and os.path.isfile(store) else cfg["paths"].get("tabular_dir")
+
+    return BatchRunner(
+        cfg,
+        engine=ServiceEngine(cfg),
+        llm_client=llm_client,
+        out_dir=out_dir,
+        model=args.model,
+        topk=args.topk,
+        tabular_source=tabular_source,
+        query_template=batch_cfg.get("query_template", DEFAULT_QUERY_TEMPLATE),
+        pdf=not args.no_pdf,
+    )
+
+def _generate_batch(args) -> None:
+    from rag_finance.config import load_config
+    from rag_finance.entities.company_maps import COMPANY_LIST
+
+    cfg = load_config(args.config)
+    batch_cfg = cfg.get("batch", {}) or {}
+    with _batch_runner(args, cfg, args.out_dir or batch_cfg.get("out_dir", "reports/batch")) as runner:
+        summary = runner.run(args.companies or COMPANY_LIST)
+    if summary["failed"]:
+        raise SystemExit(1)
+
+def _queue(args) -> None:
+    import json
+    import socket
+    from datetime import date
+
+    from rag_finance.batch.work_queue import WorkQueue, run_worker
+    from rag_finance.config import load_config
+
+    cfg = load_config(args.config)
+    batch_cfg = cfg.get("batch", {}) or {}
+    q_cfg = batch_cfg.get("work_queue", {}) or {}
+    queue = WorkQueue(
+        args.db or q_cfg.get("path", "reports/queue.sqlite"),
+        lease_s=float(q_cfg.get("lease_s", 600)),
+        max_attempts=int(q_cfg.get("max_attempts", 3)),
+    )
+
+    if args.action == "enqueue":
+        from rag_finance.batch.runner import DEFAULT_QUERY_TEMPLATE
+        from rag_finance.entities.company_maps import COMPANY_LIST
+
+        template = args.template or batch_cfg.get("query_template", DEFAULT_QUERY_TEMPLATE)
+        run_date = args.date or date.today().isoformat()
+        companies = list(dict.fromkeys(args.companies or COMPANY_LIST))
+        added = queue.enqueue_many([(c, template, run_date, None) for c in companies])
+        print(f"[queue] enqueued {added} new of {len(companies)} tasks for {run_date} (already queued: {len(companies) - added})")
+    elif args.action == "work":
+        out_dir = args.out_dir or os.path.join(batch_cfg.get("out_dir", "reports/batch"), socket.gethostname())
+        # 풀(PDF 워커 프로세스 포함)은 claim 묶음마다가 아니라 워커가 끝날 때 한 번 정리한다
+        with _batch_runner(args, cfg, out_dir) as runner:
+            summary = run_worker(
+                queue,
+                runner.process,
+                claim_batch=int(q_cfg.get("claim_batch", 4)),
+                heartbeat_s=float(q_cfg.get("heartbeat_s", 0) or 0) or None,
+                poll_s=float(q_cfg.get("poll_s", 10)),
+                max_tasks=args.max_tasks,
+            )
+        print(f"[queue] worker {summary['owner']}: claimed={summary['claimed']} done={summary['done']} "
+              f"failed={summary['failed']} lost={summary['lost']} remaining={queue.counts()}")
+    elif args.action == "status":
+        print(f"[queue] {queue.path}: {queue.counts()}")
+        for task in queue.tasks("failed"):
+            print(f"[queue] failed {task['key']} (attempts={task['attempts']}): {task['error']}")
+        for task in queue.tasks("leased"):
+            print(f"[queue] leased {task['key']} by {task['owner']} (attempt {task['attempts']})")
+    elif args.action == "collect":
+        from rag_finance.utils.io_utils import ensure_dir, write_text
+
+        out_dir = args.out_dir or os.path.join(batch_cfg.get("out_dir", "reports/batch"), "collected")
+        ensure_dir(out_dir)
+        done = queue.tasks("done")
+        with open(os.path.join(out_dir, "results.jsonl"), "w", encoding="utf-8") as f:
+            for task in done:
+                result = dict(task["result"] or {})
+                write_text(os.path.join(out_dir, f"{task['key']}.txt"), result.pop("report_text", ""))
+                row = {k: task[k] for k in ("key", "company", "template", "run_date", "attempts")}
+                f.write(json.dumps({**row, **result}, ensure_ascii=False) + "\n")
+        print(f"[queue] collected {len(done)} reports -> {out_dir} (counts: {queue.counts()})")
+    elif args.action == "retry-failed":
+        print(f"[queue] requeued {queue.retry_failed()} failed tasks")
+
+def _shard_worker(args) -> None:
+    from rag_finance.config import load_config
+    from rag_finance.retrieval.scatter import resolve_authkey, serve_partition
+
+    cfg = load_config(args.config)
+    authkey = resolve_authkey(cfg.get("partitions", {}) or {})
+    try:
+        serve_partition(args.part_dir, args.host, args.port, authkey)
+    except ValueError as exc:
+        raise SystemExit(f"[shard-worker] {exc}")
 
 if __name__ == "__main__":
     main()
@@ -28,6 +28,28 @@ COMPANY_CODE = [
 NAME_TO_CODE = {n: c for n, c in zip(COMPANY_LIST, COMPANY_CODE) if c != '000000'}
 CODE_TO_NAME = {c: n for n, c in NAME_TO_CODE.items()}
 
+# 사명 변경/약칭 등으로 외부 데이터(tabular_db 등)와 COMPANY_LIST 표기가 다른 경우
+COMPANY_ALIASES = {
+    'KX하이텍': 'KMH하이텍',
+    '어보브반도체': '어보브',
+    'PS일렉트로닉스': '와이팜',
+}
+
+
+def resolve_company_code(name: str) -> str:
+    """기업명(별칭 포함, 공백 무시) → 종목코드. 모르면 빈 문자열."""
+    key = (name or "").replace(" ", "")
+    key = COMPANY_ALIASES.get(key, key)
+    return NAME_TO_CODE.get(key, "")
+
+
+def names_for_code(code: str) -> List[str]:
+    """종목코드에 대응하는 정식 기업명 + 별칭 목록."""
+    name = CODE_TO_NAME.get(code, "")
+    if not name:
+        return []
+    return [name] + [alias for alias, canon in COMPANY_ALIASES.items() if canon == name]
+
 def extract_company_from_query(query_text: str) -> Tuple[str, str]:
     name = max([c for c in COMPANY_LIST if c in query_text], key=len, default="")
     code: Optional[str] = None
@@ -0,0 +1,261 @@
+from __future__ import annotations
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from rag_finance.indexing.versions import artifact_dir
+from rag_finance.utils.io_utils import ensure_dir, read_json, write_json
+
+# <build_id>/compact/
+#   full.npy       ← 전체 정밀 벡터 (float32, 행 = FAISS 위치 = doc_id) — 검색 시 mmap 으로 후보 행만 읽는다
+#   pca.npz        ← mean, components (pca_dim × d)
+#   codes.faiss    ← 1단계 코드 인덱스: pca16 = IndexScalarQuantizer(fp16) / binary = IndexBinaryFlat(Hamming)
+#   manifest.json
+COMPACT_MANIFEST = "manifest.json"
+COMPACT_SCHEMA_VERSION = 1
+CODE_TYPES = ("pca16", "binary")
+
+
+def compact_dir_for(indexes_dir: str, index_name: str = "all", build_id: Optional[str] = None) -> str:
+    """build_id(없으면 게시본) 버전의 compact/, 버전 없는 예전 레이아웃이면 {index_name}_compact/."""
+    return artifact_dir(indexes_dir, index_name, build_id, "compact", "compact")
+
+
+def fit_pca(vectors: np.ndarray, dim: int, sample: int = 20000, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """공분산 고유분해로 PCA. 반환: (mean (d,), components (dim × d)). dim <= 0 이거나 d 이상이면 회전 없이 단위 행렬."""
+    x = np.asarray(vectors, dtype=np.float32)
+    n, d = x.shape
+    if n > sample:
+        x = x[np.random.default_rng(seed).choice(n, sample, replace=False)]
+    mean = x.mean(axis=0)
+    if dim <= 0 or dim >= d:
+        return mean, np.eye(d, dtype=np.float32)
+    centered = (x - mean).astype(np.float64)
+    eigvals, eigvecs = np.linalg.eigh(centered.T @ centered / max(1, len(x) - 1))
+    top = np.argsort(eigvals)[::-1][:dim]
+    return mean, eigvecs[:, top].T.astype(np.float32)
+
+
+def project(vectors: np.ndarray, mean: np.ndarray, components: np.ndarray) -> np.ndarray:
+    """평균을 뺀 PCA 투영 (n × pca_dim, float32)."""
+    return np.ascontiguousarray((np.asarray(vectors, dtype=np.float32).reshape(-1, mean.shape[0]) - mean) @ components.T)
+
+
+def build_code_index(proj: np.ndarray, codes: str, metric: str):
+    """
+    pca16: 투영 벡터를 fp16 으로 저장하는 IndexScalarQuantizer (원래 인덱스와 같은 척도).
+    binary: 투영 부호 비트(8 차원당 1 바이트)의 IndexBinaryFlat — Hamming 거리.
+    """
+    import faiss
+
+    if codes == "pca16":
+        index = faiss.IndexScalarQuantizer(
+            proj.shape[1], faiss.ScalarQuantizer.QT_fp16,
+            faiss.METRIC_INNER_PRODUCT if metric == "ip" else faiss.METRIC_L2,
+        )
+        index.add(proj)
+        return index
+    if codes == "binary":
+        bits = np.packbits(proj > 0, axis=1)
+        index = faiss.IndexBinaryFlat(bits.shape[1] * 8)
+        index.add(bits)
+        return index
+    raise ValueError(f"codes must be one of {CODE_TYPES}: {codes}")
+
+
+class CompactIndex:
+    """
+    compact/ 산출물 위의 2단계 검색: 코드로 k × oversample 후보를 고른 뒤
+    mmap 한 전체 정밀 벡터로 원래 인덱스 거리(L2 제곱 또는 내적)를 다시 계산해 상위 k 를 낸다.
+    메모리에 상주하는 것은 코드 인덱스와 PCA 행렬뿐이다.
+    """
+
+    def __init__(self, path: str, manifest: Dict[str, Any], oversample: int = 4) -> None:
+        self.path = path
+        self.manifest = manifest
+        self.codes_type = manifest["codes"]
+        self.metric = manifest.get("metric", "l2")
+        self.code_metric = manifest.get("code_metric", self.metric)
+        self.oversample = max(1, int(oversample))
+        with np.load(os.path.join(path, "pca.npz")) as pca:
+            self.mean = pca["mean"]
+            self.components = pca["components"]
+        import faiss
+
+        code_path = os.path.join(path, "codes.faiss")
+        self.codes = faiss.read_index_binary(code_path) if self.codes_type == "binary" else faiss.read_index(code_path)
+        self.full = np.load(os.path.join(path, "full.npy"), mmap_mode="r")
+
+    @classmethod
+    def open(cls, path: str, oversample: int = 4) -> Optional["CompactIndex"]:
+        """manifest 가 없으면(미생성) None."""
+        manifest_path = os.path.join(path, COMPACT_MANIFEST)
+        if not os.path.isfile(manifest_path):
+            return None
+        return cls(path, read_json(manifest_path), oversample=oversample)
+
+    def __len__(self) -> int:
+        return int(self.codes.ntotal)
+
+    def candidates(self, query: np.ndarray, n: int) -> np.ndarray:
+        """1단계: 코드 인덱스만으로 근사 점수 상위 n 개 행."""
+        n = min(n, len(self))
+        if self.codes_type == "binary":
+            qbits = np.packbits(project(query, self.mean, self.components) > 0, axis=1)
+            _, rows = self.codes.search(qbits, n)
+        elif self.code_metric == "ip":
+            # 내적은 평균 항(mean·q)이 모든 문서에 같은 상수라 평균을 빼지 않은 질의로 충분
+            _, rows = self.codes.search(np.ascontiguousarray((self.components @ query)[None, :]), n)
+        else:
+            _, rows = self.codes.search(project(query, self.mean, self.components), n)
+        rows = rows[0]
+        return rows[rows >= 0]
+
+    def search(self, query_vector: Sequence[float], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """반환: (행 번호, 거리) — FAISS 와 같은 척도(L2 제곱 오름차순 / 내적 내림차순)."""
+        q = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        cand = np.sort(self.candidates(q, k * self.oversample))  # 정렬된 행 순서로 읽으면 mmap 접근이 순차적
+        full = np.asarray(self.full[cand], dtype=np.float32)
+        if self.metric == "ip":
+            score = full @ q
+            order = np.argsort(-score, kind="stable")[:k]
+        else:
+            score = ((full - q) ** 2).sum(axis=1)
+            order = np.argsort(score, kind="stable")[:k]
+        return cand[order], score[order]
+
+    def vectors(self, ids: np.ndarray) -> Optional[np.ndarray]:
+        """doc_id(=행) 의 정밀 벡터 (hybrid_pre 용). 범위 밖/예전 id 면 None."""
+        if len(ids) == 0 or ids.min() < 0 or ids.max() >= len(self):
+            return None
+        return np.asarray(self.full[np.asarray(ids)], dtype=np.float32)
+
+    def documents(self, vectorstore, rows: np.ndarray) -> List[Document]:
+        """행 번호 → vectorstore docstore 의 Document (FAISS 검색 결과와 같은 객체)."""
+        mapping = vectorstore.index_to_docstore_id
+        return [vectorstore.docstore.search(mapping[int(r)]) for r in rows]
+
+    def search_documents(self, vectorstore, query_vector: Sequence[float], k: int) -> List[Document]:
+        rows, _ = self.search(query_vector, k)
+        return self.documents(vectorstore, rows)
+
+
+def evaluate_recall(index: CompactIndex, k: int, n_queries: int = 200, seed: int = 0) -> Dict[str, Any]:
+    """
+    저장 벡터 표본을 질의로 써서 recall@k = |compact top-k ∩ 정확 top-k| / k (자기 자신은 양쪽에서 제외),
+    질의당 1단계+재점수 시간도 잰다.
+    """
+    full = np.asarray(index.full, dtype=np.float32)
+    n = full.shape[0]
+    if n < 2 or n_queries <= 0:
+        return {"k": k, "queries": 0}
+    k = min(k, n - 1)
+    rows = np.random.default_rng(seed).choice(n, min(n_queries, n), replace=False)
+    queries = full[rows]
+    if index.metric == "ip":
+        score = -(queries @ full.T)
+    else:
+        score = (full ** 2).sum(axis=1)[None, :] - 2.0 * (queries @ full.T)
+    score[np.arange(len(rows)), rows] = np.inf
+    exact = np.argpartition(score, k - 1, axis=1)[:, :k]
+
+    recalls: List[float] = []
+    start = time.perf_counter()
+    for i, r in enumerate(rows):
+        got, _ = index.search(queries[i], k + 1)
+        approx = [g for g in got.tolist() if g != int(r)][:k]
+        recalls.append(len(set(approx) & set(exact[i].tolist())) / k)
+    ms = (time.perf_counter() - start) * 1000.0 / len(rows)
+    return {"k": k, "queries": len(rows), "recall": round(float(np.mean(recalls)), 4), "search_ms": round(ms, 3)}
+
+
+def build_compact(
+    vectors: np.ndarray,
+    out_dir: str,
+    *,
+    codes: str = "pca16",
+    pca_dim: int = 128,
+    metric: str = "l2",
+    oversample: int = 4,
+    eval_k: int = 300,
+    eval_queries: int = 200,
+) -> Dict[str, Any]:
+    """
+    전체 인덱스 벡터(FAISS 위치 순)로 compact/ 산출물을 만들고 manifest(메모리 절감, recall@eval_k) 작성.
+    임시 디렉터리에 만든 뒤 교체한다. 반환: manifest dict
+    """
+    if codes not in CODE_TYPES:
+        raise ValueError(f"codes must be one of {CODE_TYPES}: {codes}")
+    full = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, d = full.shape
+    if codes == "binary" and (pca_dim <= 0 or pca_dim >= d):
+        pca_dim = d
+    mean, components = fit_pca(full, pca_dim)
+    # 단위 벡터면 L2 순위 = 내적 순위: 투영 공간 L2 는 잘린 성분의 노름을 무시하므로 내적으로 근사하는 편이 정확하다
+    unit = bool(np.allclose(np.linalg.norm(full, axis=1), 1.0, atol=1e-3))
+    code_metric = "ip" if metric == "ip" or unit else "l2"
+    code_index = build_code_index(project(full, mean, components), codes, code_metric)
+
+    tmp_dir = out_dir + ".tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    ensure_dir(tmp_dir)
+    np.save(os.path.join(tmp_dir, "full.npy"), full)
+    np.savez(os.path.join(tmp_dir, "pca.npz"), mean=mean, components=components)
+    import faiss
+
+    code_path = os.path.join(tmp_dir, "codes.faiss")
+    if codes == "binary":
+        faiss.write_index_binary(code_index, code_path)
+    else:
+        faiss.write_index(code_index, code_path)
+    resident = n * code_index.code_size + mean.nbytes + components.nbytes
+    manifest: Dict[str, Any] = {
+        "schema_version": COMPACT_SCHEMA_VERSION,
+        "codes": codes,
+        "dim": d,
+        "pca_dim": int(components.shape[0]),
+        "metric": metric,
+        "code_metric": code_metric,
+        "chunks": n,
+        "memory": {
+            "full_bytes": int(full.nbytes),
+            "resident_bytes": int(resident),
+            "ratio": round(full.nbytes / max(1, resident), 2),
+        },
+    }
+    write_json(os.path.join(tmp_dir, COMPACT_MANIFEST), manifest)
+    manifest["eval"] = evaluate_recall(CompactIndex(tmp_dir, manifest, oversample=oversample), eval_k, eval_queries)
+    manifest["eval"]["oversample"] = int(oversample)
+    write_json(os.path.join(tmp_dir, COMPACT_MANIFEST), manifest)
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.replace(tmp_dir, out_dir)
+    return manifest
+
+
+def describe_compact(manifest: Dict[str, Any]) -> str:
+    """build 로그용 한 줄 요약: 코드 종류, 상주 메모리 절감, recall@k."""
+    mem, ev = manifest["memory"], manifest.get("eval") or {}
+    line = (
+        f"{manifest['codes']} dim={manifest['dim']}->{manifest['pca_dim']} "
+        f"resident={mem['resident_bytes'] / 2**20:.1f}MiB vs full={mem['full_bytes'] / 2**20:.1f}MiB (x{mem['ratio']})"
+    )
+    if ev.get("queries"):
+        line += f" recall@{ev['k']}={ev['recall']:.3f} ({ev['queries']} queries, oversample={ev.get('oversample')}, {ev['search_ms']:.2f}ms/query)"
+    return line
+
+
+def open_compact(config: Dict[str, Any], build_id: Optional[str] = None, index_name: str = "all") -> Optional[CompactIndex]:
+    """compact.enable 이고 해당 버전에 compact/ 가 있으면 열어서 반환."""
+    compact_cfg = config.get("compact", {}) or {}
+    if not compact_cfg.get("enable", False):
+        return None
+    return CompactIndex.open(
+        compact_dir_for(config["paths"]["indexes_dir"], index_name, build_id),
+        oversample=int(compact_cfg.get("oversample", 4)),
+    )
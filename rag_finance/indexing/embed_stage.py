@@ -0,0 +1,144 @@
+from __future__ import annotations
+import hashlib
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rag_finance.utils.io_utils import ensure_dir, read_json, write_json
+
+# 워커 프로세스마다 한 번 로드하는 임베딩 모델 (initializer 에서 설정)
+_WORKER_EMBEDDING = None
+
+
+def work_dir_for(indexes_dir: str, index_name: str = "all") -> str:
+    return os.path.join(indexes_dir, f"{index_name}_embed_work")
+
+
+def _fingerprint(emb_cfg: Dict[str, Any], texts: Sequence[str]) -> str:
+    """shard 체크포인트 식별자: 모델 설정 + shard 텍스트 (청킹/모델이 바뀌면 다시 임베딩)."""
+    h = hashlib.sha1()
+    for key in ("model_name", "backend", "normalize"):
+        h.update(f"{key}={emb_cfg.get(key)}\n".encode("utf-8"))
+    for t in texts:
+        h.update(t.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _shard_paths(work_dir: str, i: int) -> Tuple[str, str]:
+    return os.path.join(work_dir, f"{i:05d}.npy"), os.path.join(work_dir, f"{i:05d}.json")
+
+
+def _load_done(work_dir: str, i: int, fingerprint: str, n: int) -> Optional[np.ndarray]:
+    """완료된 shard 체크포인트 (지문·행 수가 맞을 때만)."""
+    vec_path, meta_path = _shard_paths(work_dir, i)
+    if not (os.path.exists(vec_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        meta = read_json(meta_path)
+        if meta.get("fingerprint") != fingerprint or meta.get("rows") != n:
+            return None
+        vectors = np.load(vec_path)
+    except (OSError, ValueError):
+        return None
+    return vectors if vectors.shape[0] == n else None
+
+
+def _save_shard(work_dir: str, i: int, fingerprint: str, vectors: np.ndarray, seconds: float) -> None:
+    """벡터 → 메타 순서로 tmp 에 쓰고 rename (메타가 있으면 벡터도 온전히 써진 것)."""
+    vec_path, meta_path = _shard_paths(work_dir, i)
+    tmp_vec = vec_path + ".tmp.npy"
+    np.save(tmp_vec, vectors)
+    os.replace(tmp_vec, vec_path)
+    write_json(meta_path + ".tmp", {"fingerprint": fingerprint, "rows": int(vectors.shape[0]), "seconds": round(seconds, 2)})
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def _embed(embedding, texts: Sequence[str]) -> np.ndarray:
+    return np.asarray(embedding.embed_documents(list(texts)), dtype=np.float32)
+
+
+def _init_worker(emb_cfg: Dict[str, Any]) -> None:
+    """(프로세스 풀 워커) 모델 복제본을 워커당 한 번 로드."""
+    global _WORKER_EMBEDDING
+    from rag_finance.indexing.faiss_index import build_embedding_from_config
+
+    _WORKER_EMBEDDING = build_embedding_from_config(emb_cfg, query_cache=False)
+
+
+def _embed_shard(work_dir: str, i: int, fingerprint: str, texts: Sequence[str]) -> Tuple[int, int, float]:
+    """(프로세스 풀 워커) shard 하나 임베딩 후 바로 디스크에 저장. 벡터는 파일로만 돌려준다."""
+    start = time.perf_counter()
+    vectors = _embed(_WORKER_EMBEDDING, texts)
+    seconds = time.perf_counter() - start
+    _save_shard(work_dir, i, fingerprint, vectors, seconds)
+    return i, len(texts), seconds
+
+
+def embed_texts(
+    texts: Sequence[str],
+    emb_cfg: Dict[str, Any],
+    work_dir: str,
+    embedding=None,
+    workers: int = 1,
+    shard_size: int = 2048,
+    threads_per_worker: int = 0,
+) -> np.ndarray:
+    """
+    청크 텍스트를 shard_size 단위 shard 로 나눠 임베딩하고 shard 마다 work_dir 에 체크포인트로 저장.
+    - 중단 후 다시 실행하면 지문(모델 설정 + 텍스트)이 맞는 완료 shard 는 건너뛴다.
+    - workers > 1 이면 spawn 프로세스 풀에서 워커마다 모델 복제본을 하나씩 띄운다
+      (threads_per_worker=0 이면 코어 수를 워커 수로 나눠 intra-op 스레드를 배분해 과다 구독을 막는다).
+    - workers <= 1 이면 현재 프로세스에서 embedding(없으면 새로 로드)으로 순서대로 처리한다.
+    반환: (len(texts), dim) float32 배열 (입력 순서). work_dir 정리는 인덱스 저장 후 호출 측에서 한다.
+    """
+    shard_size = max(1, int(shard_size))
+    shards = [(i, texts[s:s + shard_size]) for i, s in enumerate(range(0, len(texts), shard_size))]
+    ensure_dir(work_dir)
+    fingerprints = {i: _fingerprint(emb_cfg, chunk) for i, chunk in shards}
+
+    done: Dict[int, np.ndarray] = {}
+    for i, chunk in shards:
+        vectors = _load_done(work_dir, i, fingerprints[i], len(chunk))
+        if vectors is not None:
+            done[i] = vectors
+    todo = [(i, chunk) for i, chunk in shards if i not in done]
+    if done:
+        print(f"[build_index] embed: resuming, {len(done)}/{len(shards)} shards already done")
+
+    workers = max(1, min(int(workers), len(todo))) if todo else 1
+    start = time.perf_counter()
+    finished = len(done)
+    if todo and workers > 1:
+        threads = int(threads_per_worker) or max(1, (os.cpu_count() or 1) // workers)
+        worker_cfg = {**emb_cfg, "threads": threads}
+        ctx = mp.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(worker_cfg,)) as pool:
+            futures = [pool.submit(_embed_shard, work_dir, i, fingerprints[i], list(chunk)) for i, chunk in todo]
+            for fut in as_completed(futures):
+                i, n, seconds = fut.result()
+                finished += 1
+                print(f"[build_index] embed shard {finished}/{len(shards)} ({n} chunks, {seconds:.1f}s)")
+        for i, chunk in todo:
+            done[i] = _load_done(work_dir, i, fingerprints[i], len(chunk))
+    elif todo:
+        if embedding is None:
+            from rag_finance.indexing.faiss_index import build_embedding_from_config
+
+            embedding = build_embedding_from_config(emb_cfg, query_cache=False)
+        for i, chunk in todo:
+            t0 = time.perf_counter()
+            vectors = _embed(embedding, chunk)
+            seconds = time.perf_counter() - t0
+            _save_shard(work_dir, i, fingerprints[i], vectors, seconds)
+            done[i] = vectors
+            finished += 1
+            print(f"[build_index] embed shard {finished}/{len(shards)} ({len(chunk)} chunks, {seconds:.1f}s)")
+    if todo:
+        print(f"[build_index] embedded {sum(len(c) for _, c in todo)} chunks in {time.perf_counter() - start:.1f}s (workers={workers})")
+
+    return np.concatenate([done[i] for i, _ in shards]) if shards else np.zeros((0, 0), dtype=np.float32)
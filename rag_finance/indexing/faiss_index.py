@@ -1,13 +1,35 @@
 from __future__ import annotations
 import os
-from typing import Dict, List
+import shutil
+import time
+from typing import Any, Dict, List, Optional
 
-from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
-from langchain_community.embeddings import HuggingFaceEmbeddings
 
+from rag_finance.indexing.embed_stage import embed_texts, work_dir_for
+from rag_finance.indexing.versions import corpus_hash, index_dir, new_build_id, prune, publish, write_manifest
+from rag_finance.inference.onnx_backend import DEFAULT_ONNX_DIR, check_backend, load_onnx_embeddings, set_torch_threads
+from rag_finance.inference.query_cache import wrap_query_cache
 
-def _build_embedding(model_name: str, device: str = "cuda", normalize: bool = True):
+
+def _build_embedding(
+    model_name: str,
+    device: str = "cuda",
+    normalize: bool = True,
+    backend: str = "torch",
+    threads: int = 0,
+    onnx_dir: str = DEFAULT_ONNX_DIR,
+):
+    """
+    backend: torch(HuggingFaceEmbeddings) | onnx | onnx-int8 (CPU ONNX Runtime, scripts.export_onnx 로 미리 export).
+    threads: intra-op 스레드 수 (0 = 라이브러리 기본값)
+    """
+    backend = check_backend(backend)
+    if backend != "torch":
+        return load_onnx_embeddings(model_name, backend, onnx_dir, threads=threads, normalize=normalize)
+    from langchain_community.embeddings import HuggingFaceEmbeddings  # torch 백엔드일 때만
+
+    set_torch_threads(threads)
     return HuggingFaceEmbeddings(
         model_name=model_name,
         model_kwargs={"device": device},
@@ -15,22 +37,47 @@ def _build_embedding(model_name: str, device: str = "cuda", normalize: bool = Tr
     )
 
 
+def build_embedding_from_config(emb_cfg: Dict[str, Any], query_cache: bool = True):
+    """
+    config 의 embedding 섹션으로 임베딩 모델 생성.
+    query_cache=True 면 embedding.query_cache 설정대로 질의 임베딩 LRU 캐시를 앞에 둔다
+    (문서 임베딩만 하는 build 나, 캐시를 바깥에 따로 두는 서비스 엔진은 False).
+    """
+    embedding = _build_embedding(
+        model_name=emb_cfg["model_name"],
+        device=emb_cfg.get("device", "cuda"),
+        normalize=emb_cfg.get("normalize", True),
+        backend=emb_cfg.get("backend", "torch"),
+        threads=int(emb_cfg.get("threads", 0) or 0),
+        onnx_dir=emb_cfg.get("onnx_dir", DEFAULT_ONNX_DIR),
+    )
+    return wrap_query_cache(embedding, emb_cfg) if query_cache else embedding
+
+
 def docs_to_langchain(chunks: List[Dict]) -> List[Document]:
     """
     chunking.splitter.make_chunks 결과를 LangChain Document로 변환
+    doc_id 는 청크 순번(= 전체 FAISS 인덱스 위치)으로, 검색 경로가 문서를 정수 id 로 다루는 데 쓴다.
     """
     docs: List[Document] = []
-    for r in chunks:
+    for i, r in enumerate(chunks):
         docs.append(
             Document(
                 page_content=r["text"],
                 metadata={
+                    "doc_id": i,
                     "type": r.get("source_type", "etc"),
                     "file_name": r.get("file_name", ""),
                     "chunk_index": r.get("chunk_index", -1),
                     "chunk_id": r.get("chunk_id", ""),
                     "company": r.get("company", ""),
                     "company_code": r.get("company_code", ""),
+                    "start_index": r.get("start_index", -1),
+                    "end_index": r.get("end_index", -1),
+                    "dup_count": r.get("dup_count", 0),
+                    "published_at": r.get("published_at", ""),
+                    "dup_dates": list(r.get("dup_dates") or []),
+                    "dup_companies": list(r.get("dup_companies") or []),
                 },
             )
         )
@@ -44,23 +91,125 @@ def build_and_save_index(
     embedding_model_name: str = "jhgan/ko-sroberta-nli",
     embedding_device: str = "cuda",
     normalize_embeddings: bool = True,
+    embedding_backend: str = "torch",
+    embedding_threads: int = 0,
+    onnx_dir: str = DEFAULT_ONNX_DIR,
+    shards_cfg: Optional[Dict[str, Any]] = None,
+    time_cfg: Optional[Dict[str, Any]] = None,
+    compact_cfg: Optional[Dict[str, Any]] = None,
+    embed_build_cfg: Optional[Dict[str, Any]] = None,
+    manifest_extra: Optional[Dict[str, Any]] = None,
+    keep_versions: int = 3,
 ) -> str:
     """
     청크 목록 → 임베딩 → FAISS 인덱스 생성 및 저장.
-    반환: 저장 경로
+    임베딩은 embed_build_cfg(config 의 embedding.build)에 따라 shard 단위로 체크포인트하며
+    workers > 1 이면 프로세스마다 모델 복제본을 띄워 나눠 처리한다(중단 시 완료 shard 부터 재개).
+    모델은 임베딩할 shard 가 있을 때만 로드한다(워커 풀이면 워커에만, 모두 재개되면 로드 안 함).
+    결과는 새 버전 디렉토리({index_name}/<build_id>/)에 저장하고 manifest 를 쓴 뒤 포인터(current.json)를
+    원자적으로 교체해 게시한다(읽는 쪽은 반쯤 쓰인 인덱스를 보지 않는다). 최근 keep_versions 개만 남긴다.
+    shards_cfg.enable 이면 같은 임베딩으로 기업별 shard 인덱스(<build_id>/shards/)도 만든다.
+    time_cfg.enable 이면 게시일 기준 월/분기 파티션(<build_id>/time/)도 만든다.
+    compact_cfg.enable 이면 1단계용 PCA float16 / 부호 비트 코드와 mmap 재점수용 전체 벡터(<build_id>/compact/)도 만든다.
+    manifest_extra: manifest 에 함께 기록할 값(청킹 설정, 원본 파일 수 등)
+    반환: 저장 경로(버전 디렉토리)
     """
     os.makedirs(indexes_dir, exist_ok=True)
-    save_path = os.path.join(indexes_dir, index_name)
-
-    embedding = _build_embedding(
-        model_name=embedding_model_name,
-        device=embedding_device,
-        normalize=normalize_embeddings,
-    )
+    corpus_sha = corpus_hash(chunks)
+    build_id = new_build_id(corpus_sha)
+    save_path = index_dir(indexes_dir, index_name, build_id)
 
     lc_docs = docs_to_langchain(chunks)
     if not lc_docs:
         raise ValueError("No chunks to index.")
-    vs = FAISS.from_documents(lc_docs, embedding=embedding)
+    texts = [d.page_content for d in lc_docs]
+    build_cfg = embed_build_cfg or {}
+    work_dir = build_cfg.get("work_dir") or work_dir_for(indexes_dir, index_name)
+    vectors = embed_texts(
+        texts,
+        {
+            "model_name": embedding_model_name,
+            "device": embedding_device,
+            "normalize": normalize_embeddings,
+            "backend": embedding_backend,
+            "threads": embedding_threads,
+            "onnx_dir": onnx_dir,
+        },
+        work_dir,
+        workers=int(build_cfg.get("workers", 1) or 1),
+        shard_size=int(build_cfg.get("shard_size", 2048) or 2048),
+        threads_per_worker=int(build_cfg.get("threads_per_worker", 0) or 0),
+    )
+    from langchain_community.vectorstores import FAISS
+
+    from rag_finance.retrieval.scatter import VectorOnlyEmbeddings
+
+    # 벡터는 이미 계산했고 FAISS 는 임베딩 객체를 보관만 한다(저장 파일에도 안 들어감) → 부모에는 모델을 띄우지 않는다
+    embedding = VectorOnlyEmbeddings()
+    vs = FAISS.from_embeddings(list(zip(texts, vectors)), embedding, metadatas=[d.metadata for d in lc_docs])
     vs.save_local(save_path)
+    if not build_cfg.get("keep", False):
+        shutil.rmtree(work_dir, ignore_errors=True)
+    counts: Dict[str, Any] = {
+        "chunks": len(lc_docs),
+        "files": len({d.metadata.get("file_name", "") for d in lc_docs}),
+        "dim": int(vs.index.d),
+    }
+
+    if shards_cfg and shards_cfg.get("enable", False):
+        from rag_finance.indexing.shards import build_and_save_shards, shards_dir_for
+
+        manifest = build_and_save_shards(
+            lc_docs, vectors, embedding,
+            shards_dir_for(indexes_dir, index_name, build_id),
+            by_source=bool(shards_cfg.get("by_source", False)),
+        )
+        sizes = sorted((info["chunks"] for info in manifest["shards"].values()), reverse=True)
+        print(f"[build_index] shards: {len(sizes)} (largest={sizes[0] if sizes else 0} chunks)")
+        counts["shards"] = len(sizes)
+
+    if time_cfg and time_cfg.get("enable", False):
+        from rag_finance.indexing.time_partitions import UNDATED, build_and_save_time_partitions, time_dir_for
+
+        manifest = build_and_save_time_partitions(
+            lc_docs, vectors, embedding,
+            time_dir_for(indexes_dir, index_name, build_id),
+            granularity=time_cfg.get("granularity", "month"),
+        )
+        periods = manifest["shards"]
+        undated = periods.get(UNDATED, {}).get("chunks", 0)
+        print(f"[build_index] time partitions: {len(periods)} ({manifest['granularity']}, undated={undated} chunks)")
+        counts["time_partitions"] = len(periods)
+
+    if compact_cfg and compact_cfg.get("enable", False):
+        from rag_finance.indexing.compact import build_compact, compact_dir_for, describe_compact
+
+        manifest = build_compact(
+            vectors,
+            compact_dir_for(indexes_dir, index_name, build_id),
+            codes=compact_cfg.get("codes", "pca16"),
+            pca_dim=int(compact_cfg.get("pca_dim", 128)),
+            metric="ip" if vs.index.metric_type == 0 else "l2",  # faiss.METRIC_INNER_PRODUCT == 0
+            oversample=int(compact_cfg.get("oversample", 4)),
+            eval_k=int(compact_cfg.get("eval_k", 300)),
+            eval_queries=int(compact_cfg.get("eval_queries", 200)),
+        )
+        print(f"[build_index] compact: {describe_compact(manifest)}")
+        counts["compact"] = {"codes": manifest["codes"], "memory_ratio": manifest["memory"]["ratio"], **manifest["eval"]}
+
+    write_manifest(save_path, {
+        "build_id": build_id,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "corpus_hash": corpus_sha,
+        "embedding": {
+            "model_name": embedding_model_name,
+            "backend": embedding_backend,
+            "normalize": bool(normalize_embeddings),
+        },
+        "counts": counts,
+        **(manifest_extra or {}),
+    })
+    publish(indexes_dir, build_id, index_name)
+    removed = prune(indexes_dir, index_name, keep=keep_versions)
+    print(f"[build_index] published build {build_id}" + (f" (pruned {len(removed)} old builds)" if removed else ""))
     return save_path
@@ -0,0 +1,75 @@
+from __future__ import annotations
+import os
+import shutil
+import zlib
+from typing import Any, Dict, List, Optional
+
+from rag_finance.indexing.shards import BM25_STATS, corpus_bm25_stats
+from rag_finance.indexing.versions import artifact_dir, current_build, index_dir
+from rag_finance.utils.io_utils import ensure_dir, write_json
+
+PARTITION_MANIFEST = "manifest.json"
+PARTITION_SCHEMA_VERSION = 1
+
+
+def partitions_dir_for(indexes_dir: str, index_name: str = "all", build_id: Optional[str] = None) -> str:
+    """build_id(없으면 게시본) 버전의 parts/, 버전 없는 예전 레이아웃이면 {index_name}_parts/."""
+    return artifact_dir(indexes_dir, index_name, build_id, "parts", "parts")
+
+
+def partition_of(file_name: str, n: int) -> int:
+    """문서(file_name) 단위 해시 파티션 — 같은 문서의 청크는 같은 워커에 모인다."""
+    return zlib.crc32((file_name or "").encode("utf-8")) % n
+
+
+def build_partitions(
+    indexes_dir: str,
+    embedding,
+    n: int,
+    index_name: str = "all",
+    out_dir: str | None = None,
+) -> Dict[str, Any]:
+    """
+    게시된 전체 FAISS 인덱스(index_dir)의 벡터를 그대로 꺼내
+    같은 버전의 n 개 파티션(<build_id>/parts/{i}/)으로 나눠 저장한다(재임베딩 없음).
+    전체 코퍼스 BM25 통계(bm25_stats.json)도 함께 저장해 워커 점수를 전체 인덱스와 같은 척도로 맞춘다.
+    반환: manifest dict
+    """
+    if n < 1:
+        raise ValueError(f"n must be >= 1: {n}")
+    from langchain_community.vectorstores import FAISS  # scatter coordinator 는 manifest 이름만 쓴다
+
+    build_id = current_build(indexes_dir, index_name)
+    vs = FAISS.load_local(index_dir(indexes_dir, index_name, build_id), embedding, allow_dangerous_deserialization=True)
+    vectors = vs.index.reconstruct_n(0, vs.index.ntotal)
+
+    groups: List[List[int]] = [[] for _ in range(n)]
+    docs = []
+    for pos in range(vs.index.ntotal):
+        doc = vs.docstore.search(vs.index_to_docstore_id[pos])
+        docs.append(doc)
+        groups[partition_of(str(doc.metadata.get("file_name", "")), n)].append(pos)
+
+    out_dir = out_dir or partitions_dir_for(indexes_dir, index_name, build_id)
+    tmp_dir = out_dir + ".tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    ensure_dir(tmp_dir)
+    sizes = []
+    for i, idxs in enumerate(groups):
+        part = FAISS.from_embeddings(
+            [(docs[p].page_content, vectors[p].tolist()) for p in idxs],
+            embedding,
+            metadatas=[dict(docs[p].metadata) for p in idxs],
+        ) if idxs else None
+        if part is not None:
+            part.save_local(os.path.join(tmp_dir, str(i)))
+        sizes.append(len(idxs))
+    write_json(os.path.join(tmp_dir, BM25_STATS), corpus_bm25_stats(docs))
+
+    manifest = {"version": PARTITION_SCHEMA_VERSION, "n": n, "index_name": index_name, "sizes": sizes}
+    write_json(os.path.join(tmp_dir, PARTITION_MANIFEST), manifest)
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.rename(tmp_dir, out_dir)
+    return manifest
@@ -0,0 +1,133 @@
+from __future__ import annotations
+import os
+import re
+import shutil
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from rag_finance.entities.company_maps import CODE_TO_NAME, COMPANY_LIST, NAME_TO_CODE, resolve_company_code
+from rag_finance.utils.io_utils import ensure_dir, write_json
+from rag_finance.indexing.versions import artifact_dir
+
+SHARD_MANIFEST = "manifest.json"
+BM25_STATS = "bm25_stats.json"  # 전체 코퍼스 BM25 IDF·평균 길이 (shard 점수를 전체 인덱스와 같은 척도로)
+SHARD_SCHEMA_VERSION = 1
+GENERAL_SHARD = "general"
+
+_CODE_RE = re.compile(r"(?<!\d)(\d{6})(?!\d)")
+_WS_RE = re.compile(r"\s+")
+_NORM_NAMES = [(_WS_RE.sub("", n).lower(), n) for n in COMPANY_LIST]
+
+
+def shards_dir_for(indexes_dir: str, index_name: str = "all", build_id: Optional[str] = None) -> str:
+    """build_id(없으면 게시본) 버전의 shards/, 버전 없는 예전 레이아웃이면 {index_name}_shards/."""
+    return artifact_dir(indexes_dir, index_name, build_id, "shards", "shards")
+
+
+def company_shard_key(name: str, code: str) -> str:
+    """기업 → shard 키 (종목코드 우선, 코드가 없으면 공백 제거한 기업명)."""
+    code = (code or "").strip() or resolve_company_code(name)
+    return code or _WS_RE.sub("", name or "")
+
+
+def shard_keys_for_doc(doc: Document) -> List[str]:
+    """
+    청크가 속할 기업 shard 키 목록.
+    메타데이터 company/company_code + 본문에 등장하는 기업명·종목코드를 모두 사용한다
+    (retrieval.filters.text_contains_company 로 통과할 청크가 해당 기업 shard 에 반드시 들어가도록).
+    어떤 기업에도 해당하지 않으면 [GENERAL_SHARD].
+    """
+    meta = doc.metadata or {}
+    keys = set()
+    if meta.get("company") or meta.get("company_code"):
+        keys.add(company_shard_key(meta.get("company", ""), meta.get("company_code", "")))
+    text = doc.page_content or ""
+    norm = _WS_RE.sub("", text).lower()
+    for norm_name, name in _NORM_NAMES:
+        if norm_name in norm:
+            keys.add(company_shard_key(name, NAME_TO_CODE.get(name, "")))
+    for code in _CODE_RE.findall(norm):
+        if code in CODE_TO_NAME:
+            keys.add(code)
+    keys.discard("")
+    return sorted(keys) or [GENERAL_SHARD]
+
+
+def corpus_bm25_stats(docs: Sequence[Document]) -> Dict[str, Any]:
+    """
+    전체 인덱스의 BM25(BM25Retriever.from_documents 와 같은 토크나이저·BM25Okapi)가 쓰는 IDF·avgdl.
+    shard 에 이 값을 넣으면 shard 안 청크의 점수가 전체 인덱스 점수와 같아져 shard 간 병합이 정확해진다.
+    """
+    from langchain_community.retrievers.bm25 import default_preprocessing_func
+    from rank_bm25 import BM25Okapi
+
+    bm25 = BM25Okapi([default_preprocessing_func(d.page_content) for d in docs])
+    return {"corpus_size": bm25.corpus_size, "avgdl": bm25.avgdl, "idf": bm25.idf}
+
+
+def save_grouped_indexes(
+    docs: Sequence[Document],
+    vectors: Sequence[Sequence[float]],
+    embedding,
+    groups: Dict[str, List[int]],
+    shard_info: Dict[str, Dict[str, Any]],
+    out_dir: str,
+    **manifest_extra: Any,
+) -> Dict[str, Any]:
+    """
+    groups(이름 → docs 인덱스 목록)마다 FAISS 인덱스를 out_dir/{이름}/ 에 저장하고 manifest.json 작성.
+    docs 전체(= 전체 인덱스 코퍼스)의 BM25 통계를 bm25_stats.json 으로 함께 저장한다.
+    임시 디렉터리에 만든 뒤 교체하므로 실패해도 이전 인덱스들은 남는다. 반환: manifest dict
+    """
+    from langchain_community.vectorstores import FAISS  # 검색 경로는 경로 함수만 쓰므로 build 에서만 로드
+
+    tmp_dir = out_dir + ".tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    ensure_dir(tmp_dir)
+    for name, idxs in groups.items():
+        vs = FAISS.from_embeddings(
+            [(docs[i].page_content, vectors[i]) for i in idxs],
+            embedding,
+            metadatas=[dict(docs[i].metadata) for i in idxs],
+        )
+        vs.save_local(os.path.join(tmp_dir, name))
+        shard_info[name]["chunks"] = len(idxs)
+
+    write_json(os.path.join(tmp_dir, BM25_STATS), corpus_bm25_stats(docs))
+    manifest = {"version": SHARD_SCHEMA_VERSION, **manifest_extra, "shards": shard_info}
+    write_json(os.path.join(tmp_dir, SHARD_MANIFEST), manifest)
+
+    old_dir = out_dir + ".old"
+    if os.path.exists(out_dir):
+        if os.path.exists(old_dir):
+            shutil.rmtree(old_dir)
+        os.rename(out_dir, old_dir)
+    os.rename(tmp_dir, out_dir)
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+    return manifest
+
+
+def build_and_save_shards(
+    docs: Sequence[Document],
+    vectors: Sequence[Sequence[float]],
+    embedding,
+    shards_dir: str,
+    by_source: bool = False,
+) -> Dict[str, Any]:
+    """
+    전체 인덱스용으로 계산한 임베딩을 재사용해 기업별(+general) shard FAISS 인덱스를 저장.
+    by_source=True 면 shard 를 소스 타입(report/news/policy/etc)별로 한 번 더 나눈다.
+    반환: manifest dict
+    """
+    groups: Dict[str, List[int]] = {}
+    shard_info: Dict[str, Dict[str, Any]] = {}
+    for i, doc in enumerate(docs):
+        source_type = (doc.metadata or {}).get("type", "etc") if by_source else ""
+        for key in shard_keys_for_doc(doc):
+            name = f"{key}__{source_type}" if by_source else key
+            groups.setdefault(name, []).append(i)
+            shard_info.setdefault(name, {"key": key, "source_type": source_type})
+    return save_grouped_indexes(docs, vectors, embedding, groups, shard_info, shards_dir, by_source=bool(by_source))
@@ -0,0 +1,55 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from rag_finance.indexing.shards import save_grouped_indexes
+from rag_finance.ingestion.dates import doc_dates
+from rag_finance.indexing.versions import artifact_dir
+
+UNDATED = "undated"
+GRANULARITIES = ("month", "quarter")
+
+
+def time_dir_for(indexes_dir: str, index_name: str = "all", build_id: Optional[str] = None) -> str:
+    """build_id(없으면 게시본) 버전의 time/, 버전 없는 예전 레이아웃이면 {index_name}_time/."""
+    return artifact_dir(indexes_dir, index_name, build_id, "time", "time")
+
+
+def period_of(date: str, granularity: str = "month") -> str:
+    """"2024-05-17" → "2024-05"(month) / "2024Q2"(quarter). 날짜가 없으면 UNDATED."""
+    if not date or len(date) < 7:
+        return UNDATED
+    year, month = date[:4], int(date[5:7])
+    if granularity == "quarter":
+        return f"{year}Q{(month - 1) // 3 + 1}"
+    return f"{year}-{month:02d}"
+
+
+def build_and_save_time_partitions(
+    docs: Sequence[Document],
+    vectors: Sequence[Sequence[float]],
+    embedding,
+    out_dir: str,
+    granularity: str = "month",
+) -> Dict[str, Any]:
+    """
+    게시일(metadata.published_at) 기준 월/분기별 FAISS 파티션 저장.
+    manifest 는 shard 와 같은 형식이라 retrieval.shards.ShardRouter 로 그대로 검색한다
+    (각 파티션에 min_date/max_date 를 기록해 since/until 구간과 겹치는 것만 고른다).
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}: {granularity}")
+    groups: Dict[str, List[int]] = {}
+    info: Dict[str, Dict[str, Any]] = {}
+    for i, doc in enumerate(docs):
+        # 근접 중복으로 합쳐진 사본의 게시일(dup_dates) 기간에도 넣어 그 구간 질의에서 빠지지 않게 한다
+        dates = doc_dates(doc.metadata or {}) or [""]
+        for name in dict.fromkeys(period_of(d, granularity) for d in dates):
+            groups.setdefault(name, []).append(i)
+            entry = info.setdefault(name, {"key": name, "source_type": "", "min_date": "", "max_date": ""})
+            for date in dates:
+                if date and period_of(date, granularity) == name:
+                    entry["min_date"] = min(entry["min_date"] or date, date)
+                    entry["max_date"] = max(entry["max_date"], date)
+    return save_grouped_indexes(docs, vectors, embedding, groups, info, out_dir, granularity=granularity)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+import hashlib
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from rag_finance.utils.io_utils import ensure_dir, read_json, write_json
+
+# {indexes_dir}/{index_name}/
+#   current.json          ← 게시 포인터 {"build_id": ...} (tmp 에 쓰고 os.replace 로 원자적으로 교체)
+#   <build_id>/           ← 전체 FAISS + manifest.json (+ shards/, time/, parts/, compact/)
+POINTER_FILE = "current.json"
+BUILD_MANIFEST = "manifest.json"
+BUILD_SCHEMA_VERSION = 1
+_BUILD_ID_RE = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{8}$")
+
+
+def versions_root(indexes_dir: str, index_name: str = "all") -> str:
+    return os.path.join(indexes_dir, index_name)
+
+
+def current_build(indexes_dir: str, index_name: str = "all") -> Optional[str]:
+    """게시된 build_id (포인터가 없으면 None = 버전 없는 예전 레이아웃)."""
+    path = os.path.join(versions_root(indexes_dir, index_name), POINTER_FILE)
+    try:
+        return str(read_json(path)["build_id"]) or None
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def index_dir(indexes_dir: str, index_name: str = "all", build_id: Optional[str] = None) -> str:
+    """전체 FAISS 인덱스 위치: build_id(없으면 현재 게시본)의 버전 디렉토리, 버전이 없으면 {indexes_dir}/{index_name}."""
+    build_id = build_id or current_build(indexes_dir, index_name)
+    root = versions_root(indexes_dir, index_name)
+    return os.path.join(root, build_id) if build_id else root
+
+
+def artifact_dir(indexes_dir: str, index_name: str, build_id: Optional[str], subdir: str, legacy_suffix: str) -> str:
+    """버전별 부속 인덱스(shards/time/parts/compact) 위치. 버전이 없으면 예전 {index_name}_{suffix}/."""
+    build_id = build_id or current_build(indexes_dir, index_name)
+    if build_id:
+        return os.path.join(versions_root(indexes_dir, index_name), build_id, subdir)
+    return os.path.join(indexes_dir, f"{index_name}_{legacy_suffix}")
+
+
+def corpus_hash(chunks: Iterable[Dict[str, Any]]) -> str:
+    """청크 (file_name, chunk_index, text) 기준 코퍼스 지문."""
+    h = hashlib.sha1()
+    for r in chunks:
+        h.update(f"{r.get('file_name', '')}\0{r.get('chunk_index', '')}\0".encode("utf-8"))
+        h.update((r.get("text") or "").encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def new_build_id(corpus_sha: str) -> str:
+    """시간순으로 정렬되는 build_id: YYYYmmdd-HHMMSS-<코퍼스 해시 8자리>."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{corpus_sha[:8]}"
+
+
+def list_builds(indexes_dir: str, index_name: str = "all") -> List[str]:
+    """manifest 가 있는(저장이 끝난) 버전 목록, 오래된 순."""
+    root = versions_root(indexes_dir, index_name)
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if _BUILD_ID_RE.match(name) and os.path.isfile(os.path.join(root, name, BUILD_MANIFEST))
+    )
+
+
+def read_manifest(indexes_dir: str, index_name: str = "all", build_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    build_id = build_id or current_build(indexes_dir, index_name)
+    if not build_id:
+        return None
+    return read_json(os.path.join(versions_root(indexes_dir, index_name), build_id, BUILD_MANIFEST))
+
+
+def write_manifest(build_dir: str, manifest: Dict[str, Any]) -> None:
+    write_json(os.path.join(build_dir, BUILD_MANIFEST), {"version": BUILD_SCHEMA_VERSION, **manifest})
+
+
+def publish(indexes_dir: str, build_id: str, index_name: str = "all") -> None:
+    """포인터를 build_id 로 원자적으로 교체. 읽는 쪽은 항상 이전 또는 새 버전 전체를 본다."""
+    root = versions_root(indexes_dir, index_name)
+    if not os.path.isfile(os.path.join(root, build_id, BUILD_MANIFEST)):
+        raise FileNotFoundError(f"build {build_id} has no {BUILD_MANIFEST} under {root}")
+    ensure_dir(root)
+    pointer = os.path.join(root, POINTER_FILE)
+    write_json(pointer + ".tmp", {"build_id": build_id, "published_at": time.strftime("%Y-%m-%dT%H:%M:%S")})
+    os.replace(pointer + ".tmp", pointer)
+
+
+def prune(indexes_dir: str, index_name: str = "all", keep: int = 3) -> List[str]:
+    """
+    게시본과 최근 keep 개 버전만 남기고 삭제 (이전 버전을 남겨 두면 교체 직후 진행 중인
+    요청이 shard 를 지연 로드해도 안전하다). 저장이 끝나지 않은 오래된 디렉토리도 정리한다.
+    반환: 지운 build_id 목록
+    """
+    root = versions_root(indexes_dir, index_name)
+    current = current_build(indexes_dir, index_name)
+    builds = list_builds(indexes_dir, index_name)
+    kept = set(builds[-max(1, int(keep)):]) | {current}
+    newest = builds[-1] if builds else ""
+    removed: List[str] = []
+    for name in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        path = os.path.join(root, name)
+        if not _BUILD_ID_RE.match(name) or not os.path.isdir(path) or name in kept:
+            continue
+        # manifest 없는 디렉토리는 최신 버전보다 오래된 것(중단된 빌드)만 지운다 — 진행 중인 빌드 보호
+        if name not in builds and name >= newest:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed.append(name)
+    return removed
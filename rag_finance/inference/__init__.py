@@ -0,0 +1 @@
+"""임베딩·cross-encoder 모델의 추론 백엔드(torch / ONNX Runtime)."""
@@ -0,0 +1,281 @@
+from __future__ import annotations
+import importlib
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from rag_finance.utils.io_utils import ensure_dir, read_json, write_json
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+MODEL_FILES = {"onnx": "model.onnx", "onnx-int8": "model.int8.onnx"}
+ONNX_META = "onnx_meta.json"
+EMBEDDING = "embedding"
+CROSS_ENCODER = "cross-encoder"
+DEFAULT_ONNX_DIR = "models/onnx"
+
+_EXPORT_HINT = "python -m scripts.export_onnx --config configs/default.yaml"
+
+
+def _require(module: str, purpose: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError as exc:
+        raise ImportError(f"{module} is required for {purpose} (pip install {module.split('.')[0]})") from exc
+
+
+def check_backend(backend: Optional[str]) -> str:
+    backend = (backend or "torch").strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown inference backend: {backend!r} (expected one of {', '.join(BACKENDS)})")
+    return backend
+
+
+def set_torch_threads(threads: int) -> None:
+    """torch 백엔드의 intra-op 스레드 수 (0 이면 torch 기본값 유지)."""
+    if threads and threads > 0:
+        _require("torch", "the torch backend").set_num_threads(int(threads))
+
+
+def artifact_dir(onnx_dir: str, model_name: str, kind: str) -> str:
+    """export 결과 캐시 위치: {onnx_dir}/{모델명(/→__)}/{kind}/ (fp32·int8 파일이 같이 놓인다)."""
+    return os.path.join(onnx_dir, model_name.replace("/", "__"), kind)
+
+
+# ---------------------------------------------------------------------------
+# export / quantize (1회성, torch + sentence-transformers 필요)
+# ---------------------------------------------------------------------------
+
+def _load_torch_model(model_name: str, kind: str):
+    """sentence-transformers 모델을 CPU 로 올려 (HF 모델, 토크나이저, meta) 반환."""
+    torch = _require("torch", "ONNX export")
+    st = _require("sentence_transformers", "ONNX export")
+    if kind == EMBEDDING:
+        model = st.SentenceTransformer(model_name, device="cpu")
+        pooling = model[1].get_pooling_mode_str() if len(model) > 1 else "mean"
+        meta = {"pooling": pooling, "max_length": int(model.max_seq_length or 512), "output": "last_hidden_state"}
+        return model[0].auto_model, model.tokenizer, meta
+    if kind == CROSS_ENCODER:
+        model = st.CrossEncoder(model_name, device="cpu")
+        # CrossEncoder.predict 가 적용하는 기본 activation 을 그대로 재현 (num_labels=1 이면 Sigmoid)
+        act = getattr(model, "activation_fn", None) or getattr(model, "default_activation_function", None)
+        meta = {
+            "num_labels": int(model.model.config.num_labels),
+            "activation": "sigmoid" if isinstance(act, torch.nn.Sigmoid) else "identity",
+            "max_length": int(model.max_length or 512),
+            "output": "logits",
+        }
+        return model.model, model.tokenizer, meta
+    raise ValueError(f"unknown model kind: {kind!r}")
+
+
+def export_onnx(model_name: str, kind: str, onnx_dir: str = DEFAULT_ONNX_DIR, opset: int = 17) -> str:
+    """
+    HF 모델 본체를 동적 (batch, seq) 축의 fp32 ONNX 로 export 하고 토크나이저·meta 를 함께 저장.
+    풀링/activation 은 런타임(numpy)에서 처리하므로 그래프에는 transformer 출력까지만 넣는다.
+    반환: 저장 디렉터리
+    """
+    torch = _require("torch", "ONNX export")
+    hf_model, tokenizer, meta = _load_torch_model(model_name, kind)
+    hf_model.eval()
+    out_dir = artifact_dir(onnx_dir, model_name, kind)
+    ensure_dir(out_dir)
+
+    if kind == CROSS_ENCODER:
+        sample = tokenizer(["질의 예시"] * 2, ["문서 본문 예시입니다."] * 2, padding=True, return_tensors="pt")
+    else:
+        sample = tokenizer(["문장 예시입니다.", "두 번째"], padding=True, return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    output_name = meta["output"]
+
+    class _Graph(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs)))[0]
+
+    dynamic_axes: Dict[str, Dict[int, str]] = {n: {0: "batch", 1: "seq"} for n in input_names}
+    dynamic_axes[output_name] = {0: "batch", 1: "seq"} if kind == EMBEDDING else {0: "batch"}
+    # 2GB 를 넘는 모델(bge-reranker-v2-m3 fp32)은 torch 가 가중치를 외부 데이터 파일로 옆에 저장한다
+    path = os.path.join(out_dir, MODEL_FILES["onnx"])
+    with torch.inference_mode():
+        torch.onnx.export(
+            _Graph(hf_model),
+            tuple(sample[n] for n in input_names),
+            path,
+            input_names=input_names,
+            output_names=[output_name],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    tokenizer.save_pretrained(out_dir)
+    write_json(os.path.join(out_dir, ONNX_META), {
+        "model_name": model_name,
+        "kind": kind,
+        "opset": opset,
+        "inputs": input_names,
+        **meta,
+    })
+    return out_dir
+
+
+def quantize_int8(out_dir: str, per_channel: bool = True) -> str:
+    """
+    fp32 ONNX → 동적 INT8 양자화(가중치 int8, 활성값은 실행 시 양자화). 보정 데이터가 필요 없다.
+    반환: int8 모델 경로
+    """
+    quant = _require("onnxruntime.quantization", "INT8 quantization")
+    src = os.path.join(out_dir, MODEL_FILES["onnx"])
+    dst = os.path.join(out_dir, MODEL_FILES["onnx-int8"])
+    tmp = dst + ".tmp"
+    quant.quantize_dynamic(
+        src, tmp,
+        weight_type=quant.QuantType.QInt8,
+        per_channel=per_channel,
+        extra_options={"MatMulConstBOnly": True},
+    )
+    os.replace(tmp, dst)
+    return dst
+
+
+def ensure_exported(
+    model_name: str,
+    kind: str,
+    onnx_dir: str = DEFAULT_ONNX_DIR,
+    int8: bool = True,
+    force: bool = False,
+    opset: int = 17,
+) -> Tuple[str, List[str]]:
+    """캐시에 없는 산출물만 만든다. 반환: (디렉터리, 이번에 새로 만든 백엔드 목록)"""
+    out_dir = artifact_dir(onnx_dir, model_name, kind)
+    made: List[str] = []
+    # meta 는 export 마지막에 쓰므로, 없으면 중간에 실패한 export 로 보고 다시 만든다
+    if force or not os.path.exists(os.path.join(out_dir, ONNX_META)):
+        export_onnx(model_name, kind, onnx_dir, opset=opset)
+        made.append("onnx")
+    if int8 and (force or made or not os.path.exists(os.path.join(out_dir, MODEL_FILES["onnx-int8"]))):
+        quantize_int8(out_dir)
+        made.append("onnx-int8")
+    return out_dir, made
+
+
+# ---------------------------------------------------------------------------
+# 런타임 (onnxruntime + 토크나이저만 필요, torch 불필요)
+# ---------------------------------------------------------------------------
+
+def _session(path: str, threads: int):
+    ort = _require("onnxruntime", "ONNX inference")
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads and threads > 0:
+        opts.intra_op_num_threads = int(threads)
+    opts.inter_op_num_threads = 1
+    return ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+
+
+class _OnnxModel:
+    """export 디렉터리 하나를 열어 토크나이즈 → 세션 실행까지 담당."""
+
+    def __init__(self, model_dir: str, backend: str, threads: int = 0, batch_size: int = 32) -> None:
+        backend = check_backend(backend)
+        if backend == "torch":
+            raise ValueError("torch backend does not use ONNX artifacts")
+        path = os.path.join(model_dir, MODEL_FILES[backend])
+        meta_path = os.path.join(model_dir, ONNX_META)
+        if not (os.path.exists(path) and os.path.exists(meta_path)):
+            raise FileNotFoundError(f"{backend} artifact not found: {path} (run: {_EXPORT_HINT})")
+        self.meta: Dict[str, Any] = read_json(meta_path)
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_length = int(self.meta.get("max_length", 512))
+        self.tokenizer = _require("transformers", "ONNX inference").AutoTokenizer.from_pretrained(model_dir)
+        self.session = _session(path, threads)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _run(self, *texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        enc = self.tokenizer(
+            *texts, padding=True, truncation="longest_first", max_length=self.max_length, return_tensors="np",
+        )
+        feeds = {n: np.asarray(enc[n], dtype=np.int64) for n in self.input_names}
+        return self.session.run(None, feeds)[0], np.asarray(enc["attention_mask"])
+
+    def _batched(self, n: int, lengths: Sequence[int], run, batch_size: Optional[int] = None) -> np.ndarray:
+        """길이 내림차순으로 묶어 padding 을 줄이고, 결과는 원래 순서로 되돌린다."""
+        if n == 0:
+            return np.zeros((0,), dtype=np.float32)
+        bs = batch_size or self.batch_size
+        order = sorted(range(n), key=lambda i: -lengths[i])
+        parts = [run(order[s:s + bs]) for s in range(0, n, bs)]
+        return np.concatenate(parts)[np.argsort(order)]
+
+
+def _pool(hidden: np.ndarray, mask: np.ndarray, mode: str) -> np.ndarray:
+    if mode == "cls":
+        return hidden[:, 0]
+    m = mask[..., None].astype(hidden.dtype)
+    if mode == "max":
+        return np.where(m > 0, hidden, -1e9).max(axis=1)
+    if mode == "mean":
+        return (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+    raise ValueError(f"unsupported pooling mode: {mode!r}")
+
+
+class OnnxSentenceEmbeddings(Embeddings):
+    """sentence-transformers(풀링 + 정규화)와 같은 출력을 내는 ONNX Runtime 임베딩 (LangChain Embeddings)."""
+
+    def __init__(self, model_dir: str, backend: str = "onnx", threads: int = 0, normalize: bool = True, batch_size: int = 32) -> None:
+        self.model = _OnnxModel(model_dir, backend, threads=threads, batch_size=batch_size)
+        self.pooling = self.model.meta.get("pooling", "mean")
+        self.normalize = normalize
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        # HuggingFaceEmbeddings.embed_documents 와 동일한 전처리
+        texts = [t.replace("\n", " ") for t in texts]
+
+        def run(idx: List[int]) -> np.ndarray:
+            hidden, mask = self.model._run([texts[i] for i in idx])
+            return _pool(hidden, mask, self.pooling)
+
+        vecs = self.model._batched(len(texts), [len(t) for t in texts], run).astype(np.float32)
+        if self.normalize and len(vecs):
+            vecs /= np.clip(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12, None)
+        return vecs
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
+class OnnxCrossEncoder:
+    """sentence_transformers.CrossEncoder.predict 와 같은 점수를 내는 ONNX Runtime cross-encoder."""
+
+    def __init__(self, model_dir: str, backend: str = "onnx", threads: int = 0, batch_size: int = 32) -> None:
+        self.model = _OnnxModel(model_dir, backend, threads=threads, batch_size=batch_size)
+        self.activation = self.model.meta.get("activation", "identity")
+        self.num_labels = int(self.model.meta.get("num_labels", 1))
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], batch_size: Optional[int] = None, convert_to_numpy: bool = True, **_: Any) -> np.ndarray:
+        pairs = [(str(q), str(d)) for q, d in pairs]
+
+        def run(idx: List[int]) -> np.ndarray:
+            logits, _ = self.model._run([pairs[i][0] for i in idx], [pairs[i][1] for i in idx])
+            return logits[:, 0] if self.num_labels == 1 else logits
+
+        scores = self.model._batched(len(pairs), [len(q) + len(d) for q, d in pairs], run, batch_size).astype(np.float32)
+        if self.activation == "sigmoid":
+            scores = 1.0 / (1.0 + np.exp(-scores))
+        return scores
+
+
+def load_onnx_embeddings(model_name: str, backend: str, onnx_dir: str = DEFAULT_ONNX_DIR, threads: int = 0, normalize: bool = True) -> OnnxSentenceEmbeddings:
+    return OnnxSentenceEmbeddings(artifact_dir(onnx_dir, model_name, EMBEDDING), backend, threads=threads, normalize=normalize)
+
+
+def load_onnx_cross_encoder(model_name: str, backend: str, onnx_dir: str = DEFAULT_ONNX_DIR, threads: int = 0, batch_size: int = 32) -> OnnxCrossEncoder:
+    return OnnxCrossEncoder(artifact_dir(onnx_dir, model_name, CROSS_ENCODER), backend, threads=threads, batch_size=batch_size)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+import atexit
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 질의 정규화: NFC + 공백 정리 (토크나이저가 공백 수·줄바꿈을 구분하지 않으므로 임베딩은 같다)."""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def model_key(emb_cfg: Dict[str, Any]) -> str:
+    """같은 벡터를 내는 설정 묶음 (모델·백엔드·정규화가 다르면 캐시를 공유하지 않는다)."""
+    return f"{emb_cfg.get('model_name')}|{emb_cfg.get('backend', 'torch')}|normalize={bool(emb_cfg.get('normalize', True))}"
+
+
+class QueryEmbeddingCache(Embeddings):
+    """
+    질의 임베딩(embed_query) 앞단 LRU 캐시 — 키는 (모델 설정, 정규화한 질의).
+    FAISS 검색과 hybrid_pre 가 같은 질의를 두 번 임베딩하거나 템플릿 질의가 반복될 때 forward 를 생략한다.
+    embed_documents 는 그대로 base 로 넘긴다. 스레드 간 공유 가능하며,
+    persist_path 를 주면 시작 시 읽고 종료 시(atexit) 저장한다.
+    """
+
+    def __init__(self, base: Embeddings, model: str, *, max_size: int = 4096, persist_path: str = "") -> None:
+        self.base = base
+        self.model = model
+        self.max_size = max(1, int(max_size))
+        self.persist_path = persist_path
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if persist_path:
+            self.load(persist_path)
+            atexit.register(self.save, persist_path)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        with self._lock:
+            vec = self._entries.get(key)
+            if vec is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vec.tolist()
+            self.misses += 1
+        # 미스는 락 밖에서 계산 (동시에 같은 질의가 오면 한 번 더 계산될 수 있지만 결과는 같다)
+        vec = np.asarray(self.base.embed_query(key), dtype=np.float32)
+        with self._lock:
+            self._entries[key] = vec
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return vec.tolist()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._entries),
+            }
+
+    def _snapshot(self) -> Tuple[List[str], Optional[np.ndarray]]:
+        with self._lock:
+            keys = list(self._entries.keys())
+            vecs = np.stack([self._entries[k] for k in keys]) if keys else None
+        return keys, vecs
+
+    def save(self, path: Optional[str] = None) -> None:
+        """현재 항목을 .npz 로 저장 (LRU 순서 유지, tmp 에 쓰고 교체)."""
+        path = path or self.persist_path
+        keys, vecs = self._snapshot()
+        if not path or vecs is None:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, model=np.array(self.model), keys=np.array(keys), vectors=vecs)
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> int:
+        """저장된 캐시를 읽는다. 모델 설정이 다르거나 파일이 깨졌으면 무시. 반환: 읽은 항목 수"""
+        if not os.path.isfile(path):
+            return 0
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["model"]) != self.model:
+                    return 0
+                keys, vecs = [str(k) for k in data["keys"]], np.asarray(data["vectors"], dtype=np.float32)
+        except (OSError, ValueError, KeyError):
+            return 0
+        with self._lock:
+            for key, vec in zip(keys[-self.max_size:], vecs[-self.max_size:]):
+                self._entries[key] = vec
+        return min(len(keys), self.max_size)
+
+
+def wrap_query_cache(embedding: Embeddings, emb_cfg: Dict[str, Any]) -> Embeddings:
+    """config 의 embedding.query_cache 섹션에 따라 캐시로 감싼다 (enable: false 면 그대로)."""
+    qc_cfg = emb_cfg.get("query_cache", {}) or {}
+    if not qc_cfg.get("enable", True):
+        return embedding
+    return QueryEmbeddingCache(
+        embedding,
+        model_key(emb_cfg),
+        max_size=int(qc_cfg.get("max_size", 4096)),
+        persist_path=qc_cfg.get("persist_path", "") or "",
+    )
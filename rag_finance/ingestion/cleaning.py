@@ -1,7 +1,21 @@
 from __future__ import annotations
-import re
 from typing import Iterable, List
-from rag_finance.utils.text_utils import normalize_space, strip_urls, remove_noisy_lines
+from rag_finance.utils.text_utils import is_noisy_line, normalize_space, strip_urls
+
+
+def clean_lines(segments: Iterable[str]) -> str:
+    """
+    텍스트 조각들(HTML 텍스트 노드 등)을 한 번에 훑는 clean_text 본체.
+    각 조각을 줄 단위로 나눠 URL 제거 → 노이즈 판정 → 남은 줄을 공백으로 이어 정규화.
+    "\\n".join(segments) 를 clean_text 에 넣은 것과 결과가 같다(빈 줄만 차이 나고 어차피 버려짐).
+    """
+    kept: List[str] = []
+    for segment in segments:
+        for line in segment.splitlines():
+            stripd = strip_urls(line).strip()
+            if not is_noisy_line(stripd):
+                kept.append(stripd)
+    return normalize_space(" ".join(kept))
 
 
 def clean_text(raw_text: str) -> str:
@@ -14,13 +28,4 @@ def clean_text(raw_text: str) -> str:
     """
     if not raw_text:
         return ""
-
-    # 1) 줄 단위로 나눠 필터링
-    lines = raw_text.splitlines()
-    lines = [strip_urls(x) for x in lines]
-    lines = remove_noisy_lines(lines)
-
-    # 2) 다시 합치고 공백 정규화
-    cleaned = "\n".join(lines).strip()
-    cleaned = normalize_space(cleaned.replace("\n", "\n"))
-    return cleaned
+    return clean_lines((raw_text,))
@@ -0,0 +1,118 @@
+from __future__ import annotations
+import calendar
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# HTML <meta> / <time> 의 게시일 (속성 순서가 바뀌어도 잡도록 태그 단위로 찾은 뒤 속성 검사)
+_META_TAG_RE = re.compile(r"<meta\b[^>]*>", re.IGNORECASE)
+_META_NAME_RE = re.compile(
+    r"""(?:name|property|itemprop)\s*=\s*["']?(article:published_time|og:published_time|pubdate|publishdate|"""
+    r"""publish[-_]date|date|datepublished|dc\.date|dc\.date\.issued|sailthru\.date)["'\s>]""",
+    re.IGNORECASE,
+)
+_META_CONTENT_RE = re.compile(r"""content\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+_TIME_TAG_RE = re.compile(r"""<time\b[^>]*\bdatetime\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+
+# 2024-05-01 / 2024.05.01 / 2024/5/1 / 2024_05_01 / 2024년 5월 1일
+_YMD_RE = re.compile(r"(?<!\d)((?:19|20)\d{2})\s*(?:[-./_]|년)\s*(\d{1,2})\s*(?:[-./_]|월)\s*(\d{1,2})(?!\d)")
+# 20240501 (파일명 등)
+_COMPACT_RE = re.compile(r"(?<!\d)((?:19|20)\d{2})(\d{2})(\d{2})(?!\d)")
+# 2024-05 / 2024년 5월 (일 미상 → 1일)
+_YM_RE = re.compile(r"(?<!\d)((?:19|20)\d{2})\s*(?:[-./_]|년)\s*(\d{1,2})(?:\s*월)?(?![\d-]|\.\d)")
+
+_HEADER_CHARS = 400
+
+
+def _valid(y: str, m: str, d: str) -> Optional[str]:
+    year, month, day = int(y), int(m), int(d)
+    if not (1 <= month <= 12):
+        return None
+    if not (1 <= day <= calendar.monthrange(year, month)[1]):
+        return None
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def _first_date(text: str, allow_month: bool = False) -> Optional[str]:
+    for pattern in (_YMD_RE, _COMPACT_RE):
+        for m in pattern.finditer(text):
+            found = _valid(*m.groups())
+            if found:
+                return found
+    if allow_month:
+        for m in _YM_RE.finditer(text):
+            found = _valid(m.group(1), m.group(2), "1")
+            if found:
+                return found
+    return None
+
+
+def date_from_html_meta(html: str) -> Optional[str]:
+    for tag in _META_TAG_RE.findall(html or ""):
+        if not _META_NAME_RE.search(tag):
+            continue
+        content = _META_CONTENT_RE.search(tag)
+        found = _first_date(content.group(1)) if content else None
+        if found:
+            return found
+    for value in _TIME_TAG_RE.findall(html or ""):
+        found = _first_date(value)
+        if found:
+            return found
+    return None
+
+
+def extract_publication_date(path: str, raw: str = "", text: str = "", is_html: bool = False) -> Tuple[str, str]:
+    """
+    게시일(YYYY-MM-DD) 추정. 우선순위: HTML meta/time → 파일 경로 → 본문 앞부분(리포트 헤더 등).
+    반환: (날짜, 출처) — 못 찾으면 ("", "").
+    """
+    if is_html:
+        found = date_from_html_meta(raw)
+        if found:
+            return found, "html_meta"
+    found = _first_date(path or "", allow_month=True)
+    if found:
+        return found, "path"
+    found = _first_date((text or "")[:_HEADER_CHARS])
+    if found:
+        return found, "header"
+    return "", ""
+
+
+def normalize_window(since: Optional[str], until: Optional[str]) -> Tuple[str, str]:
+    """
+    since/until("YYYY", "YYYY-MM", "YYYY-MM-DD") → 포함 구간 ("YYYY-MM-DD", "YYYY-MM-DD").
+    since 는 구간의 첫날, until 은 마지막 날로 맞춘다. 미지정은 "".
+    """
+    def parse(value: Optional[str], end: bool) -> str:
+        value = (value or "").strip()
+        if not value:
+            return ""
+        parts = re.split(r"[-./]", value)
+        try:
+            year = int(parts[0])
+            month = int(parts[1]) if len(parts) > 1 else (12 if end else 1)
+            if len(parts) > 2:
+                day = int(parts[2])
+            else:
+                day = calendar.monthrange(year, month)[1] if end else 1
+            found = _valid(str(year), str(month), str(day))
+        except (ValueError, IndexError):
+            found = None
+        if not found:
+            raise ValueError(f"invalid date: {value!r} (expected YYYY, YYYY-MM or YYYY-MM-DD)")
+        return found
+
+    return parse(since, end=False), parse(until, end=True)
+
+
+def doc_dates(meta: Dict[str, Any]) -> List[str]:
+    """청크의 게시일 목록: published_at + 근접 중복으로 합쳐진 사본들의 게시일(dup_dates)."""
+    dates = [str(meta.get("published_at", "") or "")] + [str(d) for d in (meta.get("dup_dates") or [])]
+    return [d for d in dates if d]
+
+
+def in_window(date: str, since: str, until: str) -> bool:
+    if not date:
+        return False
+    return (not since or date >= since) and (not until or date <= until)
@@ -0,0 +1,254 @@
+from __future__ import annotations
+import hashlib
+import io
+import json
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from rag_finance.utils.io_utils import ensure_dir
+
+_WS_RE = re.compile(r"\s+")
+_MASK32 = np.uint64(0xFFFFFFFF)
+_PRIME = np.uint64(1000003)
+_BLOCK = 4096
+
+
+def _fingerprint(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _shingle_hashes(text: str, k: int) -> np.ndarray:
+    """공백 제거/소문자화한 문자열의 k-문자 shingle 을 32bit 해시로 (중복 제거)."""
+    s = _WS_RE.sub("", text or "").lower()
+    if not s:
+        return np.zeros(1, dtype=np.uint64)
+    cps = np.frombuffer(s.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    k = min(k, len(cps))
+    n = len(cps) - k + 1
+    h = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        h = h * _PRIME + cps[j:j + n]  # mod 2^64 롤링 해시
+    h ^= h >> np.uint64(29)
+    return np.unique(h & _MASK32)
+
+
+def dedup_scope(item: Dict[str, Any]) -> str:
+    """LSH 후보 범위: 소스 타입·기업이 다른 사본은 서로 중복으로 보지 않는다 (리포트 풀·기업 필터 보존)."""
+    return f"{item.get('source_type', '')}|{item.get('company_code', '')}"
+
+
+def canonical_preference(item: Dict[str, Any]) -> Tuple[int, str]:
+    """같은 중복 묶음에서 남길 사본: 리포트 우선 → 게시일이 이른 것(미상은 뒤) → (동률이면 키 순)."""
+    return (0 if item.get("source_type") == "report" else 1, item.get("published_at") or "9999-99-99")
+
+
+class NearDupIndex:
+    """
+    문자 shingle MinHash + LSH(band) 기반 근접 중복 인덱스.
+    - signature: num_perm 개의 multiply-shift 해시 최솟값 (uint32)
+    - 후보: 같은 scope 안에서 bands 개 band 중 하나라도 같은 버킷 → 서명 일치율(≈Jaccard)이 threshold 이상이면 중복
+    - 항목별 (fingerprint, signature) 를 기억해 재빌드 시 바뀐 항목만 다시 계산한다.
+      canonical 선택은 매번 현재 입력으로 다시 하므로 입력 순서·이전 빌드 이력과 무관하다.
+    """
+
+    STATE_VERSION = 2
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.85,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle: int = 5,
+        seed: int = 1,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError(f"num_perm({num_perm}) must be divisible by bands({bands})")
+        self.params = {
+            "threshold": float(threshold),
+            "num_perm": int(num_perm),
+            "bands": int(bands),
+            "shingle": int(shingle),
+            "seed": int(seed),
+            "version": self.STATE_VERSION,
+        }
+        self.threshold = float(threshold)
+        self.shingle = int(shingle)
+        self.bands = int(bands)
+        self.rows = int(num_perm) // int(bands)
+        rng = np.random.RandomState(seed)
+        self._a = (rng.randint(1, 2 ** 63 - 1, size=num_perm, dtype=np.int64).astype(np.uint64) << np.uint64(1)) | np.uint64(1)
+        self._b = rng.randint(0, 2 ** 63 - 1, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+        self._sigs: Dict[str, np.ndarray] = {}
+        self._fps: Dict[str, str] = {}
+        self._canon: Dict[str, str] = {}
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+
+    def __len__(self) -> int:
+        return len(self._canon)
+
+    # ---- signature / LSH ------------------------------------------------
+    def signature(self, text: str) -> np.ndarray:
+        x = _shingle_hashes(text, self.shingle)
+        sig = np.full(len(self._a), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for i in range(0, len(x), _BLOCK):
+            block = x[i:i + _BLOCK]
+            hv = (self._a[:, None] * block[None, :] + self._b[:, None]) >> np.uint64(32)
+            np.minimum(sig, hv.min(axis=1), out=sig)
+        return sig.astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray, scope: str = ""):
+        r = self.rows
+        prefix = scope.encode("utf-8") + b"\0"
+        for b in range(self.bands):
+            yield b, prefix + sig[b * r:(b + 1) * r].tobytes()
+
+    def _index(self, key: str, sig: np.ndarray, scope: str = "") -> None:
+        for b, bk in self._band_keys(sig, scope):
+            self._buckets[b].setdefault(bk, []).append(key)
+
+    def query(self, sig: np.ndarray, scope: str = "") -> Tuple[Optional[str], float]:
+        """같은 scope 에서 가장 비슷한 canonical 항목 (threshold 미만이면 (None, best_sim))."""
+        cands = set()
+        for b, bk in self._band_keys(sig, scope):
+            cands.update(self._buckets[b].get(bk, ()))
+        best_key, best_sim = None, 0.0
+        for key in cands:
+            sim = float(np.mean(self._sigs[key] == sig))
+            if sim > best_sim or (sim == best_sim and best_key is not None and key < best_key):
+                best_key, best_sim = key, sim
+        if best_key is None or best_sim < self.threshold:
+            return None, best_sim
+        return best_key, best_sim
+
+    # ---- 배치 중복 제거 --------------------------------------------------
+    def dedupe(
+        self,
+        items: List[Dict[str, Any]],
+        key_fn: Callable[[Dict[str, Any]], str],
+        text_fn: Callable[[Dict[str, Any]], str],
+        scope_fn: Callable[[Dict[str, Any]], str] = dedup_scope,
+        prefer_fn: Callable[[Dict[str, Any]], Any] = canonical_preference,
+    ) -> List[Dict[str, Any]]:
+        """
+        items 중 canonical 만 남겨 (입력 순서대로) 반환. canonical 에는
+        dup_count(+=버린 사본 수), dup_dates·dup_companies(버린 사본의 게시일·기업 중 canonical 과 다른 값)를 기록한다.
+        scope_fn 이 다른 항목끼리는 중복으로 보지 않고, 묶음마다 prefer_fn(작을수록 우선) → 키 순으로 canonical 을 고른다.
+        """
+        keyed = [(key_fn(it), it) for it in items]
+        current = {k: _fingerprint(text_fn(it)) for k, it in keyed}
+        # 내용이 같은 항목의 signature 만 재사용, 결정은 매번 새로
+        self._sigs = {k: v for k, v in self._sigs.items() if self._fps.get(k) == current.get(k)}
+        self._fps = {k: v for k, v in self._fps.items() if k in self._sigs}
+        self._canon = {}
+        self._buckets = [{} for _ in range(self.bands)]
+
+        by_key = dict(keyed)
+        for key, it in sorted(keyed, key=lambda kv: (prefer_fn(kv[1]), kv[0])):
+            sig = self._sigs.get(key)
+            if sig is None:
+                sig = self.signature(text_fn(it))
+                self._sigs[key] = sig
+                self._fps[key] = current[key]
+            scope = scope_fn(it)
+            canon, _ = self.query(sig, scope)
+            if canon is None:
+                self._canon[key] = key
+                self._index(key, sig, scope)
+            else:
+                self._canon[key] = self._canon[canon]
+
+        dropped: Dict[str, List[Dict[str, Any]]] = {}
+        for key, canon in self._canon.items():
+            if key != canon:
+                dropped.setdefault(canon, []).append(by_key[key])
+
+        out: List[Dict[str, Any]] = []
+        for key, it in keyed:
+            if self._canon.get(key) != key:
+                continue
+            copies = dropped.get(key, [])
+            it["dup_count"] = int(it.get("dup_count", 0)) + len(copies)
+            for field, out_field in (("published_at", "dup_dates"), ("company", "dup_companies")):
+                values = set(it.get(out_field) or [])
+                for c in copies:
+                    values.update(c.get(out_field) or [])
+                    values.add(c.get(field) or "")
+                values.discard(it.get(field) or "")
+                values.discard("")
+                if values:
+                    it[out_field] = sorted(values)
+            out.append(it)
+        return out
+
+    # ---- 저장/로드 --------------------------------------------------------
+    def save(self, path: str) -> None:
+        """signature 캐시와 마지막 결정을 npz 로 저장 (임시 파일 → os.replace)."""
+        ensure_dir(os.path.dirname(path) or ".")
+        keys = sorted(self._sigs)
+        sigs = np.stack([self._sigs[k] for k in keys]) if keys else np.zeros((0, len(self._a)), dtype=np.uint32)
+        buf = io.BytesIO()
+        np.savez_compressed(
+            buf,
+            params=np.array(json.dumps(self.params)),
+            keys=np.array(keys, dtype=object),
+            canon=np.array([self._canon.get(k, k) for k in keys], dtype=object),
+            fps=np.array([self._fps[k] for k in keys], dtype=object),
+            sigs=sigs,
+        )
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buf.getvalue())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_or_create(cls, path: Optional[str], **params) -> "NearDupIndex":
+        """path 의 signature 캐시를 이어받는다. 파일이 없거나 파라미터가 다르면 새로 시작."""
+        index = cls(**params)
+        if not path or not os.path.isfile(path):
+            return index
+        with np.load(path, allow_pickle=True) as data:
+            saved = json.loads(str(data["params"]))
+            if saved != index.params:
+                print(f"[dedup] parameters changed, rebuilding signatures: {path}")
+                return index
+            for key, canon, fp, sig in zip(data["keys"], data["canon"], data["fps"], data["sigs"]):
+                index._sigs[str(key)] = sig
+                index._fps[str(key)] = str(fp)
+                index._canon[str(key)] = str(canon)
+        return index
+
+
+def build_dedup_indexes(dedup_cfg: Dict[str, Any]) -> Tuple[Optional[NearDupIndex], Optional[NearDupIndex]]:
+    """config 의 dedup 섹션으로 (문서용, 청크용) 인덱스 생성. enable=false 면 (None, None)."""
+    if not dedup_cfg.get("enable", False):
+        return None, None
+    common = {
+        "num_perm": int(dedup_cfg.get("num_perm", 64)),
+        "bands": int(dedup_cfg.get("bands", 16)),
+        "shingle": int(dedup_cfg.get("shingle", 5)),
+    }
+    state_dir = dedup_cfg.get("state_dir")
+    doc_index = NearDupIndex.load_or_create(
+        os.path.join(state_dir, "docs.npz") if state_dir else None,
+        threshold=float(dedup_cfg.get("doc_threshold", 0.85)), **common,
+    )
+    chunk_index = NearDupIndex.load_or_create(
+        os.path.join(state_dir, "chunks.npz") if state_dir else None,
+        threshold=float(dedup_cfg.get("chunk_threshold", 0.9)), **common,
+    )
+    return doc_index, chunk_index
+
+
+def save_dedup_indexes(dedup_cfg: Dict[str, Any], doc_index: Optional[NearDupIndex], chunk_index: Optional[NearDupIndex]) -> None:
+    state_dir = dedup_cfg.get("state_dir")
+    if not state_dir:
+        return
+    if doc_index is not None:
+        doc_index.save(os.path.join(state_dir, "docs.npz"))
+    if chunk_index is not None:
+        chunk_index.save(os.path.join(state_dir, "chunks.npz"))
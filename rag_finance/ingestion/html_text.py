@@ -0,0 +1,178 @@
+from __future__ import annotations
+import importlib
+from html.parser import HTMLParser
+from typing import Callable, Iterator, List, Optional
+
+# get_text 에서 제외할 태그 (기존 BeautifulSoup 경로와 동일)
+SKIP_TAGS = frozenset({"script", "style", "noscript"})
+# lxml(libxml2) 이 안쪽을 마크업이 아닌 글자로 넘기는 태그. html.parser(BeautifulSoup 기준) 는 태그로 파싱한다.
+RAWTEXT_TAGS = frozenset({"textarea", "title", "xmp", "iframe", "noembed", "noframes", "plaintext"})
+
+try:
+    _lxml_etree = importlib.import_module("lxml.etree")
+except ImportError:  # lxml 미설치 시 표준 라이브러리 html.parser 사용
+    _lxml_etree = None
+
+
+class _TextCollector:
+    """
+    파서 이벤트(start/end/data)를 받아 텍스트 노드 단위로 모은다.
+    - 태그/주석 경계마다 버퍼를 flush → BeautifulSoup get_text(separator="\\n") 의 노드 경계와 동일
+    - SKIP_TAGS 안쪽 텍스트는 버림
+    """
+
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self._buf: List[str] = []
+        self._skip = 0
+
+    def flush(self) -> None:
+        if self._buf:
+            if not self._skip:
+                self.strings.append("".join(self._buf))
+            self._buf = []
+
+    def start(self, tag, attrib=None) -> None:
+        self.flush()
+        if tag in SKIP_TAGS:
+            self._skip += 1
+
+    def end(self, tag) -> None:
+        self.flush()
+        if tag in SKIP_TAGS and self._skip:
+            self._skip -= 1
+
+    def data(self, data: str) -> None:
+        if data:
+            self._buf.append(data)
+
+    def cdata(self, text: str) -> None:
+        """<![CDATA[...]]> 는 BeautifulSoup 에서 별도 텍스트 노드(CData)로 get_text 에 포함된다."""
+        self.flush()
+        if text and not self._skip:
+            self.strings.append(text)
+
+    def comment(self, text) -> None:
+        self.flush()
+
+    def pi(self, target, data=None) -> None:
+        self.flush()
+
+    def doctype(self, *args) -> None:
+        self.flush()
+
+    def close(self) -> List[str]:
+        self.flush()
+        return self.strings
+
+
+class _MarkupInRawText(Exception):
+    pass
+
+
+class _LxmlTextCollector(_TextCollector):
+    """
+    lxml 용: RAWTEXT_TAGS 안쪽 글자에 '<' 가 있으면 (BeautifulSoup 은 태그로 나눴을 내용) 중단하고
+    문서 전체를 표준 파서로 다시 읽게 한다. 대부분의 문서(<title> 에 마크업 없음)는 lxml 경로 그대로.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._raw = 0
+
+    def start(self, tag, attrib=None) -> None:
+        super().start(tag, attrib)
+        if tag in RAWTEXT_TAGS:
+            self._raw += 1
+
+    def end(self, tag) -> None:
+        super().end(tag)
+        if tag in RAWTEXT_TAGS and self._raw:
+            self._raw -= 1
+
+    def data(self, data: str) -> None:
+        if self._raw and "<" in data:
+            raise _MarkupInRawText
+        super().data(data)
+
+
+class _StdlibHTMLText(HTMLParser):
+    """표준 라이브러리 html.parser 이벤트를 _TextCollector 로 전달."""
+
+    def __init__(self, collector: _TextCollector) -> None:
+        super().__init__(convert_charrefs=True)
+        self.c = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.c.start(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.c.start(tag)
+        self.c.end(tag)
+
+    def handle_endtag(self, tag):
+        self.c.end(tag)
+
+    def handle_data(self, data):
+        self.c.data(data)
+
+    def handle_comment(self, data):
+        self.c.comment(data)
+
+    def handle_decl(self, decl):
+        self.c.doctype(decl)
+
+    def handle_pi(self, data):
+        self.c.pi(data)
+
+    def unknown_decl(self, data):
+        if data[:6].upper() == "CDATA[":
+            self.c.cdata(data[6:])
+        else:
+            self.c.comment(data)
+
+
+def _strings_stdlib(html: str) -> List[str]:
+    collector = _TextCollector()
+    parser = _StdlibHTMLText(collector)
+    parser.feed(html)
+    parser.close()
+    return collector.close()
+
+
+def _strings_lxml(html: str) -> List[str]:
+    # libxml2 HTML 파서는 CDATA 섹션을 버리므로 "<![" 가 있는 (드문) 문서는 표준 파서로
+    if "<![" in html:
+        return _strings_stdlib(html)
+    collector = _LxmlTextCollector()
+    parser = _lxml_etree.HTMLParser(target=collector, huge_tree=True)
+    try:
+        parser.feed(html)
+        return parser.close()
+    except _MarkupInRawText:
+        return _strings_stdlib(html)
+
+
+def get_html_backend(name: Optional[str] = None) -> Callable[[str], List[str]]:
+    """name: "lxml" | "stdlib" | None(사용 가능한 가장 빠른 백엔드)."""
+    if name == "stdlib" or (name is None and _lxml_etree is None):
+        return _strings_stdlib
+    if _lxml_etree is None:
+        raise ImportError("lxml is not installed")
+    return _strings_lxml
+
+
+def iter_html_strings(html: str, backend: Optional[str] = None) -> Iterator[str]:
+    """
+    HTML 을 트리 없이 이벤트 기반으로 훑어 텍스트 노드를 순서대로 반환.
+    lxml 파싱이 실패하면 표준 파서로 다시 시도한다.
+    """
+    if not html:
+        return iter(())
+    fn = get_html_backend(backend)
+    try:
+        return iter(fn(html))
+    except Exception:
+        if fn is _strings_stdlib:
+            raise
+        return iter(_strings_stdlib(html))
@@ -1,14 +1,15 @@
 from __future__ import annotations
 import os
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from tqdm import tqdm
 
-from bs4 import BeautifulSoup
-
 from rag_finance.utils.io_utils import (
     safe_glob, read_text, split_ext, guess_source_type
 )
-from rag_finance.ingestion.cleaning import clean_text
+from rag_finance.ingestion.cleaning import clean_lines, clean_text
+from rag_finance.ingestion.dates import extract_publication_date
+from rag_finance.ingestion.dedup import NearDupIndex
+from rag_finance.ingestion.html_text import iter_html_strings
 
 
 def load_raw_files(
@@ -29,18 +30,33 @@ def load_raw_files(
 
 
 def extract_text_from_html(html: str) -> str:
-    """BeautifulSoup로 HTML → 텍스트 변환."""
+    """HTML → 텍스트 변환 (script/style/noscript 제외, 텍스트 노드는 줄바꿈으로 연결)."""
+    return "\n".join(iter_html_strings(html)).strip()
+
+
+def extract_text_from_html_bs4(html: str) -> str:
+    """기존 BeautifulSoup(html.parser) 경로. parity/벤치마크 기준값 용도."""
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "html.parser")
-    # 필요시 스크립트/스타일 제거 가능:
     for tag in soup(["script", "style", "noscript"]):
         tag.extract()
     text = soup.get_text(separator="\n")
     return text.strip()
 
 
-def load_and_clean_documents(file_paths: Iterable[str]) -> List[Dict]:
+def html_to_clean_text(html: str) -> str:
+    """HTML 텍스트 노드를 문자열로 합치지 않고 곧바로 clean_lines 로 흘려보낸다."""
+    return clean_lines(iter_html_strings(html))
+
+
+def load_and_clean_documents(
+    file_paths: Iterable[str],
+    near_dup: Optional[NearDupIndex] = None,
+) -> List[Dict]:
     """
     파일 목록을 받아, 텍스트 추출→클리닝→메타데이터 구성까지 반환.
+    near_dup 이 주어지면 근접 중복 문서는 하나(canonical)만 남기고 "dup_count" 를 기록한다.
     반환 dict 형식:
     {
       "file_name": str,
@@ -49,6 +65,8 @@ def load_and_clean_documents(file_paths: Iterable[str]) -> List[Dict]:
       "text_length": int,
       "file_type": "txt" | "html",
       "source_type": "report" | "etc",
+      "published_at": "YYYY-MM-DD" | "",   # HTML meta → 경로 → 본문 헤더 순으로 추정
+      "date_source": "html_meta" | "path" | "header" | "",
     }
     """
     results: List[Dict] = []
@@ -56,9 +74,12 @@ def load_and_clean_documents(file_paths: Iterable[str]) -> List[Dict]:
         base, ext = split_ext(fp)
         try:
             raw = read_text(fp)
-            if ext in ("html", "htm"):
-                raw = extract_text_from_html(raw)
-            text = clean_text(raw)
+            is_html = ext in ("html", "htm")
+            if is_html:
+                text = html_to_clean_text(raw)
+            else:
+                text = clean_text(raw)
+            published_at, date_source = extract_publication_date(fp, raw=raw, text=text, is_html=is_html)
             results.append({
                 "file_name": os.path.basename(fp),
                 "file_path": fp,
@@ -66,8 +87,14 @@ def load_and_clean_documents(file_paths: Iterable[str]) -> List[Dict]:
                 "text_length": len(text),
                 "file_type": ext,
                 "source_type": guess_source_type(fp),
+                "published_at": published_at,
+                "date_source": date_source,
             })
         except Exception:
             # 필요시 로깅으로 넘기기
             continue
+    if near_dup is not None:
+        before = len(results)
+        results = near_dup.dedupe(results, key_fn=lambda r: r["file_name"], text_fn=lambda r: r["text"])
+        print(f"[dedup] docs: {before} -> {len(results)} ({before - len(results)} near-duplicates dropped)")
     return results
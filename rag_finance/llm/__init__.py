@@ -1,5 +1,14 @@
 """Groq 기반 리포트 생성을 위한 LLM 유틸리티 모듈."""
 
-from .report_generator import generate_finance_report
+from typing import Any
 
 __all__ = ["generate_finance_report"]
+
+
+def __getattr__(name: str) -> Any:
+    # 패키지 import 만으로 report_generator(langchain_core)를 끌어오지 않도록 처음 접근할 때 로드
+    if name == "generate_finance_report":
+        from .report_generator import generate_finance_report
+
+        return generate_finance_report
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
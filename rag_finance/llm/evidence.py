@@ -0,0 +1,189 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from rag_finance.llm.report_generator import PROMPT_TEMPLATE_VERSION, build_messages
+from rag_finance.utils.io_utils import ensure_dir, read_json
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def prompt_template_version() -> str:
+    """PROMPT_TEMPLATE_VERSION + 시스템 지침 해시 (버전을 안 올리고 지침만 고쳐도 지문이 바뀐다)."""
+    system = build_messages(context_text="", query="")[0]["content"]
+    return f"v{PROMPT_TEMPLATE_VERSION}-{_sha1(system)[:10]}"
+
+
+def evidence_components(
+    *,
+    query: str,
+    docs: Sequence[Document],
+    tabular_payload: Optional[Dict[str, Any]],
+    generation: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    리포트의 최종 입력을 구성 요소별로 요약.
+    docs: 순위 순서대로 "chunk_id|match_strength|본문 해시" (컨텍스트 헤더에 들어가는 match 포함)
+    tabular: 정형 데이터 payload 해시, template: 프롬프트 지침 버전,
+    generation: 질의·모델·샘플링 설정·few-shot 등 LLM 호출 인자 해시
+    """
+    entries = []
+    for d in docs:
+        meta = d.metadata or {}
+        chunk_id = meta.get("chunk_id") or f"{meta.get('file_name', '?')}#{meta.get('chunk_index', '?')}"
+        entries.append(f"{chunk_id}|{meta.get('match_strength', '')}|{_sha1(d.page_content or '')[:16]}")
+    tabular = ""
+    if tabular_payload:
+        tabular = _sha1(json.dumps(tabular_payload, ensure_ascii=False, sort_keys=True, default=str))
+    return {
+        "docs": entries,
+        "tabular": tabular,
+        "template": prompt_template_version(),
+        "generation": _sha1(json.dumps({"query": query.strip(), **generation}, ensure_ascii=False, sort_keys=True, default=str)),
+    }
+
+
+def evidence_fingerprint(components: Dict[str, Any]) -> str:
+    return _sha1(json.dumps(components, ensure_ascii=False, sort_keys=True))
+
+
+def explain_change(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> str:
+    """이전 실행 대비 무엇이 바뀌었는지 한 줄 설명 (재생성 사유)."""
+    if not previous:
+        return "no previous successful run"
+    reasons = []
+    if previous.get("template") != current["template"]:
+        reasons.append(f"prompt template changed ({previous.get('template')} -> {current['template']})")
+    if previous.get("generation") != current["generation"]:
+        reasons.append("query or generation settings changed")
+    if previous.get("tabular") != current["tabular"]:
+        reasons.append("tabular data changed")
+    old_docs, new_docs = list(previous.get("docs") or []), current["docs"]
+    if old_docs != new_docs:
+        old_ids = {e.split("|", 1)[0]: e for e in old_docs}
+        new_ids = {e.split("|", 1)[0]: e for e in new_docs}
+        added = len(new_ids.keys() - old_ids.keys())
+        removed = len(old_ids.keys() - new_ids.keys())
+        edited = sum(1 for k in new_ids.keys() & old_ids.keys() if new_ids[k] != old_ids[k])
+        detail = f"+{added} -{removed} ~{edited}" if (added or removed or edited) else "order changed"
+        reasons.append(f"evidence changed ({detail} chunks)")
+    return "; ".join(reasons) or "fingerprint changed"
+
+
+class ReportManifest:
+    """
+    마지막 성공 실행 기록: {root}/manifest.json (질의 키 → 지문·구성 요소·시각) 과
+    {root}/reports/{키}.txt|.pdf (재사용할 리포트 사본).
+    여러 프로세스·노드(queue work 워커 등)가 같은 root 를 써도 되도록, 쓰기는 manifest.json.lock 의
+    파일 잠금(fcntl) 안에서 최신 manifest 를 다시 읽어 자기 키만 바꾸고 고유한 임시 파일 → os.replace 로 교체한다.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.path = os.path.join(root, MANIFEST_FILE)
+        self.entries: Dict[str, Dict[str, Any]] = self._read()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.isfile(self.path):
+            return {}
+        try:
+            return dict(read_json(self.path).get("entries") or {})
+        except (OSError, ValueError, AttributeError):
+            return {}  # 깨진 manifest 는 재생성으로 덮어쓴다
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        import fcntl
+
+        ensure_dir(self.root)
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def key_for(query: str) -> str:
+        return _sha1(" ".join(query.split()))[:16]
+
+    def _artifact(self, key: str, ext: str) -> str:
+        return os.path.join(self.root, "reports", f"{key}.{ext}")
+
+    def check(self, key: str, components: Dict[str, Any]) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
+        """반환: (재사용 가능 여부, 사유, 이전 기록). 지문이 같아도 저장된 리포트 사본이 없으면 재생성."""
+        self.entries = self._read()  # 다른 프로세스가 그 사이 기록했을 수 있다
+        entry = self.entries.get(key)
+        fingerprint = evidence_fingerprint(components)
+        if entry is None:
+            return False, explain_change(None, components), None
+        if entry.get("fingerprint") != fingerprint:
+            return False, explain_change(entry.get("components"), components), entry
+        if not os.path.isfile(self._artifact(key, "txt")):
+            return False, "previous report copy is missing", entry
+        return True, f"evidence fingerprint {fingerprint[:12]} unchanged since {entry.get('generated_at', '?')}", entry
+
+    def load_report(self, key: str) -> str:
+        with open(self._artifact(key, "txt"), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def previous_pdf(self, key: str) -> Optional[str]:
+        path = self._artifact(key, "pdf")
+        return path if os.path.isfile(path) else None
+
+    def record(self, key: str, *, query: str, components: Dict[str, Any], report_text: str, model: str) -> Dict[str, Any]:
+        """
+        성공한 생성 결과를 기록 (리포트 사본 저장 후 manifest 의 이 키만 교체).
+        이전 PDF 사본은 내용이 달라지므로 지운다. 다른 키의 기록은 잠금 안에서 다시 읽어 보존한다.
+        """
+        entry = {
+            "query": query,
+            "fingerprint": evidence_fingerprint(components),
+            "components": components,
+            "model": model,
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with self._locked():
+            self._replace(self._artifact(key, "txt"), lambda f: f.write(report_text.encode("utf-8")))
+            stale_pdf = self._artifact(key, "pdf")
+            if os.path.isfile(stale_pdf):
+                os.remove(stale_pdf)
+            self.entries = self._read()
+            self.entries[key] = entry
+            self._replace(
+                self.path,
+                lambda f: f.write(json.dumps({"entries": self.entries}, ensure_ascii=False, indent=2).encode("utf-8")),
+            )
+        return entry
+
+    def attach_pdf(self, key: str, pdf_path: str) -> None:
+        """이번 실행의 PDF 를 다음 재사용용 사본으로 보관."""
+        with self._locked(), open(pdf_path, "rb") as src:
+            self._replace(self._artifact(key, "pdf"), lambda f: shutil.copyfileobj(src, f))
+
+    @staticmethod
+    def _replace(path: str, write) -> None:
+        """같은 디렉터리의 고유 임시 파일에 쓴 뒤 os.replace (중간에 죽어도 이전 파일은 온전히 남는다)."""
+        directory = os.path.dirname(path) or "."
+        ensure_dir(directory)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
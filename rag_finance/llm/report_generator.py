@@ -3,11 +3,33 @@ from __future__ import annotations
 import json
 import os
 import textwrap
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
 
-from groq import Groq
 from langchain_core.documents import Document
 
+if TYPE_CHECKING:  # 클라이언트는 호출자가 만들어 넘기므로 타입 표기에만 필요
+    from groq import AsyncGroq, Groq
+
+try:  # 선택 의존성
+    from dotenv import load_dotenv  # type: ignore
+except OSError:  # pragma: no cover - 일부 플랫폼에서 I/O 에러 발생 가능
+    load_dotenv = None
+except ImportError:  # pragma: no cover - python-dotenv 미설치 시
+    load_dotenv = None
+
+
+def load_api_key(explicit: Optional[str] = None, env_file: Optional[str] = None) -> str:
+    """Resolve the Groq API key from an explicit value, a .env file or GROQ_API_KEY."""
+    if load_dotenv:
+        if env_file and os.path.isfile(env_file):
+            load_dotenv(env_file)
+        else:
+            load_dotenv()
+    api_key = explicit or os.environ.get("GROQ_API_KEY", "")
+    if not api_key:
+        raise RuntimeError("GROQ_API_KEY 환경변수 또는 --api-key가 필요합니다.")
+    return api_key
+
 
 def documents_to_context(
     docs: Sequence[Document],
@@ -86,6 +108,10 @@ def load_few_shot_examples(jsonl_dir: Optional[str], max_examples: int = 1) -> L
     return examples
 
 
+# build_messages 의 지침·구성을 바꾸면 올린다 (근거 지문이 바뀌어 이전 리포트를 재사용하지 않게 — llm.evidence)
+PROMPT_TEMPLATE_VERSION = 1
+
+
 def build_messages(
     *,
     context_text: str,
@@ -142,24 +168,19 @@ def build_messages(
     return messages
 
 
-def generate_finance_report(
+def prepare_report_messages(
     *,
-    client: Groq,
     query: str,
     docs: Sequence[Document],
-    model: str = "llama-3.3-70b-versatile",
     few_shot_dir: Optional[str] = None,
     few_shot_max_examples: int = 1,
     include_few_shot: bool = True,
     style_hint: str = "",
-    temperature: float = 0.1,
-    top_p: float = 0.95,
-    max_tokens: int = 1024,
     max_chars_per_doc: int = 1200,
     max_total_chars: int = 12_000,
     tabular_text: str = "",
-) -> Tuple[str, List[Dict[str, str]], str]:
-    """Run the Groq completion call and return (report_text, sent_messages, context_text)."""
+) -> Tuple[List[Dict[str, str]], str]:
+    """Serialize docs and build the chat messages; returns (messages, context_text)."""
     context_text = documents_to_context(
         docs,
         max_chars_per_doc=max_chars_per_doc,
@@ -181,6 +202,47 @@ def generate_finance_report(
         style_hint=style_hint,
         tabular_text=tabular_text,
     )
+    return messages, context_text
+
+
+def _combine_context(tabular_text: str, context_text: str) -> str:
+    combined_context_parts: List[str] = []
+    if tabular_text and tabular_text.strip():
+        combined_context_parts.append("[정형 데이터]\n" + tabular_text.strip())
+    if context_text and context_text.strip():
+        combined_context_parts.append(context_text.strip())
+    return "\n\n".join(combined_context_parts)
+
+
+def generate_finance_report(
+    *,
+    client: Groq,
+    query: str,
+    docs: Sequence[Document],
+    model: str = "llama-3.3-70b-versatile",
+    few_shot_dir: Optional[str] = None,
+    few_shot_max_examples: int = 1,
+    include_few_shot: bool = True,
+    style_hint: str = "",
+    temperature: float = 0.1,
+    top_p: float = 0.95,
+    max_tokens: int = 1024,
+    max_chars_per_doc: int = 1200,
+    max_total_chars: int = 12_000,
+    tabular_text: str = "",
+) -> Tuple[str, List[Dict[str, str]], str]:
+    """Run the Groq completion call and return (report_text, sent_messages, context_text)."""
+    messages, context_text = prepare_report_messages(
+        query=query,
+        docs=docs,
+        few_shot_dir=few_shot_dir,
+        few_shot_max_examples=few_shot_max_examples,
+        include_few_shot=include_few_shot,
+        style_hint=style_hint,
+        max_chars_per_doc=max_chars_per_doc,
+        max_total_chars=max_total_chars,
+        tabular_text=tabular_text,
+    )
 
     response = client.chat.completions.create(
         model=model,
@@ -191,14 +253,49 @@ def generate_finance_report(
     )
     report_text = response.choices[0].message.content.strip()
 
-    combined_context_parts: List[str] = []
-    if tabular_text and tabular_text.strip():
-        combined_context_parts.append("[정형 데이터]\n" + tabular_text.strip())
-    if context_text and context_text.strip():
-        combined_context_parts.append(context_text.strip())
-    combined_context = "\n\n".join(combined_context_parts)
+    return report_text, messages, _combine_context(tabular_text, context_text)
+
+
+async def agenerate_finance_report(
+    *,
+    client: AsyncGroq,
+    query: str,
+    docs: Sequence[Document],
+    model: str = "llama-3.3-70b-versatile",
+    few_shot_dir: Optional[str] = None,
+    few_shot_max_examples: int = 1,
+    include_few_shot: bool = True,
+    style_hint: str = "",
+    temperature: float = 0.1,
+    top_p: float = 0.95,
+    max_tokens: int = 1024,
+    max_chars_per_doc: int = 1200,
+    max_total_chars: int = 12_000,
+    tabular_text: str = "",
+) -> Tuple[str, List[Dict[str, str]], str]:
+    """Async variant of generate_finance_report for many concurrent calls (AsyncGroq client)."""
+    messages, context_text = prepare_report_messages(
+        query=query,
+        docs=docs,
+        few_shot_dir=few_shot_dir,
+        few_shot_max_examples=few_shot_max_examples,
+        include_few_shot=include_few_shot,
+        style_hint=style_hint,
+        max_chars_per_doc=max_chars_per_doc,
+        max_total_chars=max_total_chars,
+        tabular_text=tabular_text,
+    )
+
+    response = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        top_p=top_p,
+    )
+    report_text = response.choices[0].message.content.strip()
 
-    return report_text, messages, combined_context
+    return report_text, messages, _combine_context(tabular_text, context_text)
 
 
 def format_report_sections(text: str, width: int = 92) -> str:
@@ -0,0 +1,176 @@
+from __future__ import annotations
+import threading
+import weakref
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from rag_finance.retrieval.filters import text_contains_company
+
+DOC_ID = "doc_id"
+
+# vectorstore → doc_id 위치 배열 (또는 None)
+_POSITIONS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_POSITIONS_LOCK = threading.Lock()
+
+
+def doc_ids(docs: Sequence[Document], intern: Optional[Dict[Tuple[str, str], int]] = None) -> np.ndarray:
+    """
+    문서 → 정수 id 배열. build 시 부여한 metadata["doc_id"](FAISS 위치와 같은 dense id)를 쓴다.
+    doc_id 가 없는 예전 인덱스의 문서는 (file_name, chunk_index) 를 intern 에 등록해 질의 안에서만 쓰는 음수 id 를 준다.
+    """
+    out = np.empty(len(docs), dtype=np.int32)
+    for i, d in enumerate(docs):
+        meta = d.metadata or {}
+        did = meta.get(DOC_ID)
+        if did is None:
+            if intern is None:
+                intern = {}
+            key = (str(meta.get("file_name", "")), str(meta.get("chunk_index", "")))
+            did = intern.setdefault(key, -1 - len(intern))
+        out[i] = did
+    return out
+
+
+def first_occurrence(ids: np.ndarray) -> np.ndarray:
+    """ids 에서 각 값이 처음 나온 위치 (등장 순서 유지) — dedup_docs 의 배열 버전."""
+    if len(ids) == 0:
+        return np.zeros(0, dtype=np.int64)
+    _, first = np.unique(ids, return_index=True)
+    return np.sort(first)
+
+
+def _union(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    both = np.concatenate([a, b])
+    return both[first_occurrence(both)]
+
+
+def rank_lookup(cand_ids: np.ndarray, source_ids: np.ndarray) -> np.ndarray:
+    """cand_ids 각각이 source_ids(검색 결과 순서)에서 처음 나온 순위(0부터). 없으면 -1."""
+    if len(source_ids) == 0 or len(cand_ids) == 0:
+        return np.full(len(cand_ids), -1, dtype=np.int64)
+    first = first_occurrence(source_ids)
+    uniq = source_ids[first]
+    order = np.argsort(uniq, kind="stable")
+    sorted_ids, sorted_ranks = uniq[order], first[order]
+    pos = np.clip(np.searchsorted(sorted_ids, cand_ids), 0, len(sorted_ids) - 1)
+    return np.where(sorted_ids[pos] == cand_ids, sorted_ranks[pos], -1)
+
+
+def rrf_scores(cand_ids: np.ndarray, sources: Sequence[np.ndarray], k_const: int = 60) -> np.ndarray:
+    """Reciprocal Rank Fusion: 후보별 Σ 1 / (k + rank + 1) (rrf.rrf_fusion 과 같은 식)."""
+    scores = np.zeros(len(cand_ids), dtype=np.float64)
+    for src in sources:
+        ranks = rank_lookup(cand_ids, src)
+        hit = ranks >= 0
+        scores[hit] += 1.0 / (k_const + ranks[hit] + 1)
+    return scores
+
+
+def select_company_candidates(
+    docs: Sequence[Document],
+    q_name: str,
+    q_code: str,
+    k_report: int,
+    k_other: int,
+    min_needed_report: int,
+    min_needed_other: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    엔티티 필터(리포트는 메타데이터 강매칭, 기타는 메타데이터/본문 약매칭)와 단계별 완화.
+    공유 Document.metadata 에 쓰지 않고 반환: (선택된 docs 위치 배열 — 리포트 먼저, 위치별 match_strength)
+    """
+    n = len(docs)
+    metas = [d.metadata or {} for d in docs]
+    is_report = np.fromiter((m.get("type") == "report" for m in metas), dtype=bool, count=n)
+    rep_idx, oth_idx = np.flatnonzero(is_report), np.flatnonzero(~is_report)
+    strength = np.zeros(n, dtype=np.int64)
+
+    if not (q_name or q_code):
+        order = np.concatenate([rep_idx[:k_report], oth_idx[:k_other]])
+        return order, strength[order]
+
+    names = [(m.get("company") or "").strip() for m in metas]
+    codes = [(m.get("company_code") or "").strip() for m in metas]
+    name_eq = np.fromiter((bool(q_name) and nm == q_name for nm in names), dtype=bool, count=n)
+    code_eq = np.fromiter((bool(q_code) and cd == q_code for cd in codes), dtype=bool, count=n)
+
+    # 리포트: 종목코드(2) > 기업명(1) 메타데이터 일치 → 부족하면 기업명 일치 → 전체 리포트
+    meta_strength = np.where(code_eq, 2, np.where(name_eq, 1, 0))
+    reports = rep_idx[meta_strength[rep_idx] > 0]
+    strength[reports] = meta_strength[reports]
+    if len(reports) < min_needed_report:
+        if q_name:
+            raw_eq = np.fromiter((m.get("company") == q_name for m in metas), dtype=bool, count=n)
+            relaxed = rep_idx[raw_eq[rep_idx]]
+            strength[relaxed] = np.maximum(strength[relaxed], 1)
+            reports = _union(reports, relaxed)
+        if len(reports) < min_needed_report:
+            reports = _union(reports, rep_idx)
+
+    # 기타: 메타데이터 또는 본문에 기업명/코드 → 부족하면 본문 기업명 → 전체
+    others_strength = np.zeros(n, dtype=np.int64)
+    for i in oth_idx:
+        _, text_strength = text_contains_company(docs[i].page_content, q_name, q_code)
+        others_strength[i] = max(int(meta_strength[i]), text_strength)
+    others = oth_idx[others_strength[oth_idx] > 0]
+    strength[others] = others_strength[others]
+    if len(others) < min_needed_other and q_name:
+        relax = []
+        for i in oth_idx:
+            ok, s = text_contains_company(docs[i].page_content, q_name, None)
+            if ok:
+                strength[i] = max(int(strength[i]), max(1, s))
+                relax.append(i)
+        others = _union(others, np.asarray(relax, dtype=np.int64))
+    if len(others) < min_needed_other:
+        others = _union(others, oth_idx)
+
+    order = np.concatenate([reports[:k_report], others[:k_other]])
+    return order, strength[order]
+
+
+def _positions(vectorstore) -> Optional[np.ndarray]:
+    """doc_id → FAISS 위치 (vectorstore 당 한 번 계산해 캐시). doc_id 가 없는 인덱스면 None."""
+    with _POSITIONS_LOCK:
+        if vectorstore in _POSITIONS:
+            return _POSITIONS[vectorstore]
+    n = vectorstore.index.ntotal
+    pos = np.full(n, -1, dtype=np.int64)
+    store = vectorstore.docstore._dict
+    for p, sid in vectorstore.index_to_docstore_id.items():
+        did = (store[sid].metadata or {}).get(DOC_ID)
+        if did is None or not (0 <= did < n):
+            pos = None
+            break
+        pos[did] = p
+    if pos is not None and (pos < 0).any():
+        pos = None
+    with _POSITIONS_LOCK:
+        _POSITIONS[vectorstore] = pos
+    return pos
+
+
+def stored_vectors(vectorstore, ids: np.ndarray) -> Optional[np.ndarray]:
+    """
+    인덱스에 저장된 문서 벡터를 id 로 꺼낸다(재임베딩 없음).
+    doc_id 가 없거나 id 가 인덱스 범위를 벗어나면(예전 인덱스/다른 인덱스의 문서) None.
+    """
+    if vectorstore is None or len(ids) == 0 or ids.min() < 0:
+        return None
+    pos = _positions(vectorstore)
+    if pos is None or ids.max() >= len(pos):
+        return None
+    try:
+        return vectorstore.index.reconstruct_batch(pos[ids])
+    except RuntimeError:  # reconstruct 를 지원하지 않는 인덱스 타입
+        return None
+
+
+def materialize(docs: Sequence[Document], strengths: Sequence[int]) -> List[Document]:
+    """최종 결과만 새 Document 로 만든다(질의별 match_strength 를 담고 docstore 원본은 건드리지 않음)."""
+    return [
+        Document(page_content=d.page_content, metadata={**(d.metadata or {}), "match_strength": int(s)})
+        for d, s in zip(docs, strengths)
+    ]
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# 관측치가 없을 때 쓰는 단위 비용(ms) — config 의 deadline 섹션으로 덮어쓴다
+DEFAULT_UNIT_MS = {
+    "search": 30.0,     # 1단계 검색 1회
+    "hybrid": 1.0,      # hybrid_pre 문서 1개(임베딩 포함)
+    "ce": 4.0,          # 본 CE 쌍 1개
+    "cascade": 0.5,     # cascade 1차 CE 쌍 1개
+    "mmr": 0.02,        # MMR (선택 수 × 후보 수) 1단위
+}
+
+
+class StageCosts:
+    """
+    단계별 단위 비용의 EWMA (프로세스 전체 공유).
+    상주 서비스에서는 앞선 요청의 실측치로 다음 요청의 예산 배분을 결정한다.
+    """
+
+    def __init__(self, alpha: float = 0.2) -> None:
+        self.alpha = alpha
+        self._unit_ms: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, units: float, seconds: float) -> None:
+        if units <= 0:
+            return
+        unit_ms = seconds * 1000.0 / units
+        with self._lock:
+            prev = self._unit_ms.get(stage)
+            self._unit_ms[stage] = unit_ms if prev is None else (1 - self.alpha) * prev + self.alpha * unit_ms
+
+    def unit_ms(self, stage: str, default: Optional[float] = None) -> float:
+        with self._lock:
+            found = self._unit_ms.get(stage)
+        if found is not None:
+            return found
+        return DEFAULT_UNIT_MS.get(stage, 1.0) if default is None else default
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {k: round(v, 4) for k, v in self._unit_ms.items()}
+
+
+STAGE_COSTS = StageCosts()
+
+
+class Deadline:
+    """
+    retrieve_with_keywords 한 번의 지연 예산. deadline_ms 가 없으면(배치 등) 아무것도 줄이지 않는다.
+    - lap(): 직전 지점부터의 단계 소요 시간 기록 (+ 단위 수를 주면 StageCosts 에 반영)
+    - estimate_ms(): 관측(없으면 config 기본값) 단위 비용 × 단위 수 / safety
+    - degrade(): 적용한 품질 저하를 기록해 dbg 로 보고
+    """
+
+    def __init__(self, deadline_ms: Optional[float], cfg: Optional[Dict[str, Any]] = None, costs: StageCosts = STAGE_COSTS) -> None:
+        self.cfg = cfg or {}
+        self.deadline_ms = float(deadline_ms) if deadline_ms else 0.0
+        self.enabled = self.deadline_ms > 0
+        self.costs = costs
+        self.safety = float(self.cfg.get("safety", 0.9))
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.stages_ms: Dict[str, float] = {}
+        self.degraded: List[str] = []
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000.0
+
+    def remaining_ms(self) -> float:
+        return self.deadline_ms - self.elapsed_ms() if self.enabled else float("inf")
+
+    def lap(self, stage: str, units: float = 0) -> None:
+        now = time.perf_counter()
+        seconds = now - self._last
+        self._last = now
+        self.stages_ms[stage] = round(self.stages_ms.get(stage, 0.0) + seconds * 1000.0, 2)
+        if units:
+            self.costs.observe(stage, units, seconds)
+
+    def unit_ms(self, stage: str) -> float:
+        return self.costs.unit_ms(stage, (self.cfg.get("unit_ms") or {}).get(stage))
+
+    def estimate_ms(self, stage: str, units: float) -> float:
+        return self.unit_ms(stage) * units / max(self.safety, 1e-6)
+
+    def affordable_units(self, stage: str, budget_ms: float) -> int:
+        """budget_ms 안에 처리할 수 있는 단위 수 추정."""
+        if not self.enabled:
+            return 10**9
+        return max(0, int(budget_ms * max(self.safety, 1e-6) / max(self.unit_ms(stage), 1e-6)))
+
+    def degrade(self, what: str) -> None:
+        self.degraded.append(what)
+
+    def report(self) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        return {
+            "deadline_ms": self.deadline_ms,
+            "elapsed_ms": round(self.elapsed_ms(), 2),
+            "stages_ms": self.stages_ms,
+            "degraded": self.degraded,
+        }
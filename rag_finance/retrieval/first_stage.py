@@ -0,0 +1,97 @@
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+Branch = Callable[[], List[Document]]
+
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+def _pool(workers: int) -> ThreadPoolExecutor:
+    """1단계 검색 전용 스레드 풀 (프로세스 공유, 더 큰 workers 요청이 오면 다시 만든다)."""
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or workers > _POOL_WORKERS:
+            old = _POOL
+            _POOL = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="first-stage")
+            _POOL_WORKERS = workers
+            if old is not None:
+                old.shutdown(wait=False)
+        return _POOL
+
+
+class _Started:
+    """branch 를 감싸 풀 스레드에서 실제로 시작한 시각을 남긴다 (제출~시작 = 큐 대기)."""
+
+    __slots__ = ("fn", "event", "at")
+
+    def __init__(self, fn: Branch) -> None:
+        self.fn = fn
+        self.event = threading.Event()
+        self.at = 0.0
+
+    def __call__(self) -> Tuple[List[Document], float]:
+        self.at = time.perf_counter()
+        self.event.set()
+        return _timed(self.fn)
+
+
+def _timed(fn: Branch) -> Tuple[List[Document], float]:
+    start = time.perf_counter()
+    out = fn()
+    return out, round((time.perf_counter() - start) * 1000.0, 2)
+
+
+def run_branches(
+    branches: Dict[str, Branch],
+    concurrent: bool = True,
+    workers: int = 4,
+    timeout_ms: Optional[float] = None,
+) -> Tuple[Dict[str, List[Document]], Dict[str, float], List[str], Dict[str, float]]:
+    """
+    독립적인 1단계 retriever(FAISS / BM25 / shard·소스별 검색 등)를 동시에 실행.
+    FAISS 검색과 질의 임베딩은 GIL 을 놓으므로 BM25 점수 계산과 겹쳐 1단계 지연이 합이 아닌 최댓값이 된다.
+    풀은 상주 서비스의 동시 요청이 함께 쓰므로 timeout_ms 는 branch 가 풀 스레드에서 시작한 때부터 잰다
+    (큐 대기는 retriever 시간 초과로 치지 않고 따로 돌려준다). 넘긴 branch 는 빈 결과로 처리하고
+    cancel() 한 뒤(이미 도는 검색은 끝까지 돌고 결과는 버린다) 목록으로 알린다.
+    branch 안의 예외는 그대로 전파되며, 그때 아직 시작하지 않은 다른 branch 는 취소한다.
+    반환: (branch → 문서, branch → 소요 ms, 시간 초과 branch 목록, branch → 큐 대기 ms)
+    """
+    results: Dict[str, List[Document]] = {}
+    timings: Dict[str, float] = {}
+    waits: Dict[str, float] = {}
+    failed: List[str] = []
+    if not concurrent or len(branches) <= 1:
+        for name, fn in branches.items():
+            results[name], timings[name] = _timed(fn)
+        return results, timings, failed, waits
+
+    submitted = time.perf_counter()
+    wrapped = {name: _Started(fn) for name, fn in branches.items()}
+    pool = _pool(workers)
+    futures = {name: pool.submit(br) for name, br in wrapped.items()}
+    try:
+        for name, fut in futures.items():
+            br = wrapped[name]
+            br.event.wait()
+            waits[name] = round((br.at - submitted) * 1000.0, 2)
+            wait_s = None
+            if timeout_ms is not None:
+                wait_s = max(0.0, timeout_ms / 1000.0 - (time.perf_counter() - br.at))
+            try:
+                results[name], timings[name] = fut.result(timeout=wait_s)
+            except FutureTimeout:
+                fut.cancel()
+                results[name], timings[name] = [], round((time.perf_counter() - br.at) * 1000.0, 2)
+                failed.append(f"{name}:timeout")
+    except BaseException:
+        for fut in futures.values():
+            fut.cancel()
+        raise
+    return results, timings, failed, waits
@@ -1,6 +1,6 @@
 from __future__ import annotations
 import math
-from typing import List, Sequence
+from typing import List, Optional, Sequence
 import numpy as np
 from langchain_core.documents import Document
 
@@ -34,11 +34,22 @@ def build_hybrid_pre(
     kw_picked: Sequence[str] = (),
     alpha_kw: float = 0.08,
     cap_per_kw: int = 1,
+    match_strength: Optional[Sequence[int]] = None,
+    doc_vectors: Optional[np.ndarray] = None,
+    query_vector: Optional[Sequence[float]] = None,
 ) -> List[float]:
-    q_emb = embedding_model.embed_query(query)
-    doc_embs = embedding_model.embed_documents([d.page_content for d in docs])
-    sims = np.dot(np.array(doc_embs), np.array(q_emb)).tolist()
-    ent_bonus = [ent_bonus_scale * (d.metadata.get("match_strength", 0)) for d in docs]
+    """
+    match_strength: 문서별 엔티티 매칭 강도(없으면 metadata["match_strength"])
+    doc_vectors: 인덱스에 저장된 문서 벡터(docs 순서). 주면 문서 재임베딩을 생략한다.
+    query_vector: 이미 계산한 query 임베딩(의미 캐시 조회용). 주면 다시 임베딩하지 않는다.
+    """
+    q_emb = query_vector if query_vector is not None else embedding_model.embed_query(query)
+    if doc_vectors is None:
+        doc_vectors = np.array(embedding_model.embed_documents([d.page_content for d in docs]))
+    sims = np.dot(doc_vectors, np.array(q_emb)).tolist()
+    if match_strength is None:
+        match_strength = [d.metadata.get("match_strength", 0) for d in docs]
+    ent_bonus = [ent_bonus_scale * s for s in match_strength]
     kw_raw = [kw_bonus_score(d.page_content, kw_picked, cap_per_kw=cap_per_kw) for d in docs]
     from .hybrid import minmax_norm as _mmn  # self import ok
     kw_norm = _mmn(kw_raw)
@@ -1,22 +1,86 @@
 from __future__ import annotations
-import os
-from typing import Any, Dict, List, Tuple
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
 
-from tqdm import tqdm
-from langchain_community.vectorstores import FAISS
-from langchain.retrievers import BM25Retriever
+import numpy as np
 from langchain_core.documents import Document
 
 from rag_finance.entities.company_maps import extract_company_from_query
 from rag_finance.entities.keyword_store import load_company_keywords, select_keywords_for_query
-from rag_finance.retrieval.filters import dedup_docs, contains_by_name_or_code, text_contains_company
-from rag_finance.retrieval.rrf import rrf_fusion
+from rag_finance.indexing.compact import CompactIndex, open_compact
+from rag_finance.indexing.shards import shards_dir_for
+from rag_finance.indexing.time_partitions import time_dir_for
+from rag_finance.indexing.versions import current_build, index_dir
+from rag_finance.ingestion.dates import doc_dates, in_window, normalize_window
+from rag_finance.retrieval.candidates import (
+    doc_ids,
+    first_occurrence,
+    materialize,
+    rrf_scores,
+    select_company_candidates,
+    stored_vectors,
+)
+from rag_finance.retrieval.deadline import Deadline
+from rag_finance.retrieval.first_stage import run_branches
 from rag_finance.retrieval.hybrid import build_hybrid_pre, minmax_norm
 from rag_finance.retrieval.reranker_ce import CrossEncoderReranker, anchor_trim
 from rag_finance.retrieval.mmr import mmr_by_text
+from rag_finance.retrieval.scatter import ScatterGatherClient
+from rag_finance.retrieval.semantic_cache import SemanticResultCache, keyword_facet, query_facets, rerank_by_similarity
+from rag_finance.retrieval.shards import ShardRouter
 
-def _doc_key(d: Document) -> Tuple[str, str]:
-    return (str(d.metadata.get("file_name", "")), str(d.metadata.get("chunk_index", "")))
+if TYPE_CHECKING:  # 무거운 의존성은 실제로 쓰는 함수 안에서 import (CLI 기동 시간)
+    from langchain.retrievers import BM25Retriever
+    from langchain_community.vectorstores import FAISS
+
+def load_vectorstore(indexes_dir: str, embedding_model, index_name: str = "all", build_id: str | None = None) -> FAISS:
+    """게시된(또는 build_id 로 지정한) 버전의 전체 인덱스 로드 (버전 없는 예전 레이아웃도 지원)."""
+    from langchain_community.vectorstores import FAISS
+
+    return FAISS.load_local(
+        index_dir(indexes_dir, index_name, build_id),
+        embedding_model,
+        allow_dangerous_deserialization=True
+    )
+
+def build_bm25_retriever(vs: FAISS) -> BM25Retriever:
+    from langchain.retrievers import BM25Retriever
+
+    return BM25Retriever.from_documents(vs.docstore._dict.values())
+
+def bm25_top_k(bm25: BM25Retriever, query: str, k: int) -> List[Document]:
+    """
+    BM25Retriever.invoke 와 같은 top-k(같은 정렬)를 retriever 의 k 를 바꾸지 않고 계산한다
+    — 상주 서비스에서는 요청 스레드들이 retriever 하나를 공유하고 k 는 요청마다(지연 예산) 달라진다.
+    """
+    scores = bm25.vectorizer.get_scores(bm25.preprocess_func(query))
+    return [bm25.docs[i] for i in np.argsort(scores)[::-1][:k]]
+
+def build_reranker(ce_cfg: Dict[str, Any]) -> CrossEncoderReranker:
+    return CrossEncoderReranker(
+        model_name=ce_cfg["model_name"],
+        device=ce_cfg["device"],
+        batch_size=ce_cfg["batch_size"],
+        use_sigmoid=ce_cfg["use_sigmoid"],
+        backend=ce_cfg.get("backend", "torch"),
+        threads=int(ce_cfg.get("threads", 0) or 0),
+        onnx_dir=ce_cfg.get("onnx_dir", "models/onnx"),
+    )
+
+def build_cascade_reranker(casc_cfg: Dict[str, Any]) -> CrossEncoderReranker:
+    """CE cascade 1차(저비용) 점수기: 작은 cross-encoder 를 본 CE 와 같은 래퍼로 로드."""
+    return CrossEncoderReranker(
+        model_name=casc_cfg["model_name"],
+        device=casc_cfg.get("device"),
+        batch_size=casc_cfg.get("batch_size", 64),
+        use_sigmoid=casc_cfg.get("use_sigmoid", True),
+        backend=casc_cfg.get("backend", "torch"),
+        threads=int(casc_cfg.get("threads", 0) or 0),
+        onnx_dir=casc_cfg.get("onnx_dir", "models/onnx"),
+    )
+
+def _fuse_ce(hyb_norm: List[float], ce_scores: List[float], alpha: float) -> List[float]:
+    return [alpha * h + (1 - alpha) * c for h, c in zip(hyb_norm, minmax_norm(ce_scores))]
 
 def retrieve_with_keywords(
     query: str,
@@ -24,23 +88,63 @@ def retrieve_with_keywords(
     embedding_model,  # 이미 build_index에 사용한 동일 모델 인스턴스 or 동일 설정으로 생성
     topk: int = 10,
     show_progress: bool = True,
+    vectorstore: FAISS | None = None,
+    bm25_retriever: BM25Retriever | None = None,
+    reranker: CrossEncoderReranker | None = None,
+    cascade_reranker: CrossEncoderReranker | None = None,
+    shard_router: ShardRouter | None = None,
+    partitions: ScatterGatherClient | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    time_router: ShardRouter | None = None,
+    deadline_ms: float | None = None,
+    semantic_cache: SemanticResultCache | None = None,
+    index_build: str | None = None,
+    compact: CompactIndex | None = None,
 ) -> Tuple[List[Document], Dict[str, Any]]:
+    """
+    BM25+FAISS -> RRF -> 하이브리드 -> (CE) -> (MMR) 검색.
+    vectorstore / bm25_retriever / reranker / shard_router 를 넘기면 매 호출마다 로드하지 않고 재사용한다
+    (상주 서비스에서 워밍된 리소스를 주입하는 용도).
+    shards.enable 이고 질의에 기업이 있으면 해당 기업 shard + general shard 만 검색하고,
+    결과가 shards.min_pool 보다 적으면 전체 인덱스로 fallback 한다.
+    partitions 가 주어지면 전체 인덱스 검색을 파티션 워커들에 scatter-gather 로 맡긴다.
+    since / until("YYYY", "YYYY-MM", "YYYY-MM-DD") 를 주면 게시일이 구간 안인 청크만 남기며,
+    시간 파티션({index_name}_time/)이 있으면 구간과 겹치는 파티션만 검색한다.
+    deadline_ms 를 주면 단계별 경과 시간을 재며 예산이 모자랄 때 풀 크기 축소 → take_top_n 축소/CE 생략
+    → MMR 후보 축소/생략 순으로 품질을 낮추고, 적용 내역을 dbg["deadline"] 에 남긴다(미지정 시 전체 품질).
+    ce.cascade.enable 이면 작은 CE(cascade_reranker)가 take_top_n 을 먼저 거르고 본 CE 는 keep_n 개만 점수화한다.
+    semantic_cache 를 주면 (index_build, 기업 코드, 구간, topk, 선택 키워드, 질의의 숫자·기간·지표 용어) 가 같고
+    질의 임베딩이 threshold 이상 가까운
+    이전 결과를 그대로 돌려주고(retrieval.semantic_cache.rerank 면 저장 벡터로 재정렬만), 미스면 끝까지 검색해 저장한다.
+    compact.enable 이고 게시본에 compact/ 가 있으면(또는 compact 를 넘기면) 전체 인덱스 1단계 FAISS 검색을
+    압축 코드 검색 + mmap 전체 벡터 재점수로 대신하고, hybrid_pre 문서 벡터도 거기서 읽는다.
+    """
     paths = config["paths"]
     retrieval = config["retrieval"]
     kw_cfg = retrieval["keywords"]
     ce_cfg = retrieval["ce"]
 
+    shards_cfg = config.get("shards", {}) or {}
+    time_cfg = config.get("time_partitions", {}) or {}
+    since, until = normalize_window(since, until)
+    windowed = bool(since or until)
+    include_undated = bool(time_cfg.get("include_undated", False))
+
     indexes_dir = paths["indexes_dir"]
     keyword_dir = paths["keyword_dir"]
+    # 게시 포인터는 한 번만 읽는다 — 직접 여는 전체 인덱스·shard·시간 파티션·compact 가 모두 같은 build 여야
+    # doc_id 가 맞는다 (중간에 새 버전이 게시돼도 섞이지 않게; 상주 엔진은 IndexSnapshot 의 build 를 넘긴다)
+    build_id = index_build if index_build is not None else current_build(indexes_dir)
+    budget = Deadline(deadline_ms, config.get("deadline", {}) or {})
+    dl_cfg = budget.cfg
+    # 리소스를 주입받지 않은 호출(CLI 등)만 게시본의 compact/ 를 직접 연다
+    cpt = compact if compact is not None or vectorstore is not None or partitions is not None else open_compact(config, build_id)
 
-    # 1) 인덱스 로드
-    vs_all = FAISS.load_local(
-        os.path.join(indexes_dir, "all"),
-        embedding_model,
-        allow_dangerous_deserialization=True
-    )
+    def _doc_vectors(vs, ids: np.ndarray) -> np.ndarray | None:
+        return cpt.vectors(ids) if cpt is not None else stored_vectors(vs, ids)
 
-    # 2) 회사/코드 + 키워드
+    # 1) 회사/코드 + 키워드
     q_name, q_code = extract_company_from_query(query)
     company_keywords = load_company_keywords(keyword_dir, q_name)
     kw_hard, kw_soft = select_keywords_for_query(
@@ -50,100 +154,177 @@ def retrieve_with_keywords(
     )
     aliases = [x for x in {q_name, q_code} if x]
 
-    # 3) 듀얼 리트리벌: BM25(하드 확장), FAISS(소프트 확장)
+    # 1-1) 의미 캐시: 같은 범위에서 거의 같은 질의의 최종 결과 재사용 (원문 질의 벡터는 hybrid_pre 에서도 쓴다)
+    sem_scope = None
+    query_vec = None
+    if semantic_cache is not None:
+        query_vec = embedding_model.embed_query(query)
+        sem_scope = (
+            build_id, q_code or "", since or "", until or "", topk,
+            keyword_facet(kw_hard, kw_soft), query_facets(query),
+        )
+        cached = semantic_cache.lookup(sem_scope, query_vec)
+        if cached is not None:
+            cached_docs, cached_ids, dbg = cached
+            if (retrieval.get("semantic_cache", {}) or {}).get("rerank", False):
+                cached_docs = rerank_by_similarity(query_vec, cached_docs, _doc_vectors(vectorstore, cached_ids))
+            dbg["semantic_cache"].update(semantic_cache.cache_stats())
+            dbg["deadline"] = budget.report()
+            cache_stats = getattr(embedding_model, "cache_stats", None)
+            if cache_stats is not None:
+                dbg["embed_cache"] = cache_stats()
+            return cached_docs, dbg
+
+    # 2) 듀얼 리트리벌 질의: BM25(하드 확장), FAISS(소프트 확장)
     bm25_query = query + (" " + " ".join(aliases) if aliases else "") + (" " + " ".join(kw_hard) if kw_hard else "")
     faiss_query = query + (f" (중점:{', '.join(kw_soft)})" if kw_soft else "")
 
-    faiss_ret = vs_all.as_retriever(search_kwargs={"k": retrieval["pool_k_faiss"]})
-    # BM25는 vs_all 내부 docstore를 그대로 활용
-    bm25_ret = BM25Retriever.from_documents(vs_all.docstore._dict.values())
-    bm25_ret.k = retrieval["pool_k_bm25"]
+    # 지연 예산: hybrid_pre 임베딩 비용이 풀 크기에 비례하므로 남은 예산에 맞춰 풀을 줄인다
+    k_faiss, k_bm25 = retrieval["pool_k_faiss"], retrieval["pool_k_bm25"]
+    k_report, k_other = retrieval["pool_k_report"], retrieval["pool_k_other"]
+    if budget.enabled:
+        expected = min(k_faiss + k_bm25, k_report + k_other)
+        reserve = (
+            budget.estimate_ms("search", 1)
+            + budget.estimate_ms("ce", max(int(dl_cfg.get("min_ce_n", 20)), topk))
+            + budget.estimate_ms("mmr", topk * topk * 2 * topk)
+        )
+        afford = budget.affordable_units("hybrid", budget.remaining_ms() - reserve)
+        if afford < expected:
+            scale = afford / expected
+            min_pool = int(dl_cfg.get("min_pool", 50))
 
-    faiss_pool = faiss_ret.get_relevant_documents(faiss_query)
-    bm25_pool = bm25_ret.get_relevant_documents(bm25_query)
-    pooled = dedup_docs(faiss_pool + bm25_pool)
-    if not pooled:
-        return [], {"note": "no pooled", "company": q_name, "code": q_code}
+            def _shrink(k: int) -> int:
+                return max(min(k, min_pool), int(k * scale))
 
-    # 4) 타입 분리 + 엔티티 필터(리포트 강/기타 약)
-    reports_pooled = [d for d in pooled if (d.metadata or {}).get("type") == "report"]
-    others_pooled  = [d for d in pooled if (d.metadata or {}).get("type") != "report"]
-
-    report_filtered: List[Document] = []
-    if q_name or q_code:
-        for d in reports_pooled:
-            ok, s = contains_by_name_or_code(d, q_name, q_code)
-            if ok:
-                d.metadata["match_strength"] = s
-                report_filtered.append(d)
-    else:
-        report_filtered = reports_pooled
-        for d in report_filtered:
-            d.metadata["match_strength"] = 0
-
-    if len(report_filtered) < retrieval["min_needed_report"] and (q_name or q_code):
-        if q_name:
-            name_relaxed = [d for d in reports_pooled if (d.metadata or {}).get("company") == q_name]
-            for d in name_relaxed:
-                d.metadata["match_strength"] = max(d.metadata.get("match_strength", 0), 1)
-            report_filtered = dedup_docs(report_filtered + name_relaxed)
-        if len(report_filtered) < retrieval["min_needed_report"]:
-            for d in reports_pooled:
-                d.metadata["match_strength"] = max(d.metadata.get("match_strength", 0), 0)
-            report_filtered = dedup_docs(report_filtered + reports_pooled)
-
-    report_candidates = report_filtered[:retrieval["pool_k_report"]]
-
-    other_candidates: List[Document] = []
-    if (q_name or q_code):
-        strict: List[Document] = []
-        for d in others_pooled:
-            meta = d.metadata or {}
-            d_name = (meta.get("company") or "").strip()
-            d_code = (meta.get("company_code") or "").strip()
-            meta_strength = 2 if (q_code and d_code == q_code) else (1 if (q_name and d_name == q_name) else 0)
-            ok, text_strength = text_contains_company(d.page_content, q_name, q_code)
-            strength = max(meta_strength, text_strength)
-            if strength > 0:
-                d.metadata["match_strength"] = strength
-                strict.append(d)
-        other_candidates = strict
-        if len(other_candidates) < retrieval["min_needed_other"] and q_name:
-            relax: List[Document] = []
-            for d in others_pooled:
-                ok, s = text_contains_company(d.page_content, q_name, None)
-                if ok:
-                    d.metadata["match_strength"] = max(d.metadata.get("match_strength", 0), max(1, s))
-                    relax.append(d)
-            other_candidates = dedup_docs(other_candidates + relax)
-        if len(other_candidates) < retrieval["min_needed_other"]:
-            for d in others_pooled:
-                d.metadata["match_strength"] = max(d.metadata.get("match_strength", 0), 0)
-            other_candidates = dedup_docs(other_candidates + others_pooled)
-    else:
-        other_candidates = others_pooled
-        for d in other_candidates:
-            d.metadata["match_strength"] = 0
+            k_faiss, k_bm25, k_report, k_other = _shrink(k_faiss), _shrink(k_bm25), _shrink(k_report), _shrink(k_other)
+            budget.degrade(f"pool_k:{retrieval['pool_k_faiss']}->{k_faiss}")
+
+    # 1단계 FAISS / BM25 는 서로 독립이므로 동시에 실행 (질의 임베딩이 BM25 점수 계산과 겹친다)
+    fs_cfg = retrieval.get("first_stage", {}) or {}
+    fs_timeout = float(fs_cfg.get("timeout_ms", 0) or 0) or None
+    fs_ms: Dict[str, float] = {}
+    fs_queue_ms: Dict[str, float] = {}
+    fs_timeouts: List[str] = []
 
-    other_candidates = other_candidates[:retrieval["pool_k_other"]]
+    def _search_both(scope: str, faiss_fn, bm25_fn) -> Tuple[List[Document], List[Document]]:
+        res, timings, timed_out, waits = run_branches(
+            {"faiss": faiss_fn, "bm25": bm25_fn},
+            concurrent=fs_cfg.get("concurrent", True),
+            workers=int(fs_cfg.get("workers", 4)),
+            timeout_ms=fs_timeout,
+        )
+        fs_ms.update({f"{scope}:{name}": ms for name, ms in timings.items()})
+        fs_queue_ms.update({f"{scope}:{name}": ms for name, ms in waits.items()})
+        for name in timed_out:
+            fs_timeouts.append(f"{scope}:{name}")
+            budget.degrade(f"{scope}:{name}")
+        return res["faiss"], res["bm25"]
+
+    # 3) 검색 범위 결정: 시간 파티션(since/until) → 기업 shard → 전체 인덱스
+    routed: List[str] = []
+    periods: List[str] | None = None
+    n_routed = 0
+    vs_all: FAISS | None = None
+    failed_partitions: List[str] = []
+    faiss_pool: List[Document] = []
+    bm25_pool: List[Document] = []
+    if windowed and time_cfg.get("enable", False):
+        t_router = time_router if time_router is not None else ShardRouter.open_dir(time_dir_for(indexes_dir, build_id=build_id), embedding_model)
+        if t_router is not None:
+            periods = t_router.route_window(since, until, include_undated)
+            if periods:
+                faiss_pool, bm25_pool = _search_both(
+                    "time",
+                    lambda: t_router.search_faiss(faiss_query, periods, k_faiss),
+                    lambda: t_router.search_bm25(bm25_query, periods, k_bm25),
+                )
+    elif shards_cfg.get("enable", False):
+        router = shard_router if shard_router is not None else ShardRouter.open_dir(
+            shards_dir_for(indexes_dir, build_id=build_id), embedding_model,
+        )
+        routed = router.route(q_name, q_code) if router is not None else []
+        if routed:
+            faiss_pool, bm25_pool = _search_both(
+                "shard",
+                lambda: router.search_faiss(faiss_query, routed, k_faiss),
+                lambda: router.search_bm25(bm25_query, routed, k_bm25),
+            )
+            n_routed = len(first_occurrence(doc_ids(faiss_pool + bm25_pool)))
+    shard_fallback = bool(routed) and n_routed < shards_cfg.get("min_pool", 20)
+    use_full = periods is None and (not routed or shard_fallback)
+
+    if use_full and partitions is not None:
+        # 파티션 워커가 FAISS·BM25 를 한 요청에서 함께 처리하고 coordinator 가 워커들에 동시에 뿌린다
+        # (일부 워커가 실패하면 남은 파티션 결과로 진행하고 dbg first_stage.failed_partitions 에 남긴다)
+        t0 = time.perf_counter()
+        faiss_pool, bm25_pool, failed_partitions = partitions.search(
+            faiss_query, bm25_query, k_faiss, k_bm25,
+        )
+        fs_ms["all:partitions"] = round((time.perf_counter() - t0) * 1000.0, 2)
+    elif use_full:
+        vs_all = vectorstore if vectorstore is not None else load_vectorstore(indexes_dir, embedding_model, build_id=build_id)
+        faiss_ret = vs_all.as_retriever(search_kwargs={"k": k_faiss})
+        # BM25는 vs_all 내부 docstore를 그대로 활용 (k 는 공유 retriever 에 쓰지 않고 질의별로 넘긴다)
+        bm25_ret = bm25_retriever if bm25_retriever is not None else build_bm25_retriever(vs_all)
+
+        if cpt is not None:
+            # 압축 코드로 k × oversample 후보 → 전체 정밀 벡터(mmap)로 재점수 (FAISS 전체 스캔 대신)
+            def faiss_search() -> List[Document]:
+                return cpt.search_documents(vs_all, embedding_model.embed_query(faiss_query), k_faiss)
+        else:
+            def faiss_search() -> List[Document]:
+                return faiss_ret.get_relevant_documents(faiss_query)
+
+        faiss_pool, bm25_pool = _search_both(
+            "all",
+            faiss_search,
+            lambda: bm25_top_k(bm25_ret, bm25_query, k_bm25),
+        )
+
+    budget.lap("search", 1)
+
+    if windowed:
+        def _keep(d: Document) -> bool:
+            dates = doc_dates(d.metadata or {})
+            return any(in_window(date, since, until) for date in dates) or (include_undated and not dates)
+
+        faiss_pool = [d for d in faiss_pool if _keep(d)]
+        bm25_pool = [d for d in bm25_pool if _keep(d)]
+    # 후보는 build 시 부여한 정수 doc_id 배열로 다룬다 (Document 는 읽기 전용, 최종 결과만 새로 만든다)
+    intern: Dict[Tuple[str, str], int] = {}
+    faiss_ids = doc_ids(faiss_pool, intern)
+    bm25_ids = doc_ids(bm25_pool, intern)
+    all_docs, all_ids = faiss_pool + bm25_pool, np.concatenate([faiss_ids, bm25_ids])
+    uniq = first_occurrence(all_ids)
+    if not len(uniq):
+        return [], {"note": "no pooled", "company": q_name, "code": q_code}
+    pooled = [all_docs[i] for i in uniq]
+    pooled_ids = all_ids[uniq]
 
-    merged = dedup_docs(report_candidates + other_candidates)
-    if not merged:
+    # 4) 타입 분리 + 엔티티 필터(리포트 강/기타 약) → 선택 위치와 질의별 match_strength
+    order, match_strength = select_company_candidates(
+        pooled, q_name, q_code,
+        k_report=k_report,
+        k_other=k_other,
+        min_needed_report=retrieval["min_needed_report"],
+        min_needed_other=retrieval["min_needed_other"],
+    )
+    if not len(order):
         return [], {"note": "no merged", "company": q_name, "code": q_code}
+    merged = [pooled[i] for i in order]
+    merged_ids = pooled_ids[order]
 
-    # 5) RRF
-    faiss_rank = { _doc_key(d): i for i, d in enumerate(faiss_pool) }
-    bm25_rank  = { _doc_key(d): i for i, d in enumerate(bm25_pool)  }
-    ranks_by_source = {
-        "faiss": { _doc_key(d): faiss_rank.get(_doc_key(d), 10**9) for d in merged if _doc_key(d) in faiss_rank },
-        "bm25" : { _doc_key(d): bm25_rank.get(_doc_key(d), 10**9)  for d in merged if _doc_key(d) in bm25_rank  },
-    }
-    rrf_scores = rrf_fusion(ranks_by_source, k_const=retrieval["rrf_k_const"])
-    rrf_sorted = sorted([(i, rrf_scores.get(_doc_key(d), 0.0)) for i, d in enumerate(merged)],
-                        key=lambda x: x[1], reverse=True)
+    # 5) RRF (검색 결과 순위 배열에서 id 로 조회)
+    rrf = rrf_scores(merged_ids, [faiss_ids, bm25_ids], k_const=retrieval["rrf_k_const"])
+    rrf_order = np.argsort(-rrf, kind="stable")
+
+    budget.lap("filter")
 
     # 6) 사전 하이브리드 (임베딩 + 엔티티 + 키워드 보너스)
     picked_for_bonus = kw_hard or kw_soft
+    #    문서 벡터는 인덱스에 저장된 것을 id 로 꺼내고(재임베딩 없음), 못 꺼내면 임베딩한다
+    vec_source = vectorstore if vectorstore is not None else vs_all
     hybrid_pre = build_hybrid_pre(
         query=query,
         docs=merged,
@@ -152,25 +333,55 @@ def retrieve_with_keywords(
         kw_picked=picked_for_bonus,
         alpha_kw=kw_cfg.get("alpha_kw", 0.08),
         cap_per_kw=kw_cfg.get("cap_per_kw", 1),
+        match_strength=match_strength,
+        doc_vectors=_doc_vectors(vec_source, merged_ids),
+        query_vector=query_vec,
     )
+    budget.lap("hybrid", len(merged))
 
     # 7) CE 리랭크 (상위 N)
     ce_enabled = ce_cfg.get("enable", True)
     ce_alpha = ce_cfg.get("alpha", 0.7)
+    ce_pairs = 0
+    cascade_info = None
+    casc_cfg = ce_cfg.get("cascade", {}) or {}
+    keep_n = max(int(casc_cfg.get("keep_n", 30)), topk)
+    take_top_n = min(ce_cfg.get("take_top_n", 150), len(merged))
 
-    if ce_enabled:
-        take_top_n = min(ce_cfg.get("take_top_n", 150), len(rrf_sorted))
-        top_indices = [i for i, _ in rrf_sorted[:take_top_n]]
+    # 지연 예산: MMR 최소 몫을 남기고 CE 에 쓸 수 있는 만큼만 후보를 넘긴다(너무 적으면 CE 생략)
+    ce_run = ce_enabled
+    if ce_enabled and budget.enabled:
+        ce_budget = budget.remaining_ms() - budget.estimate_ms("mmr", topk * topk * 2 * topk)
 
-        ce = CrossEncoderReranker(
-            model_name=ce_cfg["model_name"],
-            device=ce_cfg["device"],
-            batch_size=ce_cfg["batch_size"],
-            use_sigmoid=ce_cfg["use_sigmoid"],
-        )
+        def _ce_cost(n: int) -> float:
+            if casc_cfg.get("enable", False) and n > keep_n:
+                return budget.estimate_ms("cascade", n) + budget.estimate_ms("ce", keep_n)
+            return budget.estimate_ms("ce", n)
+
+        if _ce_cost(take_top_n) > ce_budget:
+            lo, hi = 0, take_top_n
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if _ce_cost(mid) <= ce_budget:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            if lo < max(int(dl_cfg.get("min_ce_n", 20)), topk):
+                ce_run = False
+                budget.degrade("ce_skipped")
+            else:
+                budget.degrade(f"take_top_n:{take_top_n}->{lo}")
+                take_top_n = lo
+
+    if ce_run:
+        top_indices = rrf_order[:take_top_n].tolist()
+
+        ce = reranker if reranker is not None else build_reranker(ce_cfg)
 
         pairs = []
         ce_hint = ", ".join(kw_soft[:3]) if kw_soft else ""
+        if show_progress:
+            from tqdm import tqdm
         loop = top_indices if not show_progress else tqdm(top_indices, desc="[rerank] CE scoring", unit="doc")
         for i in loop:
             txt = anchor_trim(merged[i].page_content, aliases, kw_soft, max_chars=1800)
@@ -180,28 +391,57 @@ def retrieve_with_keywords(
                 f"질의: {query}"
             )
             pairs.append((qtext, txt))
+        budget.lap("ce_prep")
 
-        ce_scores = ce.predict(pairs)
+        # 7-1) (옵션) cascade: 작은 CE 로 take_top_n 전체를 먼저 점수화하고 상위 keep_n 만 본 CE 로 넘긴다
+        #      hybrid 정규화는 take_top_n 기준을 유지해 전체 CE 와 같은 척도로 융합한다
         hyb_norm = minmax_norm([hybrid_pre[i] for i in top_indices])
-        ce_norm  = minmax_norm(ce_scores)
-        fused    = [ce_alpha * h + (1 - ce_alpha) * c for h, c in zip(hyb_norm, ce_norm)]
-        fused_order = sorted(list(zip(top_indices, fused)), key=lambda x: x[1], reverse=True)
+        if casc_cfg.get("enable", False) and len(top_indices) > keep_n:
+            cheap = cascade_reranker if cascade_reranker is not None else build_cascade_reranker(casc_cfg)
+            first = _fuse_ce(hyb_norm, cheap.predict(pairs), ce_alpha)
+            kept = sorted(range(len(top_indices)), key=lambda j: first[j], reverse=True)[:keep_n]
+            cascade_info = {"first_pass": len(top_indices), "kept": len(kept)}
+            top_indices = [top_indices[j] for j in kept]
+            pairs = [pairs[j] for j in kept]
+            hyb_norm = [hyb_norm[j] for j in kept]
+            budget.lap("cascade", cascade_info["first_pass"])
 
-        ordered_docs   = [merged[i] for i, _ in fused_order]
-        ordered_scores = [s for _, s in fused_order]
+        ce_scores = ce.predict(pairs)
+        ce_pairs = len(pairs)
+        budget.lap("ce", ce_pairs)
+        fused = np.asarray(_fuse_ce(hyb_norm, ce_scores, ce_alpha))
+        perm = np.argsort(-fused, kind="stable")
+        ranked = np.asarray(top_indices, dtype=np.int64)[perm]
+        ordered_scores = fused[perm].tolist()
     else:
-        # CE 비활성화 시 hybrid_pre 점수를 그대로 사용하여 랭킹 구성
-        hyb_norm_all = minmax_norm(hybrid_pre)
-        fused_order = sorted([(i, hyb_norm_all[i]) for i in range(len(merged))], key=lambda x: x[1], reverse=True)
-        ordered_docs   = [merged[i] for i, _ in fused_order]
-        ordered_scores = [score for _, score in fused_order]
-
-    # 8) (옵션) MMR
-    if ce_cfg.get("apply_mmr_after", True):
-        final_idx = mmr_by_text(ordered_docs, ordered_scores, k=topk, lambda_mult=ce_cfg.get("mmr_lambda", 0.5))
-        final_docs = [ordered_docs[i] for i in final_idx]
+        # CE 비활성화(또는 지연 예산으로 생략) 시 hybrid_pre 점수를 그대로 사용하여 랭킹 구성
+        hyb_norm_all = np.asarray(minmax_norm(hybrid_pre))
+        ranked = np.argsort(-hyb_norm_all, kind="stable")
+        ordered_scores = hyb_norm_all[ranked].tolist()
+    ordered_docs = [merged[i] for i in ranked]
+
+    # 8) (옵션) MMR — 지연 예산이 모자라면 상위 후보만으로 MMR, 그마저 어려우면 생략(점수 순 top-k)
+    apply_mmr = ce_cfg.get("apply_mmr_after", True)
+    mmr_n = len(ordered_docs)
+    if apply_mmr and budget.enabled:
+        afford_n = budget.affordable_units("mmr", budget.remaining_ms()) // max(1, topk * topk)
+        if afford_n < mmr_n:
+            if afford_n < max(int(dl_cfg.get("mmr_min_n", 2 * topk)), topk):
+                apply_mmr = False
+                budget.degrade("mmr_skipped")
+            else:
+                budget.degrade(f"mmr_candidates:{mmr_n}->{afford_n}")
+                mmr_n = afford_n
+    if apply_mmr:
+        final_idx = mmr_by_text(
+            ordered_docs[:mmr_n], ordered_scores[:mmr_n], k=topk, lambda_mult=ce_cfg.get("mmr_lambda", 0.5),
+        )
+        final_pos = ranked[final_idx]
+        budget.lap("mmr", topk * topk * mmr_n)
     else:
-        final_docs = ordered_docs[:topk]
+        final_pos = ranked[:topk]
+    final_docs = materialize([merged[i] for i in final_pos], match_strength[final_pos])
+    final_ids = merged_ids[final_pos]
 
     dbg = {
         "company": q_name, "code": q_code,
@@ -210,5 +450,21 @@ def retrieve_with_keywords(
         "rrf_topN": len(ordered_docs),
         "alpha_kw": kw_cfg.get("alpha_kw", 0.08), "ce_alpha": ce_alpha,
         "ce_enabled": ce_enabled,
+        "ce_run": ce_run,  # 설정상 켜져 있어도 지연 예산으로 생략했으면 False (budget 의 ce_skipped)
+        "ce_pairs": ce_pairs, "cascade": cascade_info,
+        "shards": periods if periods is not None else (["all"] if use_full else routed),
+        "shard_fallback": shard_fallback,
+        "window": [since, until] if windowed else None,
+        "first_stage": {"ms": fs_ms, "queue_ms": fs_queue_ms, "timeouts": fs_timeouts, "failed_partitions": failed_partitions},
+        "compact": cpt.codes_type if cpt is not None and use_full and partitions is None else None,
+        "deadline": budget.report(),
     }
+    cache_stats = getattr(embedding_model, "cache_stats", None)
+    if cache_stats is not None:
+        dbg["embed_cache"] = cache_stats()
+    if sem_scope is not None:
+        # 지연 예산으로 품질을 낮춘 결과나 일부 파티션만으로 만든 결과는 다른 질의에 재사용하지 않는다
+        if final_docs and not (budget.enabled and budget.degraded) and not failed_partitions:
+            semantic_cache.store(sem_scope, query, query_vec, final_ids, final_docs, dbg)
+        dbg["semantic_cache"] = {"hit": False, **semantic_cache.cache_stats()}
     return final_docs, dbg
@@ -1,8 +1,9 @@
 from __future__ import annotations
+import contextlib
 import math
 from typing import List, Sequence, Tuple
-from sentence_transformers import CrossEncoder
-import torch
+
+from rag_finance.inference.onnx_backend import DEFAULT_ONNX_DIR, check_backend, load_onnx_cross_encoder, set_torch_threads
 
 def _sigmoid(x: float) -> float:
     try:
@@ -26,13 +27,37 @@ def anchor_trim(text: str, aliases: Sequence[str], keywords: Sequence[str], max_
     return text[start:end]
 
 class CrossEncoderReranker:
-    def __init__(self, model_name="BAAI/bge-reranker-v2-m3", device: str | None = None, batch_size: int = 32, use_sigmoid: bool = True):
-        self.model = CrossEncoder(model_name, device=device or ("cuda" if torch.cuda.is_available() else "cpu"))
+    """
+    backend: torch(sentence-transformers) | onnx | onnx-int8 (CPU ONNX Runtime).
+    ONNX 백엔드는 torch 를 import 하지 않는다.
+    """
+
+    def __init__(
+        self,
+        model_name="BAAI/bge-reranker-v2-m3",
+        device: str | None = None,
+        batch_size: int = 32,
+        use_sigmoid: bool = True,
+        backend: str = "torch",
+        threads: int = 0,
+        onnx_dir: str = DEFAULT_ONNX_DIR,
+    ):
+        self.backend = check_backend(backend)
+        if self.backend == "torch":
+            import torch
+            from sentence_transformers import CrossEncoder
+
+            set_torch_threads(threads)
+            self.model = CrossEncoder(model_name, device=device or ("cuda" if torch.cuda.is_available() else "cpu"))
+            self._no_grad = torch.inference_mode
+        else:
+            self.model = load_onnx_cross_encoder(model_name, self.backend, onnx_dir, threads=threads, batch_size=batch_size)
+            self._no_grad = contextlib.nullcontext
         self.batch_size = batch_size
         self.use_sigmoid = use_sigmoid
 
     def predict(self, pairs: List[Tuple[str, str]]) -> List[float]:
-        with torch.inference_mode():
+        with self._no_grad():
             scores = self.model.predict(pairs, batch_size=self.batch_size, convert_to_numpy=True)
         scores = scores.tolist() if hasattr(scores, "tolist") else list(scores)
         if self.use_sigmoid:
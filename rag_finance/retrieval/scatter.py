@@ -0,0 +1,374 @@
+from __future__ import annotations
+import heapq
+import ipaddress
+import json
+import multiprocessing as mp
+import os
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from rag_finance.indexing.partitions import PARTITION_MANIFEST
+from rag_finance.indexing.shards import BM25_STATS
+from rag_finance.retrieval.shards import _merge_scored
+from rag_finance.utils.io_utils import read_json
+
+if TYPE_CHECKING:
+    from langchain.retrievers import BM25Retriever
+    from langchain_community.vectorstores import FAISS
+
+Address = Tuple[str, int]
+Hit = Tuple[float, str, Dict[str, Any]]
+
+DEFAULT_AUTHKEY_ENV = "RAG_FINANCE_PARTITION_KEY"
+MAX_REQUEST_BYTES = 4 << 20  # 워커가 받는 요청 상한 (질의 벡터 + 인자면 수십 KB)
+
+
+def parse_address(addr: str) -> Address:
+    host, _, port = addr.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+def resolve_authkey(part_cfg: Dict[str, Any]) -> bytes:
+    """
+    원격 파티션 워커 공유 키: authkey_file(앞뒤 공백 제거) → 환경변수 authkey_env 순.
+    저장소에 기본 키를 두지 않는다 — 없으면 빈 값(로컬 loopback 워커만 허용).
+    """
+    path = str(part_cfg.get("authkey_file", "") or "")
+    if path:
+        with open(path, "rb") as f:
+            key = f.read().strip()
+        if key:
+            return key
+    return os.environ.get(str(part_cfg.get("authkey_env", DEFAULT_AUTHKEY_ENV) or DEFAULT_AUTHKEY_ENV), "").encode("utf-8")
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # 호스트 이름은 어느 인터페이스로 풀릴지 모르므로 외부로 취급
+
+
+def _json_default(obj: Any) -> Any:
+    if hasattr(obj, "item"):  # numpy 스칼라
+        return obj.item()
+    return str(obj)
+
+
+def _send(conn, obj: Any) -> None:
+    """pickle 대신 JSON 프레임 (multiprocessing.connection 의 send()/recv() 는 받은 값을 unpickle 한다)."""
+    conn.send_bytes(json.dumps(obj, ensure_ascii=False, default=_json_default).encode("utf-8"))
+
+
+def _recv(conn, maxlength: Optional[int] = None) -> Any:
+    return json.loads(conn.recv_bytes(maxlength).decode("utf-8"))
+
+
+def _set_nodelay(conn) -> None:
+    """
+    multiprocessing.connection 은 큰 메시지를 헤더/본문 두 번에 나눠 쓰므로
+    Nagle + delayed ACK 로 수십 ms 가 붙는다 → TCP_NODELAY.
+    """
+    sock = socket.fromfd(conn.fileno(), socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    finally:
+        sock.close()
+
+
+class VectorOnlyEmbeddings(Embeddings):
+    """
+    벡터를 미리 받는 FAISS 용 자리표시자: 파티션 워커(질의 벡터는 coordinator 가 한 번만 계산해 보낸다)와
+    build 의 인덱스 저장(문서 벡터는 임베딩 단계에서 계산)에서 모델을 띄우지 않으려고 쓴다.
+    """
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        raise RuntimeError("vectors are precomputed here; embed with the real model upstream")
+
+    def embed_query(self, text: str) -> List[float]:
+        raise RuntimeError("vectors are precomputed here; embed with the real model upstream")
+
+
+class PartitionSearcher:
+    """
+    파티션 하나의 FAISS + BM25 top-k (워커 프로세스 안에서 사용).
+    parts/bm25_stats.json 이 있으면 전체 코퍼스 IDF·avgdl 로 점수화해 파티션 간 점수를 그대로 비교할 수 있다
+    (bm25_global). 없는 예전 build 는 파티션별 IDF 라 coordinator 가 순위로 병합한다.
+    """
+
+    def __init__(self, part_dir: str) -> None:
+        self.part_dir = part_dir
+        self.vs: Optional[FAISS] = None
+        self.bm25: Optional[BM25Retriever] = None
+        self.bm25_global = False
+        if os.path.isdir(part_dir):
+            from langchain.retrievers import BM25Retriever
+            from langchain_community.vectorstores import FAISS
+
+            self.vs = FAISS.load_local(part_dir, VectorOnlyEmbeddings(), allow_dangerous_deserialization=True)
+            self.bm25 = BM25Retriever.from_documents(self.vs.docstore._dict.values())
+            stats_path = os.path.join(os.path.dirname(os.path.normpath(part_dir)), BM25_STATS)
+            if os.path.isfile(stats_path):
+                stats = read_json(stats_path)
+                self.bm25.vectorizer.idf = stats["idf"]
+                self.bm25.vectorizer.avgdl = float(stats["avgdl"])
+                self.bm25_global = True
+
+    def search(self, vector: Sequence[float], bm25_query: str, k_faiss: int, k_bm25: int) -> Dict[str, List[Hit]]:
+        if self.vs is None:
+            return {"faiss": [], "bm25": [], "bm25_global": True}  # 빈 파티션은 병합 방식에 영향 없음
+        faiss_hits = [
+            (float(dist), doc.page_content, doc.metadata)
+            for doc, dist in self.vs.similarity_search_with_score_by_vector(list(vector), k=k_faiss)
+        ]
+        scores = self.bm25.vectorizer.get_scores(self.bm25.preprocess_func(bm25_query))
+        top = heapq.nlargest(k_bm25, range(len(scores)), key=scores.__getitem__)
+        bm25_hits = [(float(scores[i]), self.bm25.docs[i].page_content, self.bm25.docs[i].metadata) for i in top]
+        return {"faiss": faiss_hits, "bm25": bm25_hits, "bm25_global": self.bm25_global}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"part_dir": self.part_dir, "chunks": self.vs.index.ntotal if self.vs is not None else 0}
+
+
+def _serve_conn(conn, searcher: PartitionSearcher) -> None:
+    _set_nodelay(conn)
+    with conn:
+        while True:
+            try:
+                req = _recv(conn, MAX_REQUEST_BYTES)
+            except (EOFError, OSError, ValueError):
+                return  # 끊김·상한 초과·JSON 아님 → 연결 종료
+            op = req.get("op") if isinstance(req, dict) else None
+            try:
+                if op == "search":
+                    args = req["args"]
+                    resp = {"ok": True, "result": searcher.search(
+                        vector=[float(x) for x in args["vector"]],
+                        bm25_query=str(args["bm25_query"]),
+                        k_faiss=int(args["k_faiss"]),
+                        k_bm25=int(args["k_bm25"]),
+                    )}
+                elif op == "ping":
+                    resp = {"ok": True, "result": searcher.stats()}
+                else:
+                    resp = {"ok": False, "error": f"unknown op: {op}"}
+            except Exception as exc:
+                resp = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+            _send(conn, resp)
+
+
+def serve_partition(part_dir: str, host: str, port: int, authkey: bytes, ready=None, part_id: int = 0) -> None:
+    """
+    파티션 워커 본체. multiprocessing.connection(TCP + authkey HMAC) 위에서 JSON 프레임으로 요청을 받는다.
+    연결마다 스레드 하나(FAISS 검색은 GIL 을 놓는다). ready 큐가 있으면 (part_id, 주소)를 알린다.
+    키 없이 loopback 이 아닌 주소에 바인드하는 것은 거부한다. 원격 종료 명령은 없다(프로세스 신호로 종료).
+    """
+    if not authkey and not is_loopback(host):
+        raise ValueError(
+            f"refusing to serve partition on non-loopback address {host!r} without an authkey "
+            f"(set {DEFAULT_AUTHKEY_ENV} or partitions.authkey_file)"
+        )
+    searcher = PartitionSearcher(part_dir)
+    with Listener((host, port), authkey=authkey or None) as listener:
+        if ready is not None:
+            ready.put((part_id, listener.address))
+        else:
+            print(f"[shard-worker] {part_dir} ({searcher.stats()['chunks']} chunks) listening on {listener.address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                continue  # 키가 틀린 연결은 버리고 계속
+            threading.Thread(target=_serve_conn, args=(conn, searcher), daemon=True).start()
+
+
+def spawn_local_workers(
+    parts_dir: str, authkey: bytes, host: str = "127.0.0.1", startup_timeout: float = 600.0,
+) -> Tuple[List[Any], List[Address]]:
+    """
+    parts_dir/manifest.json 의 파티션 수만큼 로컬 워커 프로세스를 띄우고 (프로세스, 주소) 목록 반환.
+    기동 중 워커가 죽거나(잘못된 파티션 디렉터리, OOM 등) startup_timeout 안에 준비되지 않으면
+    띄운 워커를 모두 정리하고 해당 파티션을 밝힌 RuntimeError 를 낸다.
+    """
+    manifest = read_json(os.path.join(parts_dir, PARTITION_MANIFEST))
+    n = int(manifest["n"])
+    ctx = mp.get_context("spawn")
+    ready = ctx.Queue()
+    procs = []
+    for i in range(n):
+        p = ctx.Process(
+            target=serve_partition,
+            args=(os.path.join(parts_dir, str(i)), host, 0, authkey, ready, i),
+            daemon=True,
+            name=f"shard-worker-{i}",
+        )
+        p.start()
+        procs.append(p)
+    addresses: List[Optional[Address]] = [None] * n
+    pending = set(range(n))
+    deadline = time.monotonic() + startup_timeout
+    try:
+        while pending:
+            try:
+                part_id, address = ready.get(timeout=1.0)
+            except queue.Empty:
+                dead = sorted(i for i in pending if procs[i].exitcode is not None)
+                if dead:
+                    i = dead[0]
+                    raise RuntimeError(
+                        f"partition worker {i} ({os.path.join(parts_dir, str(i))}) exited with code "
+                        f"{procs[i].exitcode} during startup"
+                    )
+                if time.monotonic() > deadline:
+                    raise RuntimeError(
+                        f"partition workers {sorted(pending)} in {parts_dir} not ready after {startup_timeout:.0f}s"
+                    )
+                continue
+            addresses[part_id] = tuple(address)
+            pending.discard(part_id)
+    except BaseException:
+        for p in procs:
+            p.terminate()
+        raise
+    return procs, addresses  # type: ignore[return-value]
+
+
+class ScatterGatherClient:
+    """
+    파티션 워커들에 같은 요청을 동시에 보내고(scatter) 부분 결과를 병합(gather)하는 coordinator.
+    - 질의 임베딩은 여기서 한 번만 계산해 벡터로 전송
+    - FAISS 는 거리 오름차순, BM25 는 전체 코퍼스 IDF 점수 내림차순으로 병합
+      (bm25_stats.json 없는 예전 build 의 워커가 하나라도 있으면 파티션 내 순위로 번갈아 병합)
+    - 워커별로 유휴 연결 풀을 두어 동시 질의가 한 연결에 줄 서지 않게 함(워커는 연결당 스레드)
+    - 타임아웃/오류가 난 연결은 버리고 다음 호출 때 새로 연결
+    - search 는 일부 워커가 실패해도 나머지 파티션 결과로 진행하고 실패한 파티션 목록을 함께 돌려준다
+      (모든 워커가 실패하면 예외). ping 은 하나라도 실패하면 예외.
+    """
+
+    def __init__(self, addresses: Sequence[Address], authkey: bytes, embedding_model, timeout: float = 30.0) -> None:
+        if not addresses:
+            raise ValueError("no partition workers")
+        self.addresses = [tuple(a) for a in addresses]
+        self.authkey = authkey
+        self.embedding_model = embedding_model
+        self.timeout = timeout
+        self._idle: List[queue.LifoQueue] = [queue.LifoQueue() for _ in self.addresses]
+        self._pool = ThreadPoolExecutor(max_workers=4 * len(self.addresses), thread_name_prefix="scatter")
+        self.calls = 0
+        self.failures = 0
+
+    def _call(self, i: int, req: Dict[str, Any]) -> Any:
+        try:
+            conn = self._idle[i].get_nowait()
+        except queue.Empty:
+            conn = Client(self.addresses[i], authkey=self.authkey or None)
+            _set_nodelay(conn)
+        try:
+            _send(conn, req)
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"partition worker {self.addresses[i]} timed out after {self.timeout}s")
+            resp = _recv(conn)
+        except BaseException:
+            conn.close()
+            raise
+        self._idle[i].put(conn)
+        if not resp.get("ok"):
+            raise RuntimeError(f"partition worker {self.addresses[i]}: {resp.get('error')}")
+        return resp["result"]
+
+    def _scatter(self, req: Dict[str, Any]) -> List[Any]:
+        futures = [self._pool.submit(self._call, i, req) for i in range(len(self.addresses))]
+        return [f.result() for f in futures]
+
+    def _scatter_partial(self, req: Dict[str, Any]) -> Tuple[List[Any], List[str]]:
+        """응답한 워커의 결과와 실패한 워커("host:port: 오류") 목록. 전부 실패하면 첫 오류를 그대로 낸다."""
+        futures = [self._pool.submit(self._call, i, req) for i in range(len(self.addresses))]
+        results: List[Any] = []
+        failed: List[str] = []
+        first_exc: Optional[BaseException] = None
+        for i, f in enumerate(futures):
+            try:
+                results.append(f.result())
+            except Exception as exc:
+                host, port = self.addresses[i]
+                failed.append(f"{host}:{port}: {type(exc).__name__}: {exc}")
+                first_exc = first_exc or exc
+        if not results and first_exc is not None:
+            raise first_exc
+        if failed:
+            self.failures += len(failed)
+        return results, failed
+
+    def search(
+        self, faiss_query: str, bm25_query: str, k_faiss: int, k_bm25: int,
+    ) -> Tuple[List[Document], List[Document], List[str]]:
+        """반환: (FAISS top-k, BM25 top-k, 실패한 파티션 목록 — 비어 있지 않으면 부분 결과)"""
+        vector = self.embedding_model.embed_query(faiss_query)
+        self.calls += 1
+        parts, failed = self._scatter_partial({
+            "op": "search",
+            "args": {"vector": [float(x) for x in vector], "bm25_query": bm25_query, "k_faiss": k_faiss, "k_bm25": k_bm25},
+        })
+        faiss_scored: List[Tuple[float, int, Document]] = []
+        bm25_scored: List[Tuple[float, int, Document]] = []
+        bm25_global = all(part.get("bm25_global", False) for part in parts)
+        for part in parts:
+            for dist, content, meta in part["faiss"]:
+                faiss_scored.append((dist, len(faiss_scored), Document(page_content=content, metadata=meta)))
+            for rank, (score, content, meta) in enumerate(part["bm25"]):
+                key = -score if bm25_global else float(rank)
+                bm25_scored.append((key, len(bm25_scored), Document(page_content=content, metadata=meta)))
+        return _merge_scored(faiss_scored, k_faiss), _merge_scored(bm25_scored, k_bm25), failed
+
+    def ping(self) -> List[Dict[str, Any]]:
+        return self._scatter({"op": "ping"})
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": len(self.addresses), "calls": self.calls, "partition_failures": self.failures}
+
+    def close(self) -> None:
+        for idle in self._idle:
+            while True:
+                try:
+                    idle.get_nowait().close()
+                except queue.Empty:
+                    break
+        self._pool.shutdown(wait=False)
+
+
+def open_partition_client(config: Dict[str, Any], embedding_model) -> Tuple[Optional[ScatterGatherClient], List[Any]]:
+    """
+    config 의 partitions 섹션으로 coordinator 생성.
+    workers 주소 목록이 있으면 그 워커들(다른 호스트 포함)에 연결하고, 비어 있으면
+    게시된 버전의 parts/ 를 읽는 로컬 워커 프로세스를 띄운다. 반환: (client, 로컬 프로세스 목록)
+    원격 워커는 resolve_authkey 의 공유 키가 필요하고, 로컬 워커는 실행마다 새 임의 키를 쓴다.
+    """
+    part_cfg = config.get("partitions", {}) or {}
+    if not part_cfg.get("enable", False):
+        return None, []
+    from rag_finance.indexing.partitions import partitions_dir_for
+
+    timeout = float(part_cfg.get("timeout_s", 30))
+    workers = [parse_address(a) for a in (part_cfg.get("workers") or [])]
+    procs: List[Any] = []
+    if workers:
+        authkey = resolve_authkey(part_cfg)
+        if not authkey:
+            raise RuntimeError(
+                f"partitions.workers needs a shared authkey (set {DEFAULT_AUTHKEY_ENV} or partitions.authkey_file)"
+            )
+    else:
+        authkey = os.urandom(16)
+        procs, workers = spawn_local_workers(partitions_dir_for(config["paths"]["indexes_dir"]), authkey)
+    return ScatterGatherClient(workers, authkey, embedding_model, timeout=timeout), procs
@@ -0,0 +1,186 @@
+from __future__ import annotations
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+Scope = Tuple[Hashable, ...]
+
+# 임베딩이 가깝더라도 답이 달라지는 질의 요소: 숫자(연도·분기·금액)와 기간·재무 지표 용어
+# (q 접두) 숫자 (단위 | 바로 붙은 q 접미) — "1분기" / "Q1" / "1Q" 모두 분기
+_NUMBER_RE = re.compile(
+    r"((?<![a-z])q\s*)?(\d+(?:[.,]\d+)*)(?:\s*(년도|년|분기|월|일|%|억|조|만)|(q)(?![a-z]))?",
+    re.IGNORECASE,
+)
+_YEAR_UNITS = ("년도", "년")
+_FACET_TERMS = (
+    "상반기", "하반기", "연간", "전년", "작년", "올해", "내년", "전분기",
+    "매출", "영업이익", "순이익", "영업손실", "순손실", "배당", "주가", "시가총액",
+    "per", "pbr", "roe", "eps", "부채", "현금흐름", "수주", "점유율", "가이던스",
+)
+
+
+def _number_facet(m: "re.Match[str]") -> str:
+    """같은 뜻의 표기는 하나로: 2023년·2023년도 → 2023, 1분기·Q1·1Q → q1, 1,000억 → 1000억."""
+    prefix, number, unit = m.group(1), m.group(2).replace(",", ""), m.group(3) or ""
+    if prefix or m.group(4) or unit == "분기":
+        return f"q{number}"
+    if unit in _YEAR_UNITS:
+        return number
+    return number + unit
+
+
+def query_facets(query: str) -> Tuple[str, ...]:
+    """
+    의미 캐시 범위에 넣을 질의 요소 — "삼성전자 2023 실적" / "삼성전자 2024 실적" 처럼
+    임베딩 코사인은 threshold 를 넘어도 결과가 달라야 하는 질의를 같은 범위에 두지 않는다.
+    숫자는 표기만 다른 경우(2023 / 2023년, 1분기 / Q1)를 같은 값으로 맞춰 바꿔 말한 질의가 갈리지 않게 한다.
+    """
+    text = (query or "").lower()
+    numbers = {_number_facet(m) for m in _NUMBER_RE.finditer(text)}
+    terms = {t for t in _FACET_TERMS if t in text}
+    return tuple(sorted(numbers | terms))
+
+
+def keyword_facet(kw_hard: Sequence[str], kw_soft: Sequence[str]) -> frozenset:
+    """
+    선택 키워드의 범위 값 — 순서가 아닌 집합으로 비교한다(select_keywords_for_query 의 순위는
+    질의 토큰 겹침으로 매겨져 바꿔 말한 질의끼리 순서만 달라지는 경우가 많다).
+    """
+    return frozenset(kw_hard) | frozenset(kw_soft)
+
+
+def _unit(vec: Sequence[float]) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm > 0 else v
+
+
+class _Entry:
+    __slots__ = ("query", "vector", "ids", "docs", "dbg", "created")
+
+    def __init__(self, query: str, vector: np.ndarray, ids: np.ndarray, docs: List[Document], dbg: Dict[str, Any]) -> None:
+        self.query = query
+        self.vector = vector
+        self.ids = ids
+        self.docs = docs
+        self.dbg = dbg
+        self.created = time.monotonic()
+
+
+class SemanticResultCache:
+    """
+    최종 검색 결과 캐시 — 키는 (질의 임베딩, 범위) 이고 값은 최종 순위의 doc_id / Document.
+    범위(scope)는 (인덱스 build_id, 기업 코드, 게시일 구간, topk, keyword_facet, query_facets) 처럼 결과를 가르는 값 묶음으로,
+    같은 범위 안에서 코사인 유사도가 threshold 이상인 이전 질의가 있으면 그 결과를 돌려준다
+    ("삼성전자 최근 동향 리포트" / "삼성전자 최근 이슈 정리해줘" → BM25·CE·MMR 생략).
+    전체 항목 수 max_size 의 LRU 로 내보내고, ttl_s > 0 이면 오래된 항목은 적중시키지 않는다.
+    """
+
+    def __init__(self, *, threshold: float = 0.92, max_size: int = 1024, ttl_s: float = 0.0) -> None:
+        self.threshold = float(threshold)
+        self.max_size = max(1, int(max_size))
+        self.ttl_s = float(ttl_s or 0.0)
+        self._scopes: Dict[Scope, "OrderedDict[int, _Entry]"] = {}
+        self._lru: "OrderedDict[int, Scope]" = OrderedDict()  # 항목 id → scope (전체 LRU 순서)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, scope: Scope, vector: Sequence[float]) -> Optional[Tuple[List[Document], np.ndarray, Dict[str, Any]]]:
+        """가장 가까운 이전 질의가 threshold 이상이면 (Document 사본, doc_id, 원래 dbg + 유사도), 아니면 None."""
+        q = _unit(vector)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._scopes.get(scope)
+            best_key, best_sim = None, -1.0
+            if bucket:
+                keys = list(bucket.keys())
+                sims = np.stack([bucket[k].vector for k in keys]) @ q
+                for j in np.argsort(-sims, kind="stable"):
+                    if sims[j] < self.threshold:
+                        break
+                    entry = bucket[keys[j]]
+                    if self.ttl_s and now - entry.created > self.ttl_s:
+                        continue
+                    best_key, best_sim = keys[j], float(sims[j])
+                    break
+            if best_key is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._lru.move_to_end(best_key)
+            entry = bucket[best_key]
+            docs = [Document(page_content=d.page_content, metadata=dict(d.metadata)) for d in entry.docs]
+            dbg = copy.deepcopy(entry.dbg)
+            dbg["semantic_cache"] = {"hit": True, "similarity": round(best_sim, 4), "source_query": entry.query}
+            return docs, entry.ids.copy(), dbg
+
+    def store(self, scope: Scope, query: str, vector: Sequence[float], ids: np.ndarray, docs: Sequence[Document], dbg: Dict[str, Any]) -> None:
+        kept = [Document(page_content=d.page_content, metadata=dict(d.metadata)) for d in docs]
+        entry = _Entry(query, _unit(vector), np.asarray(ids).copy(), kept, copy.deepcopy(dbg))
+        with self._lock:
+            key = self._next_id
+            self._next_id += 1
+            self._scopes.setdefault(scope, OrderedDict())[key] = entry
+            self._lru[key] = scope
+            while len(self._lru) > self.max_size:
+                old_key, old_scope = self._lru.popitem(last=False)
+                self._drop(old_key, old_scope)
+                self.evictions += 1
+
+    def _drop(self, key: int, scope: Scope) -> None:
+        bucket = self._scopes.get(scope)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._scopes[scope]
+
+    def retain_build(self, build_id: Optional[str]) -> int:
+        """인덱스 교체 후 다른 build_id(scope[0]) 항목 제거. 반환: 지운 항목 수"""
+        with self._lock:
+            stale = [(k, s) for k, s in self._lru.items() if s[0] != build_id]
+            for key, scope in stale:
+                del self._lru[key]
+                self._drop(key, scope)
+        return len(stale)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._lru),
+                "evictions": self.evictions,
+            }
+
+
+def rerank_by_similarity(query_vector: Sequence[float], docs: List[Document], doc_vectors: Optional[np.ndarray]) -> List[Document]:
+    """캐시 적중 결과를 새 질의 벡터와의 코사인 순으로 재정렬 (저장 벡터가 없으면 그대로)."""
+    if doc_vectors is None or len(docs) < 2:
+        return docs
+    q = _unit(query_vector)
+    norms = np.linalg.norm(doc_vectors, axis=1)
+    sims = (doc_vectors @ q) / np.where(norms > 0, norms, 1.0)
+    return [docs[i] for i in np.argsort(-sims, kind="stable")]
+
+
+def build_semantic_cache(retrieval_cfg: Dict[str, Any]) -> Optional[SemanticResultCache]:
+    """config 의 retrieval.semantic_cache 섹션으로 캐시 생성 (enable: false 면 None)."""
+    sc_cfg = retrieval_cfg.get("semantic_cache", {}) or {}
+    if not sc_cfg.get("enable", False):
+        return None
+    return SemanticResultCache(
+        threshold=float(sc_cfg.get("threshold", 0.92)),
+        max_size=int(sc_cfg.get("max_size", 1024)),
+        ttl_s=float(sc_cfg.get("ttl_s", 0) or 0),
+    )
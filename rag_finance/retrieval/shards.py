@@ -0,0 +1,154 @@
+from __future__ import annotations
+import heapq
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from rag_finance.indexing.shards import BM25_STATS, GENERAL_SHARD, SHARD_MANIFEST, SHARD_SCHEMA_VERSION, company_shard_key, shards_dir_for
+from rag_finance.utils.io_utils import read_json
+
+if TYPE_CHECKING:
+    from langchain.retrievers import BM25Retriever
+    from langchain_community.vectorstores import FAISS
+
+
+def _doc_key(d: Document):
+    """build 시 부여한 doc_id, 없으면(예전 인덱스) (file_name, chunk_index)."""
+    did = d.metadata.get("doc_id")
+    if did is not None:
+        return did
+    return (str(d.metadata.get("file_name", "")), str(d.metadata.get("chunk_index", "")))
+
+
+def _merge_scored(scored: List[Tuple[float, int, Document]], k: int) -> List[Document]:
+    """(정렬키, 순번, 문서) 목록에서 같은 청크는 한 번만 남기고 상위 k 개."""
+    out: List[Document] = []
+    seen = set()
+    for _, _, doc in sorted(scored, key=lambda x: (x[0], x[1])):
+        key = _doc_key(doc)
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(doc)
+        if len(out) >= k:
+            break
+    return out
+
+
+class ShardRouter:
+    """
+    build_index 가 만든 기업별 shard({index_name}_shards/) / 시간 파티션({index_name}_time/) 라우터.
+    - route(): 질의 기업의 shard + general shard 이름 목록 (기업이 없거나 shard 가 없으면 [])
+    - search_faiss / search_bm25: 선택한 shard 들만 검색해 점수로 병합
+    shard 별 FAISS/BM25 는 처음 쓰일 때 로드해 캐시한다. BM25 는 build 때 저장한 전체 코퍼스
+    IDF·avgdl 로 점수화하므로 shard 간 점수를 그대로 비교할 수 있다(scripts.bench_shards 로 확인).
+    """
+
+    def __init__(self, shards_dir: str, embedding_model) -> None:
+        manifest = read_json(os.path.join(shards_dir, SHARD_MANIFEST))
+        if int(manifest.get("version", 0)) != SHARD_SCHEMA_VERSION:
+            raise ValueError(f"unsupported shard manifest version: {manifest.get('version')} ({shards_dir})")
+        self.shards_dir = shards_dir
+        self.embedding_model = embedding_model
+        self.shards: Dict[str, Dict] = manifest["shards"]
+        self.by_source = bool(manifest.get("by_source", False))
+        self._by_key: Dict[str, List[str]] = {}
+        for name, info in sorted(self.shards.items()):
+            self._by_key.setdefault(info["key"], []).append(name)
+        self._loaded: Dict[str, Tuple[FAISS, BM25Retriever]] = {}
+        self._lock = threading.Lock()
+        # bm25_stats.json 이 없는 예전 build 는 shard 별 IDF 라 점수 대신 shard 내 순위로 병합
+        stats_path = os.path.join(shards_dir, BM25_STATS)
+        self.bm25_stats: Optional[Dict] = read_json(stats_path) if os.path.isfile(stats_path) else None
+
+    @classmethod
+    def open(cls, indexes_dir: str, embedding_model, index_name: str = "all") -> Optional["ShardRouter"]:
+        return cls.open_dir(shards_dir_for(indexes_dir, index_name), embedding_model)
+
+    @classmethod
+    def open_dir(cls, shards_dir: str, embedding_model) -> Optional["ShardRouter"]:
+        if not os.path.isfile(os.path.join(shards_dir, SHARD_MANIFEST)):
+            return None
+        return cls(shards_dir, embedding_model)
+
+    def route(self, q_name: str, q_code: str, source_types: Optional[Sequence[str]] = None) -> List[str]:
+        if not (q_name or q_code):
+            return []
+        names = self._by_key.get(company_shard_key(q_name, q_code))
+        if not names:
+            return []
+        names = names + self._by_key.get(GENERAL_SHARD, [])
+        if source_types and self.by_source:
+            wanted = set(source_types)
+            names = [n for n in names if self.shards[n].get("source_type") in wanted]
+        return names
+
+    def route_window(self, since: str, until: str, include_undated: bool = False) -> List[str]:
+        """(시간 파티션용) min_date~max_date 가 [since, until] 과 겹치는 파티션 이름 목록."""
+        names: List[str] = []
+        for name, info in sorted(self.shards.items()):
+            lo, hi = info.get("min_date", ""), info.get("max_date", "")
+            if not lo:
+                if include_undated:
+                    names.append(name)
+                continue
+            if (not since or hi >= since) and (not until or lo <= until):
+                names.append(name)
+        return names
+
+    def _shard(self, name: str) -> Tuple[FAISS, BM25Retriever]:
+        loaded = self._loaded.get(name)
+        if loaded is not None:
+            return loaded
+        with self._lock:
+            loaded = self._loaded.get(name)
+            if loaded is None:
+                from langchain.retrievers import BM25Retriever
+                from langchain_community.vectorstores import FAISS
+
+                vs = FAISS.load_local(
+                    os.path.join(self.shards_dir, name),
+                    self.embedding_model,
+                    allow_dangerous_deserialization=True,
+                )
+                bm25 = BM25Retriever.from_documents(vs.docstore._dict.values())
+                if self.bm25_stats is not None:
+                    bm25.vectorizer.idf = self.bm25_stats["idf"]
+                    bm25.vectorizer.avgdl = float(self.bm25_stats["avgdl"])
+                loaded = (vs, bm25)
+                self._loaded[name] = loaded
+        return loaded
+
+    def warm(self) -> None:
+        for name in self.shards:
+            self._shard(name)
+
+    def search_faiss(self, query: str, shards: Sequence[str], k: int) -> List[Document]:
+        """질의 임베딩은 한 번만 계산하고 shard 별 거리(작을수록 가까움)로 병합."""
+        vec = self.embedding_model.embed_query(query)
+        scored: List[Tuple[float, int, Document]] = []
+        for name in shards:
+            vs, _ = self._shard(name)
+            for doc, dist in vs.similarity_search_with_score_by_vector(vec, k=k):
+                scored.append((float(dist), len(scored), doc))
+        return _merge_scored(scored, k)
+
+    def search_bm25(self, query: str, shards: Sequence[str], k: int) -> List[Document]:
+        """
+        전체 코퍼스 IDF 로 계산한 점수로 병합 → 전체 인덱스 BM25 순위를 선택한 shard 청크로 제한한 것과 같다.
+        통계가 없는 예전 build 는 척도가 다른 점수 대신 shard 내 순위(0, 1, ...)로 번갈아 병합한다.
+        """
+        scored: List[Tuple[float, int, Document]] = []
+        for name in shards:
+            _, bm25 = self._shard(name)
+            scores = bm25.vectorizer.get_scores(bm25.preprocess_func(query))
+            top = heapq.nlargest(k, range(len(scores)), key=scores.__getitem__) if len(scores) else []
+            for rank, i in enumerate(top):
+                key = -float(scores[i]) if self.bm25_stats is not None else float(rank)
+                scored.append((key, len(scored), bm25.docs[i]))
+        return _merge_scored(scored, k)
+
+    def stats(self) -> Dict[str, int]:
+        return {"shards": len(self.shards), "loaded": len(self._loaded)}
@@ -0,0 +1,122 @@
+from __future__ import annotations
+import copy
+import itertools
+import json
+import random
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+from omegaconf import OmegaConf
+
+# 튜닝 대상 → config 경로
+PARAM_PATHS: Dict[str, Tuple[str, ...]] = {
+    "pool_k_faiss": ("retrieval", "pool_k_faiss"),
+    "pool_k_bm25": ("retrieval", "pool_k_bm25"),
+    "pool_k_report": ("retrieval", "pool_k_report"),
+    "pool_k_other": ("retrieval", "pool_k_other"),
+    "take_top_n": ("retrieval", "ce", "take_top_n"),
+    "rrf_k_const": ("retrieval", "rrf_k_const"),
+    "mmr_lambda": ("retrieval", "ce", "mmr_lambda"),
+}
+
+DEFAULT_GRID: Dict[str, List[Any]] = {
+    "pool_k_faiss": [50, 100, 200, 300],
+    "pool_k_bm25": [50, 100, 200, 300],
+    "pool_k_report": [50, 100, 200],
+    "pool_k_other": [50, 100, 200],
+    "take_top_n": [30, 60, 100, 150],
+    "rrf_k_const": [20, 60],
+    "mmr_lambda": [0.5, 0.7],
+}
+
+
+def parse_grid(specs: Sequence[str], base: Dict[str, List[Any]] | None = None) -> Dict[str, List[Any]]:
+    """["pool_k_faiss=100,200", "mmr_lambda=0.5"] → 격자 (지정하지 않은 항목은 base 값)."""
+    grid = dict(base if base is not None else DEFAULT_GRID)
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        name = name.strip()
+        if name not in PARAM_PATHS:
+            raise ValueError(f"unknown knob {name!r}; choose from {sorted(PARAM_PATHS)}")
+        grid[name] = [json.loads(v) for v in values.split(",") if v.strip()]
+    return grid
+
+
+def get_param(config: Dict[str, Any], name: str) -> Any:
+    node: Any = config
+    for key in PARAM_PATHS[name]:
+        node = node[key]
+    return node
+
+
+def apply_params(config: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    """config 복사본에 params 반영."""
+    out = copy.deepcopy(config)
+    for name, value in params.items():
+        *parents, leaf = PARAM_PATHS[name]
+        node = out
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = value
+    return out
+
+
+def candidate_params(grid: Dict[str, List[Any]], method: str = "grid", trials: int = 0, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    grid: 전체 조합 / random: 조합 중 trials 개 비복원 추출.
+    take_top_n 이 후보 풀(report + other)보다 큰 조합은 의미가 같으므로 제외한다.
+    """
+    names = sorted(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    combos = [
+        c for c in combos
+        if "take_top_n" not in c or c["take_top_n"] <= c.get("pool_k_report", 10**9) + c.get("pool_k_other", 10**9)
+    ]
+    if method == "random" and trials and trials < len(combos):
+        combos = random.Random(seed).sample(combos, trials)
+    elif method != "grid" and method != "random":
+        raise ValueError(f"method must be grid or random: {method}")
+    return combos
+
+
+def load_labels(path: str) -> List[Tuple[str, Set[str]]]:
+    """
+    레이블 질의 세트 (JSONL): {"q": "...", "relevant": ["<chunk_id>", ...]}
+    chunk_id 는 build 시 메타데이터의 chunk_id ({file_name}_chunk_{i}).
+    """
+    out: List[Tuple[str, Set[str]]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            relevant = {str(x) for x in row.get("relevant", row.get("chunk_ids", []))}
+            if relevant:
+                out.append((str(row.get("q", row.get("query", ""))), relevant))
+    return out
+
+
+def recall_at_k(retrieved: Sequence[str], relevant: Set[str], k: int) -> float:
+    """relevant 중 상위 k 개 결과에 든 비율 (relevant 가 k 보다 많으면 k 로 나눈다)."""
+    if not relevant:
+        return 0.0
+    hit = len(set(retrieved[:k]) & relevant)
+    return hit / min(len(relevant), k)
+
+
+def pareto_front(trials: List[Dict[str, Any]], latency_key: str = "p50_ms", recall_key: str = "recall") -> List[Dict[str, Any]]:
+    """지연은 낮을수록, recall 은 높을수록 좋은 2목적 Pareto 최적 trial 목록 (지연 오름차순)."""
+    ranked = sorted(trials, key=lambda t: (t[latency_key], -t[recall_key]))
+    front: List[Dict[str, Any]] = []
+    best_recall = float("-inf")
+    for t in ranked:
+        if t[recall_key] > best_recall:
+            front.append(t)
+            best_recall = t[recall_key]
+    return front
+
+
+def to_yaml(trial: Dict[str, Any]) -> str:
+    """trial 의 튜닝 값만 담은 config 조각 (configs/default.yaml 에 그대로 덮어쓸 수 있는 형태)."""
+    snippet = apply_params({}, trial["params"])
+    return OmegaConf.to_yaml(OmegaConf.create(snippet))
@@ -0,0 +1 @@
+"""모델/인덱스를 상주시킨 채 검색·리포트 요청을 처리하는 로컬 서비스."""
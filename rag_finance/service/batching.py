@@ -0,0 +1,128 @@
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+
+class SingleFlight:
+    """
+    동일 key 로 동시에 들어온 요청을 하나의 계산으로 합친다(request coalescing).
+    먼저 들어온 호출(leader)만 fn 을 실행하고, 나머지는 같은 결과(또는 예외)를 공유한다.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.calls += 1
+            fut = self._calls.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._calls[key] = fut
+            else:
+                self.coalesced += 1
+        if not leader:
+            return fut.result()
+
+        try:
+            fut.set_result(fn())
+        except BaseException as exc:
+            fut.set_exception(exc)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return fut.result()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+class MicroBatcher:
+    """
+    여러 스레드가 submit 한 아이템들을 max_wait_ms 동안 모아 fn(flat_items) 한 번으로 처리한다.
+    fn 은 입력과 같은 길이/순서의 결과 리스트를 반환해야 한다.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], Sequence[Any]],
+        *,
+        max_batch: int = 64,
+        max_wait_ms: float = 5.0,
+        name: str = "micro-batcher",
+    ) -> None:
+        self._fn = fn
+        self._max_batch = max(1, int(max_batch))
+        self._max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[List[Any], Future]] = []
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def restart(self) -> None:
+        """fork 된 자식용: 스레드는 fork 를 넘어오지 않으므로 대기열·조건변수를 새로 만들고 배치 스레드를 다시 띄운다."""
+        self._cond = threading.Condition()
+        self._pending = []
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._run, name=self._thread.name, daemon=True)
+        self._thread.start()
+
+    def submit(self, items: Sequence[Any]) -> List[Any]:
+        items = list(items)
+        if not items:
+            return []
+        fut: Future = Future()
+        with self._cond:
+            self._pending.append((items, fut))
+            self._cond.notify()
+        return fut.result()
+
+    def _pending_size(self) -> int:
+        return sum(len(items) for items, _ in self._pending)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self._max_wait
+                while self._pending_size() < self._max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, []
+
+            flat = [x for items, _ in batch for x in items]
+            try:
+                results = list(self._fn(flat))
+                if len(results) != len(flat):
+                    raise RuntimeError(f"batch fn returned {len(results)} results for {len(flat)} items")
+            except BaseException as exc:
+                for _, fut in batch:
+                    fut.set_exception(exc)
+                continue
+
+            self.batches += 1
+            self.items += len(flat)
+            pos = 0
+            for items, fut in batch:
+                fut.set_result(results[pos:pos + len(items)])
+                pos += len(items)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch": (self.items / self.batches) if self.batches else 0.0,
+        }
@@ -0,0 +1,60 @@
+from __future__ import annotations
+import json
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from rag_finance.service.protocol import docs_from_payload
+
+
+class ServiceClient:
+    """상주 서비스(rag_finance.service.server)에 요청을 보내는 얇은 HTTP 클라이언트."""
+
+    def __init__(self, base_url: str, timeout: float = 600.0) -> None:
+        if "://" not in base_url:
+            base_url = "http://" + base_url
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        req = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return json.loads(resp.read().decode("utf-8"))
+        except urllib.error.HTTPError as exc:
+            try:
+                detail = json.loads(exc.read().decode("utf-8")).get("error", "")
+            except (ValueError, OSError):
+                detail = ""
+            raise RuntimeError(f"service error {exc.code} on {path}: {detail}") from exc
+        except urllib.error.URLError as exc:
+            raise RuntimeError(f"service unreachable at {self.base_url}: {exc.reason}") from exc
+
+    def retrieve(
+        self, query: str, topk: int = 10, since: Optional[str] = None, until: Optional[str] = None,
+        deadline_ms: Optional[float] = None,
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        payload: Dict[str, Any] = {"q": query, "topk": topk}
+        if since:
+            payload["since"] = since
+        if until:
+            payload["until"] = until
+        if deadline_ms:
+            payload["deadline_ms"] = deadline_ms
+        body = self._post("/retrieve", payload)
+        return docs_from_payload(body.get("documents", [])), body.get("debug", {})
+
+    def report(self, query: str, **options: Any) -> Dict[str, Any]:
+        """/report 호출. 반환 dict 의 documents 는 Document 리스트로 복원된다."""
+        payload = {"q": query}
+        payload.update({k: v for k, v in options.items() if v is not None})
+        body = self._post("/report", payload)
+        body["documents"] = docs_from_payload(body.get("documents", []))
+        return body
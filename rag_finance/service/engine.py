@@ -0,0 +1,268 @@
+from __future__ import annotations
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from rag_finance.indexing.compact import CompactIndex, open_compact
+from rag_finance.indexing.faiss_index import build_embedding_from_config
+from rag_finance.indexing.shards import shards_dir_for
+from rag_finance.indexing.time_partitions import time_dir_for
+from rag_finance.indexing.versions import current_build, read_manifest
+from rag_finance.inference.query_cache import wrap_query_cache
+from rag_finance.retrieval.pipeline import (
+    build_bm25_retriever, build_cascade_reranker, build_reranker, load_vectorstore, retrieve_with_keywords,
+)
+from rag_finance.retrieval.scatter import ScatterGatherClient, open_partition_client
+from rag_finance.retrieval.semantic_cache import SemanticResultCache, build_semantic_cache
+from rag_finance.retrieval.shards import ShardRouter
+from rag_finance.service.batching import MicroBatcher, SingleFlight
+from rag_finance.service.index_watcher import IndexWatcher
+from rag_finance.service.protocol import deadline_from_payload, docs_to_payload
+from rag_finance.utils.tabular_format import format_tabular_prompt, load_tabular_payload
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    동시 요청의 embed_query / embed_documents 를 하나의 embed_documents 배치로 묶는 래퍼.
+    질의 임베딩도 embed_documents 로 계산한다(ko-sroberta 계열은 query/doc 인코딩이 동일).
+    """
+
+    def __init__(self, base: Embeddings, *, max_batch: int = 64, max_wait_ms: float = 5.0) -> None:
+        self.base = base
+        self.batcher = MicroBatcher(base.embed_documents, max_batch=max_batch, max_wait_ms=max_wait_ms, name="embed-batcher")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.batcher.submit(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.submit([text])[0]
+
+
+class BatchedReranker:
+    """CrossEncoderReranker.predict 호출을 요청 간에 하나의 CE 배치로 합친다."""
+
+    def __init__(self, base, *, max_batch: int = 256, max_wait_ms: float = 5.0) -> None:
+        self.base = base
+        self.batcher = MicroBatcher(base.predict, max_batch=max_batch, max_wait_ms=max_wait_ms, name="ce-batcher")
+
+    def predict(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        return self.batcher.submit(pairs)
+
+
+class IndexSnapshot:
+    """한 인덱스 버전(build_id)의 전체 FAISS / BM25 / shard·시간 파티션 라우터 묶음."""
+
+    def __init__(self, config: Dict[str, Any], embedding, build_id: Optional[str], *, full_index: bool = True) -> None:
+        indexes_dir = config["paths"]["indexes_dir"]
+        self.build_id = build_id
+        self.vectorstore = None
+        self.bm25 = None
+        self.compact: Optional[CompactIndex] = None
+        if full_index:
+            self.vectorstore = load_vectorstore(indexes_dir, embedding, build_id=build_id)
+            self.bm25 = build_bm25_retriever(self.vectorstore)
+            self.compact = open_compact(config, build_id)
+            if self.compact is not None and (config.get("compact", {}) or {}).get("release_faiss", True):
+                # 1단계는 압축 코드, 정밀 벡터는 mmap 에서 읽으므로 메모리의 전체 FAISS 벡터는 빈 인덱스로 교체
+                import faiss
+
+                index = self.vectorstore.index
+                self.vectorstore.index = faiss.IndexFlat(index.d, index.metric_type)
+        self.shard_router: Optional[ShardRouter] = None
+        if (config.get("shards", {}) or {}).get("enable", False):
+            self.shard_router = ShardRouter.open_dir(shards_dir_for(indexes_dir, build_id=build_id), embedding)
+            if self.shard_router is not None:
+                self.shard_router.warm()
+        # 시간 파티션은 구간 질의가 올 때 필요한 것만 로드
+        self.time_router: Optional[ShardRouter] = None
+        if (config.get("time_partitions", {}) or {}).get("enable", False):
+            self.time_router = ShardRouter.open_dir(time_dir_for(indexes_dir, build_id=build_id), embedding)
+
+
+class ServiceEngine:
+    """
+    임베딩 모델 / FAISS 인덱스 / BM25 / CE 를 한 번만 로드해 두고 요청마다 재사용하는 상주 엔진.
+    동일 요청은 SingleFlight 로 합치고, 임베딩과 CE 는 MicroBatcher 로 요청 간 배치한다.
+    index_versions.watch_interval_s > 0 이면 게시 포인터를 감시해 새 버전을 옆에 로드한 뒤
+    참조 하나만 바꿔 끼운다(이중 버퍼) — 진행 중인 요청은 시작할 때 잡은 버전으로 끝까지 처리된다.
+    watch_index=False 면 감시 스레드를 띄우지 않는다 (pre-fork 부모가 직접 확인하고 워커를 다시 fork).
+    """
+
+    def __init__(self, config: Dict[str, Any], *, llm_client=None, watch_index: bool = True) -> None:
+        self.config = config
+        svc_cfg = config.get("service", {}) or {}
+        wait_ms = svc_cfg.get("batch_wait_ms", 5.0)
+        emb_cfg = config["embedding"]
+        ce_cfg = config["retrieval"]["ce"]
+
+        base_embedding = build_embedding_from_config(emb_cfg, query_cache=False)
+        self.batched_embedding = BatchedEmbeddings(
+            base_embedding, max_batch=svc_cfg.get("embed_max_batch", 64), max_wait_ms=wait_ms,
+        )
+        # 질의 캐시는 배치 앞단에 둔다 (캐시 적중은 배치 대기 없이 바로 반환)
+        self.embedding = wrap_query_cache(self.batched_embedding, emb_cfg)
+        # partitions.enable 이면 전체 인덱스 검색은 파티션 워커가 맡으므로 이 프로세스에는 로드하지 않는다.
+        self.partitions: Optional[ScatterGatherClient]
+        self.partitions, self._worker_procs = open_partition_client(config, self.embedding)
+        indexes_dir = config["paths"]["indexes_dir"]
+        self.index = IndexSnapshot(config, self.embedding, current_build(indexes_dir), full_index=self.partitions is None)
+        self.index_swaps = 0
+        self._swap_lock = threading.Lock()
+        # 파티션 워커는 시작 시점 버전에 묶여 있으므로 partitions 사용 시에는 교체하지 않는다
+        self.index_watcher: Optional[IndexWatcher] = None
+        watch_s = float((config.get("index_versions", {}) or {}).get("watch_interval_s", 0) or 0)
+        if watch_index and watch_s > 0 and self.partitions is None:
+            self.index_watcher = IndexWatcher(
+                indexes_dir, self.swap_index, interval_s=watch_s, current=self.index.build_id,
+            ).start()
+        self.reranker: Optional[BatchedReranker] = None
+        self.cascade_reranker: Optional[BatchedReranker] = None
+        if ce_cfg.get("enable", True):
+            self.reranker = BatchedReranker(
+                build_reranker(ce_cfg), max_batch=svc_cfg.get("ce_max_batch", 256), max_wait_ms=wait_ms,
+            )
+            casc_cfg = ce_cfg.get("cascade", {}) or {}
+            if casc_cfg.get("enable", False):
+                self.cascade_reranker = BatchedReranker(
+                    build_cascade_reranker(casc_cfg), max_batch=svc_cfg.get("ce_max_batch", 256), max_wait_ms=wait_ms,
+                )
+        # 거의 같은 질의(같은 기업·인덱스 버전)의 최종 결과 재사용 — retrieval.semantic_cache
+        self.semantic_cache: Optional[SemanticResultCache] = build_semantic_cache(config["retrieval"])
+        self.llm_client = llm_client
+        self.flight = SingleFlight()
+        self.worker: Optional[Dict[str, Any]] = None  # pre-fork 워커 정보 (slot / pid / threads)
+
+    def after_fork(self) -> None:
+        """fork 된 워커에서 요청을 받기 전에 호출: 배치 스레드를 다시 띄우고 요청 합치기 상태를 비운다."""
+        self.batched_embedding.batcher.restart()
+        for reranker in (self.reranker, self.cascade_reranker):
+            if reranker is not None:
+                reranker.batcher.restart()
+        self.flight = SingleFlight()
+
+    def swap_index(self, build_id: str) -> None:
+        """
+        새 버전을 현재 버전과 나란히 전부 로드(shard warm 포함)한 뒤 self.index 참조만 교체.
+        임베딩 모델이 다른 빌드는 질의 임베딩과 맞지 않으므로 거부한다.
+        """
+        manifest = read_manifest(self.config["paths"]["indexes_dir"], build_id=build_id) or {}
+        built_with = (manifest.get("embedding") or {}).get("model_name")
+        if built_with and built_with != self.config["embedding"]["model_name"]:
+            raise ValueError(f"build {build_id} uses embedding {built_with}, engine runs {self.config['embedding']['model_name']}")
+        with self._swap_lock:
+            fresh = IndexSnapshot(self.config, self.embedding, build_id, full_index=self.partitions is None)
+            self.index = fresh
+            self.index_swaps += 1
+        if self.semantic_cache is not None:
+            self.semantic_cache.retain_build(build_id)  # 이전 버전 결과는 더 이상 적중시키지 않는다
+        print(f"[engine] switched to index build {build_id}")
+
+    def _retrieve(
+        self, query: str, topk: int, since: Optional[str] = None, until: Optional[str] = None,
+        deadline_ms: Optional[float] = None,
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        index = self.index  # 요청 하나는 한 버전으로만 처리 (도중에 교체돼도 끝까지 이 버전을 쓴다)
+        docs, dbg = retrieve_with_keywords(
+            query=query,
+            config=self.config,
+            embedding_model=self.embedding,
+            topk=topk,
+            show_progress=False,
+            vectorstore=index.vectorstore,
+            bm25_retriever=index.bm25,
+            reranker=self.reranker,
+            cascade_reranker=self.cascade_reranker,
+            shard_router=index.shard_router,
+            partitions=self.partitions,
+            since=since,
+            until=until,
+            time_router=index.time_router,
+            deadline_ms=deadline_ms,
+            compact=index.compact,
+            semantic_cache=self.semantic_cache,
+            index_build=index.build_id,
+        )
+        dbg["index_build"] = index.build_id
+        return docs, dbg
+
+    def retrieve(
+        self, query: str, topk: int = 10, since: Optional[str] = None, until: Optional[str] = None,
+        deadline_ms: Optional[float] = None,
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        key = "retrieve:" + json.dumps(
+            {"q": query, "topk": topk, "since": since, "until": until, "deadline_ms": deadline_ms, "build": self.index.build_id},
+            ensure_ascii=False, sort_keys=True,
+        )
+        return self.flight.do(key, lambda: self._retrieve(query, topk, since, until, deadline_ms))
+
+    def report(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self.llm_client is None:
+            raise RuntimeError("LLM client is not configured (GROQ_API_KEY missing).")
+        key = "report:" + json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        return self.flight.do(key, lambda: self._report(payload))
+
+    def _report(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        query = str(payload["q"])
+        docs, debug_info = self.retrieve(
+            query, int(payload.get("topk", 10)), payload.get("since"), payload.get("until"),
+            deadline_from_payload(payload),
+        )
+        result: Dict[str, Any] = {"debug": debug_info, "documents": docs_to_payload(docs)}
+        if not docs:
+            return result
+
+        tabular_payload = load_tabular_payload(payload.get("tabular_dir"), debug_info.get("company"), debug_info.get("code"))
+        tabular_text = format_tabular_prompt(tabular_payload)
+        from rag_finance.llm import generate_finance_report
+
+        report_text, messages, context_text = generate_finance_report(
+            client=self.llm_client,
+            query=query,
+            docs=docs,
+            model=payload.get("model", "llama-3.3-70b-versatile"),
+            few_shot_dir=payload.get("examples_dir"),
+            few_shot_max_examples=int(payload.get("max_examples", 1)),
+            include_few_shot=not payload.get("no_few_shot", False),
+            style_hint=payload.get("style_hint", ""),
+            temperature=float(payload.get("temperature", 0.1)),
+            top_p=float(payload.get("top_p", 0.95)),
+            max_tokens=int(payload.get("max_tokens", 1024)),
+            tabular_text=tabular_text,
+        )
+        result.update({
+            "report_text": report_text,
+            "messages": messages,
+            "context_text": context_text,
+            "tabular_payload": tabular_payload,
+            "tabular_text": tabular_text,
+        })
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"flight": self.flight.stats(), "embed_batches": self.batched_embedding.batcher.stats()}
+        if hasattr(self.embedding, "cache_stats"):
+            out["query_cache"] = self.embedding.cache_stats()
+        if self.semantic_cache is not None:
+            out["semantic_cache"] = self.semantic_cache.cache_stats()
+        out["index"] = {"build_id": self.index.build_id, "swaps": self.index_swaps}
+        if self.index.compact is not None:
+            out["index"]["compact"] = {"codes": self.index.compact.codes_type, **self.index.compact.manifest["memory"]}
+        if self.index_watcher is not None and self.index_watcher.last_error:
+            out["index"]["last_error"] = self.index_watcher.last_error
+        if self.partitions is not None:
+            out["partitions"] = self.partitions.stats()
+        if self.index.shard_router is not None:
+            out["shards"] = self.index.shard_router.stats()
+        if self.reranker is not None:
+            out["ce_batches"] = self.reranker.batcher.stats()
+        if self.cascade_reranker is not None:
+            out["cascade_batches"] = self.cascade_reranker.batcher.stats()
+        if self.worker is not None:
+            from rag_finance.service.prefork import process_memory
+
+            out["worker"] = {**self.worker, "memory_mib": process_memory(os.getpid())}
+        return out
@@ -0,0 +1,64 @@
+from __future__ import annotations
+import threading
+from typing import Callable, Optional
+
+from rag_finance.indexing.versions import current_build
+
+
+class IndexWatcher:
+    """
+    게시 포인터({indexes_dir}/{index_name}/current.json)를 interval_s 마다 확인해
+    build_id 가 바뀌면 on_change(build_id) 를 호출하는 데몬 스레드.
+    on_change 가 예외를 내면 기존 버전을 유지하고, 같은 build_id 는 다시 시도하지 않는다.
+    """
+
+    def __init__(
+        self,
+        indexes_dir: str,
+        on_change: Callable[[str], None],
+        *,
+        interval_s: float = 5.0,
+        index_name: str = "all",
+        current: Optional[str] = None,
+    ) -> None:
+        self.indexes_dir = indexes_dir
+        self.index_name = index_name
+        self.on_change = on_change
+        self.interval_s = max(0.1, float(interval_s))
+        self.current = current
+        self.last_error = ""
+        self._failed: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """포인터를 한 번 확인. 새 버전으로 교체했으면 True."""
+        build_id = current_build(self.indexes_dir, self.index_name)
+        if not build_id or build_id in (self.current, self._failed):
+            return False
+        try:
+            self.on_change(build_id)
+        except Exception as e:  # 새 버전 로드 실패 시 기존 버전으로 계속 서비스
+            self.last_error = f"{build_id}: {e}"
+            self._failed = build_id
+            print(f"[index_watcher] failed to load build {build_id}: {e}")
+            return False
+        self.current = build_id
+        self.last_error = ""
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.check()
+
+    def start(self) -> "IndexWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="index-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s + 1.0)
+            self._thread = None
@@ -0,0 +1,320 @@
+from __future__ import annotations
+import copy
+import gc
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Set
+
+from rag_finance.service.engine import ServiceEngine
+from rag_finance.service.index_watcher import IndexWatcher
+from rag_finance.service.server import ServiceHTTPServer
+
+_MIN_UPTIME_S = 1.0  # 이보다 빨리 죽은 워커는 잠깐 쉬었다가 다시 fork (기동 실패 반복 시 CPU 낭비 방지)
+
+
+def process_memory(pid: int) -> Optional[Dict[str, float]]:
+    """
+    /proc/<pid>/smaps_rollup → MiB 단위 {rss, pss, shared, unique} (리눅스가 아니거나 프로세스가 없으면 None).
+    shared = 다른 프로세스와 같이 매핑된 페이지(COW 로 공유 중인 모델·인덱스), unique = 이 프로세스만 가진 페이지.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    kb: Dict[str, int] = {}
+    for line in lines:
+        key, _, rest = line.partition(":")
+        parts = rest.split()
+        if len(parts) == 2 and parts[1] == "kB":
+            kb[key] = int(parts[0])
+
+    def mib(value: int) -> float:
+        return round(value / 1024.0, 1)
+
+    return {
+        "rss": mib(kb.get("Rss", 0)),
+        "pss": mib(kb.get("Pss", 0)),
+        "shared": mib(kb.get("Shared_Clean", 0) + kb.get("Shared_Dirty", 0)),
+        "unique": mib(kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0)),
+    }
+
+
+def memory_report(pids: Dict[str, int]) -> Dict[str, Any]:
+    """
+    {이름: pid} 의 프로세스별 메모리와 합계.
+    total_pss 는 공유 페이지를 나눠 센 실제 점유량, total_rss 는 공유분을 프로세스마다 다시 센 값
+    (워커마다 모델·인덱스를 따로 로드했을 때의 점유량에 가깝다).
+    """
+    rows = {name: process_memory(pid) for name, pid in pids.items()}
+    live = [r for r in rows.values() if r is not None]
+    return {
+        "processes": {name: {"pid": pids[name], **(r or {})} for name, r in rows.items()},
+        "total_pss": round(sum(r["pss"] for r in live), 1),
+        "total_rss": round(sum(r["rss"] for r in live), 1),
+    }
+
+
+def format_memory_report(report: Dict[str, Any]) -> List[str]:
+    lines = []
+    for name, row in report["processes"].items():
+        if "rss" not in row:
+            lines.append(f"{name:10s} pid={row['pid']} (memory unavailable)")
+            continue
+        lines.append(
+            f"{name:10s} pid={row['pid']:<7d} rss={row['rss']:8.1f}MiB shared={row['shared']:8.1f}MiB "
+            f"unique={row['unique']:8.1f}MiB pss={row['pss']:8.1f}MiB"
+        )
+    lines.append(f"total pss={report['total_pss']:.1f}MiB (sum of rss={report['total_rss']:.1f}MiB counts shared pages per process)")
+    return lines
+
+
+def partition_threads(workers: int, threads_per_worker: int = 0) -> int:
+    """워커당 intra-op 스레드 수 (0 이면 코어 수 / workers — 워커 N 개가 코어를 과다 구독하지 않게)."""
+    return int(threads_per_worker) or max(1, (os.cpu_count() or 1) // max(1, int(workers)))
+
+
+def with_thread_budget(config: Dict[str, Any], threads: int) -> Dict[str, Any]:
+    """
+    threads 가 0(라이브러리 기본값)인 모델 설정에 워커당 스레드 수를 채운 사본.
+    ONNX 세션은 생성 시점의 스레드 수로 고정되므로 부모가 로드하기 전에 정해 둔다.
+    """
+    config = copy.deepcopy(config)
+    ce_cfg = config["retrieval"]["ce"]
+    for section in (config["embedding"], ce_cfg, ce_cfg.get("cascade") or {}):
+        if not int(section.get("threads", 0) or 0):
+            section["threads"] = threads
+    return config
+
+
+def _limit_threads(threads: int) -> None:
+    """fork 된 워커의 torch / FAISS(OpenMP) 스레드 수 제한 (이미 import 된 라이브러리만)."""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+    faiss = sys.modules.get("faiss")
+    if faiss is not None:
+        faiss.omp_set_num_threads(threads)
+
+
+def _torch_modules(engine: ServiceEngine) -> List[Any]:
+    """엔진이 들고 있는 torch 모듈 (HuggingFaceEmbeddings.client, CrossEncoder.model). ONNX 백엔드는 해당 없음."""
+    objs: List[Any] = [engine.batched_embedding.base]
+    for reranker in (engine.reranker, engine.cascade_reranker):
+        if reranker is not None:
+            objs.append(reranker.base.model)
+    found: List[Any] = []
+    for obj in objs:
+        for cand in (obj, getattr(obj, "client", None), getattr(obj, "model", None)):
+            if (cand is not None and callable(getattr(cand, "eval", None)) and callable(getattr(cand, "parameters", None))
+                    and not any(cand is f for f in found)):
+                found.append(cand)
+    return found
+
+
+def freeze_models(engine: ServiceEngine) -> int:
+    """모델을 eval 모드로 두고 파라미터의 requires_grad 를 끈다 (워커가 autograd 상태를 만들며 공유 페이지를 건드리지 않게). 반환: 모듈 수"""
+    modules = _torch_modules(engine)
+    for module in modules:
+        module.eval()
+        for param in module.parameters():
+            param.requires_grad_(False)
+    return len(modules)
+
+
+class PreforkServer:
+    """
+    부모가 임베딩·CE 모델과 인덱스(FAISS / BM25 / 압축 코드 mmap)를 한 번 로드하고 listen 소켓을 연 뒤
+    워커 N 개를 fork — 워커는 그 페이지를 copy-on-write 로 공유하고 같은 소켓에서 accept 한다.
+    - 부모는 추론을 하지 않는다 (fork 전에 OpenMP/torch 스레드 풀을 만들지 않기 위해)
+    - gc.freeze() 로 부모 객체를 GC 추적에서 빼 워커의 GC 가 공유 페이지를 더럽히지 않게 한다
+    - 죽은 워커는 다시 fork, 인덱스 게시 포인터가 바뀌면 부모가 새 버전을 로드한 뒤 워커를 하나씩 교체
+    - SIGUSR1 또는 memory_report_s 마다 워커별 shared / unique 메모리 보고
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        *,
+        workers: int,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        llm_client=None,
+        verbose: bool = False,
+    ) -> None:
+        pf_cfg = (config.get("service", {}) or {}).get("prefork", {}) or {}
+        self.workers = max(1, int(workers))
+        self.threads = partition_threads(self.workers, int(pf_cfg.get("threads_per_worker", 0) or 0))
+        self.memory_report_s = float(pf_cfg.get("memory_report_s", 0) or 0)
+        self.shutdown_timeout_s = float(pf_cfg.get("shutdown_timeout_s", 30) or 30)
+        config = with_thread_budget(config, self.threads)
+        self.engine = ServiceEngine(config, llm_client=llm_client, watch_index=False)
+        self.frozen_modules = freeze_models(self.engine)
+        self.httpd = ServiceHTTPServer((host, port), self.engine, verbose=verbose)
+        # 워커들이 같은 소켓에서 accept: 다른 워커가 먼저 가져간 연결은 BlockingIOError 로 건너뛴다
+        self.httpd.socket.setblocking(False)
+        self.address = self.httpd.server_address
+        self.index_watcher: Optional[IndexWatcher] = None
+        watch_s = float((config.get("index_versions", {}) or {}).get("watch_interval_s", 0) or 0)
+        if watch_s > 0 and self.engine.partitions is None:
+            # 스레드 없이 감독 루프에서 check() 만 호출 (fork 시점에 부모 스레드가 락을 잡고 있지 않게)
+            self.index_watcher = IndexWatcher(
+                config["paths"]["indexes_dir"], self._reload, interval_s=watch_s, current=self.engine.index.build_id,
+            )
+        self.children: Dict[int, int] = {}  # pid → slot
+        self._started: Dict[int, float] = {}
+        self._retiring: Set[int] = set()
+        self._last_watch = 0.0
+        self._stop = False
+        self._report_requested = False
+
+    # ---- 워커 ----------------------------------------------------------------
+
+    def _spawn(self, slot: int) -> int:
+        sys.stdout.flush()  # 버퍼에 남은 출력이 워커에 복제돼 두 번 찍히지 않게
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._worker_main(slot)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)  # 부모의 atexit(질의 캐시 저장 등)를 워커에서 다시 실행하지 않는다
+        self.children[pid] = slot
+        self._started[pid] = time.monotonic()
+        return pid
+
+    def _worker_main(self, slot: int) -> None:
+        httpd = self.httpd
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=httpd.shutdown, daemon=True).start())
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C 는 부모가 받아 워커를 정리
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+        _limit_threads(self.threads)
+        self.engine.worker = {"slot": slot, "pid": os.getpid(), "threads": self.threads}
+        self.engine.after_fork()
+        httpd.daemon_threads = False  # 종료 시 server_close 가 진행 중인 요청을 끝까지 기다린다
+        try:
+            httpd.serve_forever(poll_interval=0.5)
+        finally:
+            httpd.server_close()
+
+    def _retire(self, pid: int) -> None:
+        self.children.pop(pid, None)
+        self._retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self._retiring.discard(pid)
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self._retiring:
+                self._retiring.discard(pid)
+                continue
+            slot = self.children.pop(pid, None)
+            started = self._started.pop(pid, time.monotonic())
+            if slot is None or self._stop:
+                continue
+            print(f"[prefork] worker {slot} (pid {pid}) exited with status {status}; forking a replacement")
+            if time.monotonic() - started < _MIN_UPTIME_S:
+                time.sleep(_MIN_UPTIME_S)
+            self._spawn(slot)
+
+    def _reload(self, build_id: str) -> None:
+        """새 인덱스 버전을 부모에 로드하고(공유 대상) 워커를 하나씩 새로 fork 한 뒤 이전 워커를 내린다."""
+        self.engine.swap_index(build_id)
+        gc.collect()
+        gc.freeze()
+        for pid, slot in list(self.children.items()):
+            self._spawn(slot)
+            self._retire(pid)
+
+    # ---- 부모 ----------------------------------------------------------------
+
+    def worker_pids(self) -> Dict[str, int]:
+        pids = {"parent": os.getpid()}
+        pids.update({f"worker-{slot}": pid for pid, slot in sorted(self.children.items(), key=lambda kv: kv[1])})
+        return pids
+
+    def print_memory_report(self) -> Dict[str, Any]:
+        report = memory_report(self.worker_pids())
+        for line in format_memory_report(report):
+            print(f"[prefork] memory {line}")
+        return report
+
+    def _on_signal(self, signum, frame) -> None:
+        if signum == signal.SIGUSR1:
+            self._report_requested = True
+        else:
+            self._stop = True
+
+    def _shutdown(self) -> None:
+        pids = list(self.children) + list(self._retiring)
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.shutdown_timeout_s
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    remaining.discard(pid)
+            time.sleep(0.05)
+        for pid in remaining:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.httpd.server_close()
+
+    def run(self) -> None:
+        """워커를 fork 하고 종료 신호(SIGTERM / Ctrl-C)까지 감독 (블로킹)."""
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+            signal.signal(signum, self._on_signal)
+        gc.collect()
+        gc.freeze()
+        for slot in range(self.workers):
+            self._spawn(slot)
+        host, port = self.address[:2]
+        print(f"[prefork] listening on http://{host}:{port} with {self.workers} workers "
+              f"(threads/worker={self.threads}, frozen torch modules={self.frozen_modules}, pids={sorted(self.children)})")
+        next_report = time.monotonic() + self.memory_report_s if self.memory_report_s > 0 else None
+        try:
+            while not self._stop:
+                self._reap()
+                if self.index_watcher is not None:
+                    now = time.monotonic()
+                    if now - self._last_watch >= self.index_watcher.interval_s:
+                        self._last_watch = now
+                        self.index_watcher.check()
+                if self._report_requested or (next_report is not None and time.monotonic() >= next_report):
+                    self._report_requested = False
+                    self.print_memory_report()
+                    if next_report is not None:
+                        next_report = time.monotonic() + self.memory_report_s
+                time.sleep(0.2)
+        finally:
+            self._shutdown()
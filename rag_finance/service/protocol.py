@@ -0,0 +1,23 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+
+def docs_to_payload(docs: Sequence[Document]) -> List[Dict[str, Any]]:
+    """Document 리스트 → JSON 직렬화 가능한 dict 리스트."""
+    return [{"content": d.page_content, "metadata": dict(d.metadata or {})} for d in docs]
+
+
+def docs_from_payload(items: Iterable[Dict[str, Any]]) -> List[Document]:
+    """docs_to_payload 의 역변환."""
+    return [Document(page_content=it.get("content", ""), metadata=it.get("metadata") or {}) for it in items]
+
+
+def deadline_from_payload(payload: Dict[str, Any]) -> Optional[float]:
+    """요청의 deadline_ms (없거나 0 이하이면 None = 지연 예산 없음). 숫자가 아니면 ValueError."""
+    value = payload.get("deadline_ms")
+    if value in (None, ""):
+        return None
+    value = float(value)
+    return value if value > 0 else None
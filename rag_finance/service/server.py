@@ -0,0 +1,92 @@
+from __future__ import annotations
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+
+from rag_finance.service.engine import ServiceEngine
+from rag_finance.service.protocol import deadline_from_payload, docs_to_payload
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "ServiceHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            return {}
+        data = json.loads(self.rfile.read(length).decode("utf-8"))
+        if not isinstance(data, dict):
+            raise ValueError("request body must be a JSON object")
+        return data
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "stats": self.server.engine.stats()})
+        else:
+            self._send_json(404, {"error": f"unknown path: {self.path}"})
+
+    def do_POST(self) -> None:
+        try:
+            payload = self._read_json()
+        except (ValueError, UnicodeDecodeError) as exc:
+            self._send_json(400, {"error": f"invalid JSON: {exc}"})
+            return
+
+        try:
+            status, body = self._dispatch(payload)
+        except KeyError as exc:
+            status, body = 400, {"error": f"missing field: {exc}"}
+        except ValueError as exc:
+            status, body = 400, {"error": str(exc)}
+        except RuntimeError as exc:
+            status, body = 503, {"error": str(exc)}
+        except Exception as exc:  # pragma: no cover - 서버는 요청 단위 실패로 처리
+            status, body = 500, {"error": f"{type(exc).__name__}: {exc}"}
+        self._send_json(status, body)
+
+    def _dispatch(self, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        engine = self.server.engine
+        if self.path == "/retrieve":
+            docs, dbg = engine.retrieve(
+                str(payload["q"]), int(payload.get("topk", 10)), payload.get("since"), payload.get("until"),
+                deadline_from_payload(payload),
+            )
+            return 200, {"debug": dbg, "documents": docs_to_payload(docs)}
+        if self.path == "/report":
+            return 200, engine.report(payload)
+        return 404, {"error": f"unknown path: {self.path}"}
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            sys.stderr.write("[service] " + (format % args) + "\n")
+
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], engine: ServiceEngine, *, verbose: bool = False) -> None:
+        super().__init__(address, _Handler)
+        self.engine = engine
+        self.verbose = verbose
+
+
+def serve(engine: ServiceEngine, host: str = "127.0.0.1", port: int = 8765, *, verbose: bool = False) -> None:
+    """/retrieve, /report, /health 엔드포인트를 제공하는 로컬 HTTP 서비스를 실행(블로킹)."""
+    httpd = ServiceHTTPServer((host, port), engine, verbose=verbose)
+    print(f"[service] listening on http://{host}:{httpd.server_address[1]}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
@@ -2,7 +2,11 @@ from __future__ import annotations
 
 import importlib
 import os
-from typing import Dict, List, Optional, Tuple
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
 from rag_finance.utils.io_utils import ensure_dir
 from rag_finance.utils.tabular_format import (
@@ -12,6 +16,27 @@ from rag_finance.utils.tabular_format import (
 )
 
 
+@lru_cache(maxsize=None)
+def _reportlab() -> SimpleNamespace:
+    """reportlab 모듈을 프로세스당 한 번만 import (미설치 시 ImportError)."""
+    colors = importlib.import_module("reportlab.lib.colors")
+    pagesizes = importlib.import_module("reportlab.lib.pagesizes")
+    styles_mod = importlib.import_module("reportlab.lib.styles")
+    platypus = importlib.import_module("reportlab.platypus")
+    return SimpleNamespace(
+        colors=colors,
+        A4=pagesizes.A4,
+        getSampleStyleSheet=styles_mod.getSampleStyleSheet,
+        ParagraphStyle=styles_mod.ParagraphStyle,
+        Paragraph=platypus.Paragraph,
+        SimpleDocTemplate=platypus.SimpleDocTemplate,
+        Spacer=platypus.Spacer,
+        Table=platypus.Table,
+        TableStyle=platypus.TableStyle,
+    )
+
+
+@lru_cache(maxsize=None)
 def _ensure_base_font() -> str:
     try:
         pdfmetrics = importlib.import_module("reportlab.pdfbase.pdfmetrics")
@@ -41,55 +66,39 @@ def _ensure_base_font() -> str:
     return "Helvetica"
 
 
-def _build_table(data: List[List[str]], font_name: str):
-    colors = importlib.import_module("reportlab.lib.colors")
-    platypus = importlib.import_module("reportlab.platypus")
-    Table = getattr(platypus, "Table")
-    TableStyle = getattr(platypus, "TableStyle")
-
-    table = Table(data, repeatRows=1)
-    table.setStyle(
-        TableStyle(
-            [
-                ("FONTNAME", (0, 0), (-1, -1), font_name),
-                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                ("TOPPADDING", (0, 1), (-1, -1), 4),
-                ("BOTTOMPADDING", (0, 1), (-1, -1), 4),
-            ]
-        )
+@lru_cache(maxsize=None)
+def _table_style(font_name: str):
+    rl = _reportlab()
+    colors = rl.colors
+    return rl.TableStyle(
+        [
+            ("FONTNAME", (0, 0), (-1, -1), font_name),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+            ("TOPPADDING", (0, 1), (-1, -1), 4),
+            ("BOTTOMPADDING", (0, 1), (-1, -1), 4),
+        ]
     )
-    return table
 
 
-def export_report_pdf(
-    output_path: str,
-    sections: Dict[str, str],
-    tabular_payload: Optional[Dict[str, object]] = None,
-) -> None:
-    try:
-        colors = importlib.import_module("reportlab.lib.colors")
-        pagesizes = importlib.import_module("reportlab.lib.pagesizes")
-        styles_mod = importlib.import_module("reportlab.lib.styles")
-        platypus = importlib.import_module("reportlab.platypus")
-    except ImportError as exc:  # pragma: no cover - optional dependency
-        raise RuntimeError("reportlab 패키지를 설치해야 PDF 출력이 가능합니다.") from exc
+def _build_table(data: List[List[str]], font_name: str):
+    table = _reportlab().Table(data, repeatRows=1)
+    table.setStyle(_table_style(font_name))
+    return table
 
-    ensure_dir(os.path.dirname(output_path) or ".")
-    base_font = _ensure_base_font()
 
-    getSampleStyleSheet = getattr(styles_mod, "getSampleStyleSheet")
-    ParagraphStyle = getattr(styles_mod, "ParagraphStyle")
-    Paragraph = getattr(platypus, "Paragraph")
-    SimpleDocTemplate = getattr(platypus, "SimpleDocTemplate")
-    Spacer = getattr(platypus, "Spacer")
-    A4 = getattr(pagesizes, "A4")
+@lru_cache(maxsize=None)
+def _paragraph_styles(base_font: str) -> Dict[str, object]:
+    """base_font 별 ParagraphStyle 묶음(프로세스당 한 번 생성)."""
+    rl = _reportlab()
+    ParagraphStyle = rl.ParagraphStyle
+    colors = rl.colors
 
-    styles = getSampleStyleSheet()
+    styles = rl.getSampleStyleSheet()
     title_style = ParagraphStyle(
         "ReportTitle",
         parent=styles["Title"],
@@ -132,6 +141,39 @@ def export_report_pdf(
         leftIndent=14,
         bulletIndent=6,
     )
+    return {
+        "title": title_style,
+        "section_title": section_title_style,
+        "subheading": subheading_style,
+        "body": body_style,
+        "bullet": bullet_style,
+    }
+
+
+def export_report_pdf(
+    output_path: str,
+    sections: Dict[str, str],
+    tabular_payload: Optional[Dict[str, object]] = None,
+) -> None:
+    try:
+        rl = _reportlab()
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("reportlab 패키지를 설치해야 PDF 출력이 가능합니다.") from exc
+
+    ensure_dir(os.path.dirname(output_path) or ".")
+    base_font = _ensure_base_font()
+
+    Paragraph = rl.Paragraph
+    SimpleDocTemplate = rl.SimpleDocTemplate
+    Spacer = rl.Spacer
+    A4 = rl.A4
+
+    styles = _paragraph_styles(base_font)
+    title_style = styles["title"]
+    section_title_style = styles["section_title"]
+    subheading_style = styles["subheading"]
+    body_style = styles["body"]
+    bullet_style = styles["bullet"]
 
     doc = SimpleDocTemplate(
         output_path,
@@ -238,3 +280,53 @@ def _parse_markdown_table(section_text: str) -> Tuple[List[List[str]], List[str]
         normalized.append(row)
 
     return normalized, other_lines
+
+
+class PdfJob(NamedTuple):
+    output_path: str
+    sections: Dict[str, str]
+    tabular_payload: Optional[Dict[str, object]] = None
+
+
+class PdfResult(NamedTuple):
+    output_path: str
+    seconds: float
+    error: str = ""
+
+
+def init_pdf_worker() -> None:
+    """워커 시작 시 reportlab import, 폰트 등록, 스타일 생성을 한 번만 수행."""
+    try:
+        _paragraph_styles(_ensure_base_font())
+    except ImportError:  # pragma: no cover - optional dependency
+        pass
+
+
+def _render_job(job: PdfJob) -> PdfResult:
+    start = time.perf_counter()
+    try:
+        export_report_pdf(job.output_path, job.sections, job.tabular_payload)
+    except Exception as exc:  # pragma: no cover - 문서 단위 실패로 보고
+        return PdfResult(job.output_path, time.perf_counter() - start, f"{type(exc).__name__}: {exc}")
+    return PdfResult(job.output_path, time.perf_counter() - start)
+
+
+def export_reports_pdf_batch(jobs: Sequence[PdfJob], max_workers: Optional[int] = None) -> Iterator[PdfResult]:
+    """
+    여러 리포트를 프로세스 풀에서 병렬로 PDF 렌더링.
+    워커마다 폰트/스타일을 한 번만 준비하고, 각 PDF 는 완료되는 즉시 디스크에 기록되며
+    (출력 경로, 렌더 시간, 에러) 결과를 완료 순서대로 yield 한다.
+    max_workers=1 이면 현재 프로세스에서 순차 처리.
+    """
+    if not jobs:
+        return
+    if max_workers == 1 or len(jobs) == 1:
+        init_pdf_worker()
+        for job in jobs:
+            yield _render_job(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_pdf_worker) as pool:
+        futures = [pool.submit(_render_job, job) for job in jobs]
+        for fut in as_completed(futures):
+            yield fut.result()
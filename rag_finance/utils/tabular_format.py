@@ -1,7 +1,14 @@
 from __future__ import annotations
 
+import json
+import os
+import statistics
+import sys
 from typing import Any, Dict, List, Optional
 
+from rag_finance.entities.company_maps import names_for_code, resolve_company_code
+from rag_finance.utils.io_utils import read_json
+
 
 def _humanize_number(value: Any) -> str:
     if isinstance(value, int):
@@ -16,7 +23,7 @@ def _humanize_number(value: Any) -> str:
     return str(value)
 
 
-def _format_percent_change(current: Any, previous: Any) -> Optional[str]:
+def _percent_change(current: Any, previous: Any) -> Optional[float]:
     try:
         cur = float(current)
         prev = float(previous)
@@ -24,22 +31,141 @@ def _format_percent_change(current: Any, previous: Any) -> Optional[str]:
         return None
     if prev == 0:
         return None
-    change = ((cur - prev) / abs(prev)) * 100.0
-    sign = "+" if change >= 0 else ""
-    return f"{sign}{change:.1f}%"
+    return ((cur - prev) / abs(prev)) * 100.0
 
 
-def _format_absolute_change(current: Any, previous: Any) -> Optional[str]:
+def _absolute_change(current: Any, previous: Any) -> Optional[float]:
     try:
-        cur = float(current)
-        prev = float(previous)
+        return float(current) - float(previous)
     except (TypeError, ValueError):
         return None
-    diff = cur - prev
+
+
+def _fmt_percent(change: Optional[float]) -> Optional[str]:
+    if change is None:
+        return None
+    sign = "+" if change >= 0 else ""
+    return f"{sign}{change:.1f}%"
+
+
+def _fmt_absolute(diff: Optional[float]) -> Optional[str]:
+    if diff is None:
+        return None
     sign = "+" if diff >= 0 else ""
     return f"{sign}{_humanize_number(diff)}"
 
 
+def compute_derived_metrics(payload: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    finance/stock 원본에서 파생 지표를 미리 계산한다(컴파일된 tabular 스토어에 저장되는 값).
+    - finance[year]: revenue_yoy / operating_yoy (직전 보유 연도 대비 %), margin (%)
+    - stock: monthly_returns (전월 대비 %), volatility (월간 수익률 표준편차, %),
+             last_change_abs / last_change_pct (최근 2개월 종가 변화)
+    """
+    derived: Dict[str, Any] = {}
+    if not payload:
+        return derived
+
+    finance_data = payload.get("finance")
+    if isinstance(finance_data, dict) and finance_data:
+        years = sorted(finance_data.keys(), reverse=True)
+        finance_derived: Dict[str, Dict[str, Optional[float]]] = {}
+        for idx, year in enumerate(years):
+            metrics = finance_data.get(year) or {}
+            if not isinstance(metrics, dict):
+                continue
+            margin = metrics.get("영업이익률")
+            if not isinstance(margin, (int, float)):
+                try:
+                    revenue = float(metrics.get("매출액"))
+                    margin = float(metrics.get("영업이익")) / revenue * 100.0 if revenue else None
+                except (TypeError, ValueError):
+                    margin = None
+            row: Dict[str, Optional[float]] = {"margin": margin, "revenue_yoy": None, "operating_yoy": None}
+            if idx + 1 < len(years):
+                prev_metrics = finance_data.get(years[idx + 1]) or {}
+                if isinstance(prev_metrics, dict):
+                    row["revenue_yoy"] = _percent_change(metrics.get("매출액"), prev_metrics.get("매출액"))
+                    row["operating_yoy"] = _percent_change(metrics.get("영업이익"), prev_metrics.get("영업이익"))
+            finance_derived[str(year)] = row
+        derived["finance"] = finance_derived
+
+    stock_data = payload.get("stock")
+    monthly = stock_data.get("monthly_prices") if isinstance(stock_data, dict) else None
+    if isinstance(monthly, dict) and monthly:
+        items = sorted(monthly.items())
+        returns: Dict[str, float] = {}
+        for (_, prev_price), (month, price) in zip(items, items[1:]):
+            change = _percent_change(price, prev_price)
+            if change is not None:
+                returns[month] = change
+        stock_derived: Dict[str, Any] = {"monthly_returns": returns, "volatility": None}
+        if len(returns) >= 2:
+            stock_derived["volatility"] = statistics.stdev(returns.values())
+        if len(items) >= 2:
+            stock_derived["last_change_abs"] = _absolute_change(items[-1][1], items[-2][1])
+            stock_derived["last_change_pct"] = _percent_change(items[-1][1], items[-2][1])
+        derived["stock"] = stock_derived
+
+    return derived
+
+
+def load_tabular_payload(
+    tabular_source: Optional[str],
+    company: Optional[str],
+    code: Optional[str] = None,
+) -> Optional[Dict[str, object]]:
+    """
+    정형 데이터 payload 조회.
+    - tabular_source 가 파일이면 컴파일된 tabular 스토어(scripts.build_tabular_store)에서 코드/기업명으로 조회
+    - 디렉터리면 finance_{기업}.json / stock_{기업}.json 을 직접 읽는다(별칭 표기도 탐색)
+    """
+    if not tabular_source:
+        return None
+    if not company and not code:
+        print("[tabular] 기업명을 찾지 못해 tabular 데이터를 건너뜁니다.", file=sys.stderr)
+        return None
+
+    if os.path.isfile(tabular_source):
+        from rag_finance.utils.tabular_store import open_tabular_store
+
+        payload = open_tabular_store(tabular_source).get(company, code)
+        if payload is None:
+            print(f"[tabular] tabular 데이터를 찾지 못했습니다 (company={company}, code={code}).", file=sys.stderr)
+        return payload
+
+    if not os.path.isdir(tabular_source):
+        print(f"[tabular] tabular_dir가 존재하지 않습니다: {tabular_source}", file=sys.stderr)
+        return None
+
+    candidates: List[str] = []
+    for name in [company or ""] + names_for_code(code or resolve_company_code(company or "")):
+        normalized = name.replace(" ", "")
+        if normalized and normalized not in candidates:
+            candidates.append(normalized)
+
+    payload: Dict[str, object] = {"company": company or (candidates[0] if candidates else "")}
+    loaded_any = False
+
+    for kind, label in (("finance", "재무"), ("stock", "주가")):
+        for normalized in candidates:
+            path = os.path.join(tabular_source, f"{kind}_{normalized}.json")
+            if not os.path.isfile(path):
+                continue
+            try:
+                payload[kind] = read_json(path)
+                loaded_any = True
+                break
+            except (OSError, json.JSONDecodeError) as exc:
+                print(f"[tabular] {label} JSON을 읽지 못했습니다 ({path}): {exc}", file=sys.stderr)
+
+    if not loaded_any:
+        print(f"[tabular] tabular 데이터를 찾지 못했습니다 (company={company}).", file=sys.stderr)
+        return None
+
+    return payload
+
+
 def format_tabular_prompt(
     payload: Optional[Dict[str, Any]],
     *,
@@ -49,6 +175,13 @@ def format_tabular_prompt(
     if not payload:
         return ""
 
+    # 컴파일된 tabular 스토어 payload 는 파생 지표를 이미 포함한다.
+    derived = payload.get("derived")
+    if not isinstance(derived, dict):
+        derived = compute_derived_metrics(payload)
+    finance_derived = derived.get("finance") or {}
+    stock_derived = derived.get("stock") or {}
+
     sections: List[str] = []
 
     finance_data = payload.get("finance")
@@ -62,15 +195,14 @@ def format_tabular_prompt(
                 continue
             revenue = metrics.get("매출액")
             operating = metrics.get("영업이익")
-            margin = metrics.get("영업이익률")
+            year_derived = finance_derived.get(str(year)) or {}
+            margin = year_derived.get("margin")
 
             rev_change = None
             op_change = None
             if idx + 1 < len(selected_years):
-                prev_year_key = selected_years[idx + 1]
-                prev_metrics = finance_data.get(prev_year_key, {}) or {}
-                rev_change = _format_percent_change(revenue, prev_metrics.get("매출액"))
-                op_change = _format_percent_change(operating, prev_metrics.get("영업이익"))
+                rev_change = _fmt_percent(year_derived.get("revenue_yoy"))
+                op_change = _fmt_percent(year_derived.get("operating_yoy"))
 
             margin_txt = f"영업이익률 {margin:.2f}%" if isinstance(margin, (int, float)) else "영업이익률 정보 없음"
             line_parts = [
@@ -125,10 +257,10 @@ def format_tabular_prompt(
                 month_lines = [f"{month}: {_humanize_number(price)}" for month, price in monthly_items]
                 stock_lines.append("최근 월별 종가: " + "; ".join(month_lines))
                 if len(monthly_items) >= 2:
-                    last_month, last_price = monthly_items[-1]
-                    prev_month, prev_price = monthly_items[-2]
-                    abs_change = _format_absolute_change(last_price, prev_price)
-                    pct_change = _format_percent_change(last_price, prev_price)
+                    last_month, _ = monthly_items[-1]
+                    prev_month, _ = monthly_items[-2]
+                    abs_change = _fmt_absolute(stock_derived.get("last_change_abs"))
+                    pct_change = _fmt_percent(stock_derived.get("last_change_pct"))
                     trend_parts = []
                     if abs_change:
                         trend_parts.append(f"전월 대비 {abs_change}")
@@ -137,6 +269,10 @@ def format_tabular_prompt(
                     if trend_parts:
                         stock_lines.append(f"최근 추세: {prev_month}→{last_month}, " + ", ".join(trend_parts))
 
+        volatility = stock_derived.get("volatility")
+        if isinstance(volatility, (int, float)):
+            stock_lines.append(f"월간 수익률 변동성 {volatility:.2f}%")
+
         if stock_lines:
             sections.append("\n".join(stock_lines))
 
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from rag_finance.entities.company_maps import CODE_TO_NAME, names_for_code, resolve_company_code
+from rag_finance.utils.io_utils import ensure_dir, read_json
+from rag_finance.utils.tabular_format import compute_derived_metrics
+
+STORE_SCHEMA_VERSION = 1
+_KINDS = ("finance", "stock")
+
+
+def _norm_name(name: str) -> str:
+    return (name or "").replace(" ", "")
+
+
+def compile_tabular_store(tabular_dir: str, out_path: str) -> Dict[str, Any]:
+    """
+    tabular_db/ 의 finance_{기업}.json, stock_{기업}.json 을 하나의 SQLite 파일로 컴파일.
+    - 종목코드를 키로 사용(별칭은 COMPANY_ALIASES 로 해석, 코드 미상이면 기업명을 키로 사용)
+    - 파생 지표(YoY, 이익률, 월간 수익률, 변동성)를 미리 계산해 payload["derived"] 에 저장
+    - 임시 파일에 쓴 뒤 os.replace 로 교체(읽는 쪽이 반쯤 쓰인 파일을 보지 않도록)
+    반환: {"path", "companies", "unresolved"}
+    """
+    if not os.path.isdir(tabular_dir):
+        raise FileNotFoundError(f"tabular_dir not found: {tabular_dir}")
+
+    payloads: Dict[str, Dict[str, Any]] = {}
+    aliases: Dict[str, str] = {}
+    unresolved: List[str] = []
+
+    for entry in sorted(os.listdir(tabular_dir)):
+        stem, ext = os.path.splitext(entry)
+        kind, _, name = stem.partition("_")
+        if ext.lower() != ".json" or kind not in _KINDS or not name:
+            continue
+        code = resolve_company_code(name)
+        key = code or _norm_name(name)
+        if not code and name not in unresolved:
+            unresolved.append(name)
+
+        payload = payloads.setdefault(key, {"company": CODE_TO_NAME.get(code, name), "company_code": code})
+        payload[kind] = read_json(os.path.join(tabular_dir, entry))
+        aliases[_norm_name(name)] = key
+        for alias in names_for_code(code):
+            aliases[_norm_name(alias)] = key
+
+    for payload in payloads.values():
+        payload["derived"] = compute_derived_metrics(payload)
+
+    ensure_dir(os.path.dirname(out_path) or ".")
+    tmp_path = out_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(
+            """
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE companies (key TEXT PRIMARY KEY, payload TEXT NOT NULL);
+            CREATE TABLE aliases (name TEXT PRIMARY KEY, key TEXT NOT NULL);
+            """
+        )
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [
+                ("schema_version", str(STORE_SCHEMA_VERSION)),
+                ("source_dir", os.path.abspath(tabular_dir)),
+                ("built_at", datetime.now(timezone.utc).isoformat()),
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO companies VALUES (?, ?)",
+            [(k, json.dumps(v, ensure_ascii=False)) for k, v in payloads.items()],
+        )
+        conn.executemany("INSERT INTO aliases VALUES (?, ?)", list(aliases.items()))
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, out_path)
+
+    return {"path": out_path, "companies": len(payloads), "unresolved": unresolved}
+
+
+class TabularStore:
+    """
+    compile_tabular_store 결과를 프로세스당 한 번 열어 메모리 dict 로 들고 있는 조회 객체.
+    get() 은 종목코드 또는 기업명(별칭 포함)으로 O(1) 조회한다.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        uri = Path(path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            if int(meta.get("schema_version", 0)) != STORE_SCHEMA_VERSION:
+                raise ValueError(f"unsupported tabular store schema: {meta.get('schema_version')} ({path})")
+            self.meta: Dict[str, str] = meta
+            self._payloads: Dict[str, Dict[str, Any]] = {
+                key: json.loads(raw) for key, raw in conn.execute("SELECT key, payload FROM companies")
+            }
+            self._aliases: Dict[str, str] = dict(conn.execute("SELECT name, key FROM aliases"))
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def get(self, company: Optional[str] = None, code: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        key = code if code and code in self._payloads else self._aliases.get(_norm_name(company or ""))
+        payload = self._payloads.get(key or "")
+        return dict(payload) if payload is not None else None
+
+
+@lru_cache(maxsize=None)
+def open_tabular_store(path: str) -> TabularStore:
+    """경로별로 한 번만 여는 TabularStore (프로세스 캐시)."""
+    return TabularStore(path)
@@ -7,6 +7,7 @@ _WS_RE = re.compile(r"\s+")
 _URL_RE = re.compile(r"https?://\S+")
 _ONLY_NUM_RE = re.compile(r"^\d{1,4}[.,]?\d*\s*$")
 _SEPARATOR_RE = re.compile(r"^[-=•■●◆▶▷◀]+$")
+_NOISE_RE = re.compile(r"(기사원문 링크|ⓒ|출처|저작권자|링크|원문|자료:|사진=|이미지=)")
 
 
 def normalize_space(s: str) -> str:
@@ -34,22 +35,23 @@ def length_penalty(text_len: int) -> float:
     return 1.0 / (1.0 + math.log1p(L))
 
 
+def is_noisy_line(stripd: str) -> bool:
+    """strip 된 한 줄이 노이즈(빈 줄/저작권·출처 문구/구분선/숫자-only/5자 미만)인지."""
+    return (
+        len(stripd) < 5
+        or _NOISE_RE.search(stripd) is not None
+        or _SEPARATOR_RE.match(stripd) is not None
+        or _ONLY_NUM_RE.match(stripd) is not None
+    )
+
+
 def remove_noisy_lines(lines: Iterable[str]) -> List[str]:
     """
     전처리 공통 필터: 빈 줄, 저작권/출처 문구, 구분선, 숫자-only 라인 제거.
     """
     out: List[str] = []
     for line in lines:
-        if not line or not line.strip():
-            continue
-        stripd = line.strip()
-        if re.search(r"(기사원문 링크|ⓒ|출처|저작권자|링크|원문|자료:|사진=|이미지=)", stripd):
-            continue
-        if _SEPARATOR_RE.match(stripd):
-            continue
-        if _ONLY_NUM_RE.match(stripd):
-            continue
-        if len(stripd) < 5:
-            continue
-        out.append(stripd)
+        stripd = (line or "").strip()
+        if not is_noisy_line(stripd):
+            out.append(stripd)
     return out
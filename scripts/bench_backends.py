@@ -0,0 +1,162 @@
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from rag_finance.config import load_config
+from rag_finance.entities.company_maps import COMPANY_LIST
+from rag_finance.indexing.faiss_index import _build_embedding
+from rag_finance.inference.onnx_backend import DEFAULT_ONNX_DIR, load_onnx_cross_encoder
+from rag_finance.retrieval.reranker_ce import CrossEncoderReranker
+
+_TOPICS = ["HBM 동향", "실적 전망", "수주 현황", "주가 흐름", "신제품 출시", "DRAM 가격", "설비 투자", "파운드리 경쟁"]
+_FALLBACK_TEXTS = [
+    "삼성전자는 HBM3E 12단 제품의 양산을 시작했으며 주요 고객사 인증을 진행 중이다.",
+    "SK하이닉스의 1분기 영업이익은 시장 예상치를 웃돌았고 DRAM 가격 반등이 실적을 견인했다.",
+    "정부는 반도체 설비 투자에 대한 세액 공제를 확대하는 방안을 발표했다.",
+    "현대차는 전기차 전용 공장 착공과 함께 배터리 조달처 다변화를 추진하고 있다.",
+    "NAND 재고 조정이 마무리 국면에 접어들며 하반기 업황 개선 기대가 커지고 있다.",
+    "LG에너지솔루션은 북미 합작 공장의 가동률 상승으로 매출이 증가했다.",
+]
+
+# 백엔드별 통과 기준 (int8 은 점수 자체보다 순위 보존을 본다)
+_GATES = {
+    "onnx": {"cos_min": 0.999, "knn_overlap": 0.99, "ce_spearman": 0.999, "ce_top_overlap": 0.99},
+    "onnx-int8": {"cos_min": 0.98, "knn_overlap": 0.9, "ce_spearman": 0.95, "ce_top_overlap": 0.9},
+}
+
+
+def _corpus_texts(cfg, n: int) -> List[str]:
+    """저장된 인덱스의 청크를 샘플로 사용 (없으면 내장 문장)."""
+    path = os.path.join(cfg["paths"]["indexes_dir"], "all")
+    if os.path.isdir(path):
+        from langchain_community.vectorstores import FAISS
+        from rag_finance.retrieval.scatter import VectorOnlyEmbeddings
+
+        vs = FAISS.load_local(path, VectorOnlyEmbeddings(), allow_dangerous_deserialization=True)
+        texts = [d.page_content for d in vs.docstore._dict.values()]
+        step = max(1, len(texts) // n)
+        return texts[::step][:n]
+    return (_FALLBACK_TEXTS * (n // len(_FALLBACK_TEXTS) + 1))[:n]
+
+
+def _queries(n: int) -> List[str]:
+    return [f"{COMPANY_LIST[i % len(COMPANY_LIST)]} {_TOPICS[i % len(_TOPICS)]}" for i in range(n)]
+
+
+def _spearman(a: np.ndarray, b: np.ndarray) -> float:
+    ra = np.argsort(np.argsort(a)).astype(np.float64)
+    rb = np.argsort(np.argsort(b)).astype(np.float64)
+    if ra.std() == 0 or rb.std() == 0:
+        return 1.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def _overlap(a: np.ndarray, b: np.ndarray, k: int) -> float:
+    k = min(k, len(a))
+    top_a = set(np.argsort(-a)[:k].tolist())
+    top_b = set(np.argsort(-b)[:k].tolist())
+    return len(top_a & top_b) / max(1, k)
+
+
+def _timed(fn, *args) -> Tuple[object, float]:
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def _check(backend: str, metrics: Dict[str, float]) -> List[str]:
+    return [f"{name}={metrics[name]:.4f} < {limit}" for name, limit in _GATES[backend].items() if name in metrics and metrics[name] < limit]
+
+
+def bench_embedding(cfg, texts: List[str], queries: List[str], backends: List[str], threads: int) -> int:
+    emb_cfg = cfg["embedding"]
+    common = dict(model_name=emb_cfg["model_name"], device="cpu", normalize=emb_cfg["normalize"], threads=threads)
+    ref = _build_embedding(backend="torch", **common)
+    ref_docs, t_ref = _timed(lambda: np.asarray(ref.embed_documents(texts), dtype=np.float32))
+    ref_q = np.asarray([ref.embed_query(q) for q in queries], dtype=np.float32)
+    print(f"[bench_backends] embedding torch: {len(texts) / t_ref:.1f} texts/s")
+
+    failed = 0
+    for backend in backends:
+        model = _build_embedding(backend=backend, onnx_dir=emb_cfg.get("onnx_dir", DEFAULT_ONNX_DIR), **common)
+        got_docs, t_new = _timed(lambda: np.asarray(model.embed_documents(texts), dtype=np.float32))
+        got_q = np.asarray([model.embed_query(q) for q in queries], dtype=np.float32)
+        cos = (ref_docs * got_docs).sum(1) / (np.linalg.norm(ref_docs, axis=1) * np.linalg.norm(got_docs, axis=1) + 1e-12)
+        # 실제 검색 관점: 질의별 top-10 이웃이 얼마나 유지되는지
+        knn = float(np.mean([_overlap(ref_docs @ rq, got_docs @ gq, 10) for rq, gq in zip(ref_q, got_q)]))
+        metrics = {"cos_min": float(cos.min()), "cos_mean": float(cos.mean()), "knn_overlap": knn}
+        bad = _check(backend, metrics)
+        failed += bool(bad)
+        print(
+            f"[bench_backends] embedding {backend:9s}: {len(texts) / t_new:.1f} texts/s (x{t_ref / t_new:.2f}) "
+            f"cos_min={metrics['cos_min']:.5f} cos_mean={metrics['cos_mean']:.5f} knn@10={knn:.3f} "
+            f"{'FAIL ' + '; '.join(bad) if bad else 'ok'}"
+        )
+    return failed
+
+
+def bench_cross_encoder(cfg, texts: List[str], queries: List[str], backends: List[str], threads: int) -> int:
+    ce_cfg = cfg["retrieval"]["ce"]
+    bs = int(ce_cfg.get("batch_size", 32))
+    pairs = [(q, t) for q in queries for t in texts]
+    ref = CrossEncoderReranker(ce_cfg["model_name"], device="cpu", batch_size=bs, backend="torch", threads=threads)
+    ref_scores, t_ref = _timed(lambda: np.asarray(ref.model.predict(pairs, batch_size=bs, convert_to_numpy=True)))
+    print(f"[bench_backends] cross-encoder torch: {len(pairs) / t_ref:.1f} pairs/s")
+
+    failed = 0
+    n = len(texts)
+    for backend in backends:
+        model = load_onnx_cross_encoder(
+            ce_cfg["model_name"], backend, ce_cfg.get("onnx_dir", DEFAULT_ONNX_DIR), threads=threads, batch_size=bs,
+        )
+        got, t_new = _timed(model.predict, pairs)
+        per_q = [(ref_scores[i * n:(i + 1) * n], got[i * n:(i + 1) * n]) for i in range(len(queries))]
+        metrics = {
+            "max_abs": float(np.abs(ref_scores - got).max()),
+            "ce_spearman": float(np.mean([_spearman(a, b) for a, b in per_q])),
+            "ce_top_overlap": float(np.mean([_overlap(a, b, 10) for a, b in per_q])),
+        }
+        bad = _check(backend, metrics)
+        failed += bool(bad)
+        print(
+            f"[bench_backends] cross-encoder {backend:9s}: {len(pairs) / t_new:.1f} pairs/s (x{t_ref / t_new:.2f}) "
+            f"max_abs={metrics['max_abs']:.5f} spearman={metrics['ce_spearman']:.4f} "
+            f"top10={metrics['ce_top_overlap']:.3f} {'FAIL ' + '; '.join(bad) if bad else 'ok'}"
+        )
+    return failed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="torch 대비 ONNX/INT8 백엔드 정확도 parity 및 CPU 처리량 비교")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--which", choices=["embedding", "reranker", "all"], default="all")
+    ap.add_argument("--backends", type=str, default="onnx,onnx-int8")
+    ap.add_argument("--texts", type=int, default=256, help="임베딩 비교용 청크 수")
+    ap.add_argument("--queries", type=int, default=16)
+    ap.add_argument("--ce-docs", type=int, default=32, help="질의당 cross-encoder 후보 수")
+    ap.add_argument("--threads", type=int, default=0)
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    texts = _corpus_texts(cfg, args.texts)
+    queries = _queries(args.queries)
+    print(f"[bench_backends] texts={len(texts)} queries={len(queries)} threads={args.threads or 'default'}")
+
+    failed = 0
+    if args.which in ("embedding", "all"):
+        failed += bench_embedding(cfg, texts, queries, backends, args.threads)
+    if args.which in ("reranker", "all"):
+        failed += bench_cross_encoder(cfg, texts[:args.ce_docs], queries, backends, args.threads)
+    if failed:
+        print(f"[bench_backends] parity FAILED for {failed} backend(s)", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import argparse
+import copy
+import sys
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from rag_finance.config import load_config
+from rag_finance.entities.company_maps import COMPANY_LIST
+from rag_finance.indexing.faiss_index import build_embedding_from_config
+from rag_finance.retrieval.pipeline import (
+    build_bm25_retriever,
+    build_cascade_reranker,
+    build_reranker,
+    load_vectorstore,
+    retrieve_with_keywords,
+)
+
+_TOPICS = ["HBM 동향", "실적 전망", "수주 현황", "주가 흐름", "신제품 출시", "DRAM 가격", "설비 투자", "파운드리 경쟁"]
+
+
+class _Metered:
+    """predict 호출의 쌍 수와 소요 시간을 누적 (CE 연산량 비교용)."""
+
+    def __init__(self, base) -> None:
+        self.base = base
+        self.pairs = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def predict(self, pairs):
+        start = time.perf_counter()
+        out = self.base.predict(pairs)
+        with self._lock:
+            self.pairs += len(pairs)
+            self.seconds += time.perf_counter() - start
+        return out
+
+    def reset(self) -> None:
+        self.pairs, self.seconds = 0, 0.0
+
+
+def _keys(docs) -> List[Tuple[str, str]]:
+    return [(str(d.metadata.get("file_name", "")), str(d.metadata.get("chunk_index", ""))) for d in docs]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="CE cascade(작은 CE → 본 CE) vs 전체 CE: top-k 보존율과 CE 연산량 비교")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--keep", type=str, default="20,30,50", help="비교할 keep_n 목록")
+    ap.add_argument("--queries", type=int, default=24)
+    ap.add_argument("--topk", type=int, default=10)
+    ap.add_argument("--min-recall", type=float, default=0.9, help="가장 큰 keep_n 의 평균 recall@k 가 이보다 낮으면 exit 1")
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    ce_cfg = cfg["retrieval"]["ce"]
+    casc_cfg = ce_cfg.get("cascade", {}) or {}
+    embedding = build_embedding_from_config(cfg["embedding"])
+    vs = load_vectorstore(cfg["paths"]["indexes_dir"], embedding)
+    bm25 = build_bm25_retriever(vs)
+    main_ce = _Metered(build_reranker(ce_cfg))
+    cheap_ce = _Metered(build_cascade_reranker(casc_cfg))
+    queries = [f"{COMPANY_LIST[i % len(COMPANY_LIST)]} {_TOPICS[i % len(_TOPICS)]}" for i in range(args.queries)]
+
+    def run(keep_n: int) -> Dict[str, object]:
+        run_cfg = copy.deepcopy(cfg)
+        run_cfg["retrieval"]["ce"]["cascade"] = {**casc_cfg, "enable": keep_n > 0, "keep_n": keep_n}
+        main_ce.reset()
+        cheap_ce.reset()
+        results = {}
+        for q in queries:
+            docs, _ = retrieve_with_keywords(
+                q, run_cfg, embedding, topk=args.topk, show_progress=False,
+                vectorstore=vs, bm25_retriever=bm25, reranker=main_ce, cascade_reranker=cheap_ce,
+            )
+            results[q] = _keys(docs)
+        n = len(queries)
+        return {
+            "results": results,
+            "main_pairs": main_ce.pairs / n,
+            "cheap_pairs": cheap_ce.pairs / n,
+            "ce_ms": (main_ce.seconds + cheap_ce.seconds) / n * 1000,
+        }
+
+    full = run(0)
+    print(
+        f"[bench_cascade] full CE       : CE pairs/q={full['main_pairs']:.0f} "
+        f"CE time/q={full['ce_ms']:.1f}ms (queries={len(queries)}, topk={args.topk})"
+    )
+    last_recall = 1.0
+    for keep_n in (int(x) for x in args.keep.split(",")):
+        casc = run(keep_n)
+        recalls, top1 = [], 0
+        for q in queries:
+            ref, got = full["results"][q], casc["results"][q]
+            recalls.append(len(set(ref) & set(got)) / max(1, len(ref)))
+            top1 += bool(ref) and bool(got) and ref[0] == got[0]
+        last_recall = sum(recalls) / len(recalls)
+        print(
+            f"[bench_cascade] keep_n={keep_n:<6d}: recall@{args.topk}={last_recall:.3f} "
+            f"min={min(recalls):.2f} top1={top1 / len(queries):.2f}  "
+            f"big-CE pairs/q={casc['main_pairs']:.0f} (x{full['main_pairs'] / max(1e-9, casc['main_pairs']):.1f} fewer) "
+            f"small-CE pairs/q={casc['cheap_pairs']:.0f}  CE time/q={casc['ce_ms']:.1f}ms "
+            f"(x{full['ce_ms'] / max(1e-9, casc['ce_ms']):.2f})"
+        )
+    if last_recall < args.min_recall:
+        print(f"[bench_cascade] recall@{args.topk} {last_recall:.3f} < {args.min_recall}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
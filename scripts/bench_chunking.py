@@ -0,0 +1,72 @@
+from __future__ import annotations
+import argparse
+import random
+import sys
+import time
+from typing import List
+
+from rag_finance.chunking.splitter import DEFAULT_SEPARATORS, split_text_offsets
+
+
+def _synthetic_docs(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    words = ["삼성전자", "HBM", "수요", "증가", "영업이익", "DRAM", "가격", "반등", "전망", "2025년", "1분기", "YoY", "+12.3%"]
+    docs = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(5, 120)):
+            sent = " ".join(rng.choice(words) for _ in range(rng.randint(1, 40)))
+            if rng.random() < 0.05:
+                sent += "x" * rng.randint(50, 1200)  # 구분자 없는 긴 토큰
+            parts.append(sent + rng.choice([".", ". ", "\n", "\n\n", "  "]))
+        docs.append("".join(parts))
+    return docs
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offset chunker parity check + throughput vs RecursiveCharacterTextSplitter")
+    ap.add_argument("--raw-dir", type=str, default=None, help="실제 raw 데이터로 검사 (미지정 시 합성 문서)")
+    ap.add_argument("--docs", type=int, default=300, help="합성 문서 수")
+    ap.add_argument("--sizes", type=str, default="800:100,200:50,120:0,50:10", help="size:overlap 목록")
+    args = ap.parse_args()
+
+    if args.raw_dir:
+        from rag_finance.ingestion.loaders import load_and_clean_documents, load_raw_files
+        texts = [r["text"] for r in load_and_clean_documents(load_raw_files(args.raw_dir))]
+    else:
+        texts = _synthetic_docs(args.docs)
+
+    try:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+    except ImportError:
+        RecursiveCharacterTextSplitter = None
+        print("[bench_chunking] langchain 미설치: parity 검사 없이 속도만 측정합니다.")
+
+    total_mb = sum(len(t.encode("utf-8")) for t in texts) / 1e6
+    mismatched = 0
+    for spec in args.sizes.split(","):
+        size, overlap = (int(x) for x in spec.split(":"))
+
+        start = time.perf_counter()
+        offsets = [split_text_offsets(t, size, overlap) for t in texts]
+        t_new = time.perf_counter() - start
+        line = f"[bench_chunking] size={size} overlap={overlap} offsets={t_new:.3f}s ({total_mb / t_new:.1f} MB/s)"
+
+        if RecursiveCharacterTextSplitter is not None:
+            splitter = RecursiveCharacterTextSplitter(
+                separators=list(DEFAULT_SEPARATORS), chunk_size=size, chunk_overlap=overlap,
+            )
+            start = time.perf_counter()
+            expected = [splitter.split_text(t) for t in texts]
+            t_old = time.perf_counter() - start
+            bad = sum(1 for t, spans, exp in zip(texts, offsets, expected) if [t[s:e] for s, e in spans] != exp)
+            mismatched += bad
+            line += f" langchain={t_old:.3f}s speedup={t_old / t_new:.1f}x parity_mismatch={bad}/{len(texts)}"
+        print(line)
+
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
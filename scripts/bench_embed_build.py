@@ -0,0 +1,69 @@
+from __future__ import annotations
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from rag_finance.config import load_config
+from rag_finance.indexing.embed_stage import embed_texts
+from rag_finance.indexing.faiss_index import build_embedding_from_config
+from rag_finance.retrieval.pipeline import load_vectorstore
+
+
+def main():
+    ap = argparse.ArgumentParser(description="build 임베딩 단계: 워커 수별 처리량과 결과 일치, 체크포인트 재개 확인")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--workers", type=str, default="1,2,4", help="비교할 워커 수 목록 (첫 값이 기준)")
+    ap.add_argument("--shard-size", type=int, default=256)
+    ap.add_argument("--repeat", type=int, default=1, help="저장된 인덱스의 청크 텍스트를 몇 번 반복해 쓸지")
+    ap.add_argument("--atol", type=float, default=1e-5)
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    emb_cfg = {k: v for k, v in cfg["embedding"].items() if k != "build"}
+    vs = load_vectorstore(cfg["paths"]["indexes_dir"], build_embedding_from_config(emb_cfg))
+    texts = [d.page_content for d in vs.docstore._dict.values()] * max(1, args.repeat)
+    print(f"[bench_embed_build] chunks={len(texts)} shard_size={args.shard_size} cpus={os.cpu_count()}")
+
+    tmp = tempfile.mkdtemp(prefix="embed_bench_")
+    failed = False
+    try:
+        ref, base_s = None, None
+        for workers in (int(x) for x in args.workers.split(",")):
+            work_dir = os.path.join(tmp, f"w{workers}")
+            start = time.perf_counter()
+            vectors = embed_texts(texts, emb_cfg, work_dir, workers=workers, shard_size=args.shard_size)
+            seconds = time.perf_counter() - start
+            if ref is None:
+                ref, base_s = vectors, seconds
+            diff = float(np.abs(vectors - ref).max()) if vectors.shape == ref.shape else float("inf")
+            failed |= diff > args.atol
+            print(
+                f"[bench_embed_build] workers={workers:<3d} {seconds:7.2f}s  {len(texts) / seconds:8.1f} chunks/s  "
+                f"speedup x{base_s / seconds:.2f}  max|diff|={diff:.2e}"
+            )
+
+        # 재개: 일부 shard 체크포인트를 지우고 다시 실행하면 지운 shard 만 임베딩해야 한다
+        work_dir = os.path.join(tmp, "resume")
+        embed_texts(texts, emb_cfg, work_dir, shard_size=args.shard_size)
+        shard_files = sorted(f for f in os.listdir(work_dir) if f.endswith(".json"))
+        for name in shard_files[len(shard_files) // 2:]:
+            os.remove(os.path.join(work_dir, name))
+        resumed = embed_texts(texts, emb_cfg, work_dir, shard_size=args.shard_size)
+        diff = float(np.abs(resumed - ref).max())
+        failed |= diff > args.atol
+        print(f"[bench_embed_build] resume after dropping {len(shard_files) - len(shard_files) // 2}/{len(shard_files)} shards: max|diff|={diff:.2e}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if failed:
+        print(f"[bench_embed_build] vectors differ by more than {args.atol}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
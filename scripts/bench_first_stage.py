@@ -0,0 +1,68 @@
+from __future__ import annotations
+import argparse
+import statistics
+import sys
+import time
+from typing import List, Tuple
+
+from rag_finance.config import load_config
+from rag_finance.entities.company_maps import COMPANY_LIST
+from rag_finance.indexing.faiss_index import build_embedding_from_config
+from rag_finance.retrieval.first_stage import run_branches
+from rag_finance.retrieval.pipeline import build_bm25_retriever, load_vectorstore
+
+_TOPICS = ["HBM 동향", "실적 전망", "수주 현황", "주가 흐름", "신제품 출시", "DRAM 가격", "설비 투자", "파운드리 경쟁"]
+
+
+def _keys(docs) -> List[Tuple[str, str]]:
+    return [(str(d.metadata.get("file_name", "")), str(d.metadata.get("chunk_index", ""))) for d in docs]
+
+
+def _pct(lat: List[float], q: float) -> float:
+    lat = sorted(lat)
+    return lat[min(len(lat) - 1, int(len(lat) * q))]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="1단계 FAISS+BM25 순차 실행 vs 동시 실행 지연 비교")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--queries", type=int, default=100)
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    retrieval = cfg["retrieval"]
+    workers = int((retrieval.get("first_stage", {}) or {}).get("workers", 4))
+    embedding = build_embedding_from_config(cfg["embedding"])
+    vs = load_vectorstore(cfg["paths"]["indexes_dir"], embedding)
+    faiss_ret = vs.as_retriever(search_kwargs={"k": retrieval["pool_k_faiss"]})
+    bm25 = build_bm25_retriever(vs)
+    bm25.k = retrieval["pool_k_bm25"]
+    queries = [f"{COMPANY_LIST[i % len(COMPANY_LIST)]} {_TOPICS[i % len(_TOPICS)]}" for i in range(args.queries)]
+
+    results = {}
+    for label, concurrent in (("sequential", False), ("concurrent", True)):
+        lat, branch_ms, keys = [], {"faiss": [], "bm25": []}, []
+        for q in queries:
+            start = time.perf_counter()
+            res, timings, _, _ = run_branches(
+                {"faiss": lambda q=q: faiss_ret.invoke(q), "bm25": lambda q=q: bm25.invoke(q)},
+                concurrent=concurrent, workers=workers,
+            )
+            lat.append((time.perf_counter() - start) * 1000.0)
+            for name, ms in timings.items():
+                branch_ms[name].append(ms)
+            keys.append((_keys(res["faiss"]), _keys(res["bm25"])))
+        results[label] = keys
+        print(
+            f"[bench_first_stage] {label:10s} p50={statistics.median(lat):7.2f}ms p95={_pct(lat, 0.95):7.2f}ms  "
+            f"faiss p50={statistics.median(branch_ms['faiss']):.2f}ms bm25 p50={statistics.median(branch_ms['bm25']):.2f}ms"
+        )
+
+    mismatched = sum(1 for a, b in zip(results["sequential"], results["concurrent"]) if a != b)
+    print(f"[bench_first_stage] result mismatches={mismatched}")
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
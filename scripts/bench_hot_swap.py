@@ -0,0 +1,114 @@
+from __future__ import annotations
+import argparse
+import copy
+import os
+import shutil
+import statistics
+import sys
+import threading
+import time
+from typing import List
+
+from rag_finance.config import load_config
+from rag_finance.entities.company_maps import COMPANY_LIST
+from rag_finance.indexing.versions import (
+    BUILD_MANIFEST,
+    current_build,
+    new_build_id,
+    prune,
+    publish,
+    read_manifest,
+    versions_root,
+)
+from rag_finance.service.engine import ServiceEngine
+from rag_finance.utils.io_utils import write_json
+
+_TOPICS = ["HBM 동향", "실적 전망", "수주 현황", "주가 흐름", "신제품 출시", "DRAM 가격", "설비 투자", "파운드리 경쟁"]
+
+
+def _republish(indexes_dir: str, keep: int) -> str:
+    """게시본을 새 build_id 로 복사해 게시 (재임베딩 없이 새 빌드 게시를 흉내낸다)."""
+    src = current_build(indexes_dir)
+    manifest = read_manifest(indexes_dir, build_id=src) or {}
+    time.sleep(1.1)  # build_id 는 초 단위
+    build_id = new_build_id(manifest.get("corpus_hash", "0" * 8))
+    root = versions_root(indexes_dir)
+    shutil.copytree(os.path.join(root, src), os.path.join(root, build_id))
+    write_json(os.path.join(root, build_id, BUILD_MANIFEST), {**manifest, "build_id": build_id})
+    publish(indexes_dir, build_id)
+    prune(indexes_dir, keep=keep)
+    return build_id
+
+
+def main():
+    ap = argparse.ArgumentParser(description="질의 부하 중 새 인덱스 버전 게시 → 엔진 교체 중 실패/지연 확인")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--publishes", type=int, default=3)
+    ap.add_argument("--interval", type=float, default=0.2, help="포인터 확인 주기(초)")
+    args = ap.parse_args()
+
+    cfg = copy.deepcopy(load_config(args.config))
+    cfg["index_versions"] = {**(cfg.get("index_versions", {}) or {}), "watch_interval_s": args.interval}
+    indexes_dir = cfg["paths"]["indexes_dir"]
+    if current_build(indexes_dir) is None:
+        print("[bench_hot_swap] no published build; run scripts.build_index first", file=sys.stderr)
+        sys.exit(1)
+    keep = int(cfg["index_versions"].get("keep", 3))
+
+    engine = ServiceEngine(cfg)
+    queries = [f"{COMPANY_LIST[i % len(COMPANY_LIST)]} {_TOPICS[i % len(_TOPICS)]}" for i in range(64)]
+    stop = threading.Event()
+    lat: List[float] = []
+    errors: List[str] = []
+    builds_seen = set()
+    lock = threading.Lock()
+
+    def client(offset: int) -> None:
+        i = offset
+        while not stop.is_set():
+            q = queries[i % len(queries)] + f" {i}"  # SingleFlight 로 합쳐지지 않게
+            start = time.perf_counter()
+            try:
+                docs, dbg = engine.retrieve(q, topk=5)
+                ok = bool(docs)
+            except Exception as e:
+                ok, dbg = False, {}
+                with lock:
+                    errors.append(repr(e))
+            with lock:
+                lat.append((time.perf_counter() - start) * 1000.0)
+                builds_seen.add(dbg.get("index_build"))
+                if not ok and not errors:
+                    errors.append(f"empty result for {q!r}")
+            i += args.threads
+
+    workers = [threading.Thread(target=client, args=(t,), daemon=True) for t in range(args.threads)]
+    for w in workers:
+        w.start()
+    published = []
+    for _ in range(args.publishes):
+        published.append(_republish(indexes_dir, keep))
+        deadline = time.time() + 30
+        while engine.index.build_id != published[-1] and time.time() < deadline:
+            time.sleep(0.05)
+        print(f"[bench_hot_swap] published {published[-1]} -> engine on {engine.index.build_id}")
+    time.sleep(args.interval * 3)
+    stop.set()
+    for w in workers:
+        w.join()
+    engine.index_watcher.stop()
+
+    lat.sort()
+    print(
+        f"[bench_hot_swap] requests={len(lat)} errors={len(errors)} swaps={engine.index_swaps} "
+        f"builds_seen={len(builds_seen - {None})} p50={statistics.median(lat):.1f}ms p99={lat[int(len(lat) * 0.99)]:.1f}ms"
+    )
+    if errors or engine.index_swaps != args.publishes or engine.index.build_id != published[-1]:
+        for e in errors[:5]:
+            print(f"[bench_hot_swap] {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+from __future__ import annotations
+import argparse
+import random
+import re
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from rag_finance.ingestion.cleaning import clean_lines, clean_text
+from rag_finance.ingestion.html_text import get_html_backend
+from rag_finance.ingestion.loaders import extract_text_from_html_bs4, html_to_clean_text
+from rag_finance.utils.text_utils import normalize_space, strip_urls
+
+# 골든 케이스: 엔티티, 주석, 중첩/미닫힘 태그, script/style/noscript, URL, 노이즈 라인, CDATA, textarea/title 안 마크업
+_GOLDEN_HTML = [
+    "<html><head><title>삼성전자 HBM 리포트</title><style>p{color:red}</style></head>"
+    "<body><p>삼성전자의 HBM3E 공급이 확대되고 있다.</p><script>var a='<p>x</p>';</script>"
+    "<p>자료: 한국거래소</p><p>ⓒ 2025 저작권자</p><div>-----</div><div>1234</div></body></html>",
+    "<div>SK하이닉스 &amp; 삼성전자 &lt;메모리&gt; 점유율 비교 &#8220;상승&#8221;</div><!-- 주석 -->"
+    "<p>원문 보기 https://example.com/a?b=1 이후 내용은 계속된다</p><br/>짧다<br>"
+    "<noscript><p>자바스크립트를 켜 주세요 안내문</p></noscript><ul><li>DRAM 가격 반등 전망<li>NAND 재고 조정 마무리</ul>",
+    "<!DOCTYPE html><table><tr><td>매출액</td><td>79조 원으로 전년 대비 증가</td></tr>"
+    "<tr><td colspan=2>영업이익 <b>6.6조</b> 원 <i>기록</i>했다</td></tr></table>\n\n   <p>   공백이   많은   문장입니다   </p>",
+    "텍스트만 있는 문서도 HTML 로 들어올 수 있다.\r\n두 번째 줄은 CRLF 로 끝난다.\r\n<p>마지막</p>",
+    # CDATA 는 BeautifulSoup get_text 에 포함된다 (libxml2 HTML 파서는 버림)
+    "<p>본문 앞부분 문장은 여기까지이다</p><![CDATA[CDATA 안의 실적 설명 문장 x < y 비교]]><p>본문 뒷부분 문장도 이어진다</p>"
+    "<p>빈 섹션 앞 문장<![CDATA[]]>빈 섹션 뒤 문장</p>",
+    # textarea/title 안 마크업: html.parser 는 태그로 나누고, lxml 은 글자 그대로 넘긴다
+    "<html><head><title>리포트 <b>제목</b> 강조 표시</title></head><body>"
+    "<textarea>입력란 안의 <b>굵은 글씨</b> &amp; 설명 문장</textarea><p>입력란 뒤에 오는 본문 문장</p></body></html>",
+]
+
+_WORDS = ["삼성전자", "HBM", "수요", "증가", "영업이익", "DRAM", "가격", "반등", "전망", "2025년", "1분기", "&amp;", "&lt;"]
+_TAGS = ["p", "div", "span", "li", "td", "b", "a"]
+
+
+def _synthetic_html(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(n):
+        parts = ["<html><head><title>리포트</title><style>.x{}</style></head><body>"]
+        for _ in range(rng.randint(20, 200)):
+            tag = rng.choice(_TAGS)
+            body = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 30)))
+            roll = rng.random()
+            if roll < 0.05:
+                body = "ⓒ 연합뉴스 무단 전재 재배포 금지"
+            elif roll < 0.08:
+                body = "<script>window.x = '<div>' + 1;</script>"
+            elif roll < 0.12:
+                body += " https://news.example.com/article/" + str(rng.randint(0, 10 ** 6))
+            elif roll < 0.15:
+                body += "<!-- ad -->"
+            parts.append(f"<{tag}>{body}</{tag}>" + rng.choice(["", "\n", "\n\n  ", "<br>"]))
+        parts.append("</body></html>")
+        docs.append("".join(parts))
+    return docs
+
+
+def _reference_clean_text(raw_text: str) -> str:
+    """변경 전 clean_text (줄별 strip_urls → 비컴파일 정규식 필터 → 공백 정규화)."""
+    if not raw_text:
+        return ""
+    lines = [strip_urls(x) for x in raw_text.splitlines()]
+    out = []
+    for line in lines:
+        if not line or not line.strip():
+            continue
+        stripd = line.strip()
+        if re.search(r"(기사원문 링크|ⓒ|출처|저작권자|링크|원문|자료:|사진=|이미지=)", stripd):
+            continue
+        if re.match(r"^[-=•■●◆▶▷◀]+$", stripd) or re.match(r"^\d{1,4}[.,]?\d*\s*$", stripd) or len(stripd) < 5:
+            continue
+        out.append(stripd)
+    return normalize_space("\n".join(out).strip())
+
+
+def _reference_path(html: str) -> str:
+    return _reference_clean_text(extract_text_from_html_bs4(html))
+
+
+def _fused_with(backend: Callable[[str], List[str]], html: str) -> str:
+    return clean_lines(backend(html)) if html else ""
+
+
+def _timed(fn: Callable[[str], str], docs: List[str]) -> Tuple[List[str], float]:
+    start = time.perf_counter()
+    out = [fn(d) for d in docs]
+    return out, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description="HTML 추출+클리닝 parity 검사 및 처리량(MB/s) 비교")
+    ap.add_argument("--raw-dir", type=str, default=None, help="실제 raw 데이터의 html 로 검사 (미지정 시 합성 문서)")
+    ap.add_argument("--docs", type=int, default=200, help="합성 문서 수")
+    args = ap.parse_args()
+
+    if args.raw_dir:
+        from rag_finance.ingestion.loaders import load_raw_files
+        from rag_finance.utils.io_utils import read_text, split_ext
+        docs = [read_text(fp) for fp in load_raw_files(args.raw_dir) if split_ext(fp)[1] in ("html", "htm")]
+    else:
+        docs = _synthetic_html(args.docs)
+    docs = _GOLDEN_HTML + docs
+    total_mb = sum(len(d.encode("utf-8")) for d in docs) / 1e6
+    print(f"[bench_ingestion] docs={len(docs)} size={total_mb:.2f}MB")
+
+    try:
+        expected, t_ref = _timed(_reference_path, docs)
+    except ImportError:
+        print("[bench_ingestion] bs4 미설치: 기준 경로를 실행할 수 없습니다.", file=sys.stderr)
+        sys.exit(2)
+    print(f"[bench_ingestion] bs4 + clean_text(before): {t_ref:.3f}s ({total_mb / t_ref:.2f} MB/s)")
+
+    candidates: Dict[str, Callable[[str], str]] = {}
+    for name in ("stdlib", "lxml"):
+        try:
+            backend = get_html_backend(name)
+        except ImportError:
+            print(f"[bench_ingestion] {name} 백엔드 없음: 건너뜀")
+            continue
+        candidates[name] = lambda h, b=backend: _fused_with(b, h)
+
+    mismatched = 0
+    for name, fn in candidates.items():
+        got, t_new = _timed(fn, docs)
+        bad = [i for i, (a, b) in enumerate(zip(expected, got)) if a != b]
+        mismatched += len(bad)
+        print(
+            f"[bench_ingestion] {name:6s} fused: {t_new:.3f}s ({total_mb / t_new:.2f} MB/s, "
+            f"x{t_ref / t_new:.1f}) mismatches={len(bad)}"
+        )
+        for i in bad[:3]:
+            print(f"  - doc#{i}\n    expected: {expected[i][:160]!r}\n    got     : {got[i][:160]!r}")
+
+    # txt 경로: clean_text 단독 parity
+    texts = [extract_text_from_html_bs4(d) for d in docs]
+    bad_txt = sum(1 for t in texts if clean_text(t) != _reference_clean_text(t))
+    mismatched += bad_txt
+    print(f"[bench_ingestion] clean_text parity (txt path): mismatches={bad_txt}")
+
+    # 기본 경로(load_and_clean_documents 가 쓰는 함수) 확인
+    default_bad = sum(1 for d, e in zip(docs, expected) if html_to_clean_text(d) != e)
+    mismatched += default_bad
+    print(f"[bench_ingestion] default html_to_clean_text parity: mismatches={default_bad}")
+
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from rag_finance.entities.company_maps import COMPANY_LIST
+from rag_finance.service.client import ServiceClient
+from rag_finance.service.prefork import format_memory_report, memory_report, process_memory
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(base: str, proc: subprocess.Popen, timeout_s: float) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode} before becoming ready")
+        try:
+            with urllib.request.urlopen(base + "/health", timeout=1.0):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server not ready after {timeout_s}s")
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r", encoding="utf-8") as f:
+            return [int(x) for x in f.read().split()]
+    except OSError:
+        return []
+
+
+def _run_server(args, workers: int, queries: List[str]) -> Tuple[List[List[str]], float, Dict[str, Any]]:
+    """서버를 띄워 질의를 동시에 보낸 뒤 (질의별 chunk_id 목록, 총 소요 s, 메모리 보고) 반환."""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    cmd = [sys.executable, "-m", "rag_finance.cli.main", "serve", "--config", args.config, "--port", str(port), "--workers", str(workers)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL if not args.verbose else None)
+    try:
+        _wait_ready(base, proc, args.startup_timeout)
+        client = ServiceClient(base)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(lambda q: client.retrieve(q, topk=args.topk)[0], queries))
+        elapsed = time.perf_counter() - start
+        if workers > 1:
+            pids = {"parent": proc.pid, **{f"worker-{i}": pid for i, pid in enumerate(_children(proc.pid))}}
+        else:
+            pids = {"server": proc.pid}
+        report = memory_report(pids)
+        return [[str(d.metadata.get("chunk_id", "")) for d in docs] for docs in results], elapsed, report
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="pre-fork 서비스: 단일 프로세스 대비 결과 일치, 워커별 shared / unique 메모리")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--companies", type=int, default=20)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--topk", type=int, default=10)
+    ap.add_argument("--min-shared", type=float, default=0.5, help="워커 RSS 중 공유 페이지 비율 하한 (미달 시 exit 1)")
+    ap.add_argument("--startup-timeout", type=float, default=300.0)
+    ap.add_argument("--verbose", action="store_true", help="서버 출력 표시")
+    args = ap.parse_args()
+
+    if process_memory(os.getpid()) is None:
+        ap.error("needs /proc/<pid>/smaps_rollup (Linux)")
+    queries = [f"{c} 최근 동향" for c in COMPANY_LIST[: args.companies]]
+
+    single, single_s, single_report = _run_server(args, 1, queries)
+    forked, forked_s, report = _run_server(args, args.workers, queries)
+    single_rss = single_report["processes"]["server"]["rss"]
+    print(f"[bench_prefork] single process: {len(queries) / single_s:6.1f} q/s rss={single_rss:.1f}MiB")
+    print(f"[bench_prefork] prefork x{args.workers}:   {len(queries) / forked_s:6.1f} q/s")
+    for line in format_memory_report(report):
+        print(f"[bench_prefork]   {line}")
+    print(f"[bench_prefork] {args.workers} independent processes ≈ {args.workers * single_rss:.1f}MiB "
+          f"vs prefork total pss={report['total_pss']:.1f}MiB")
+
+    failed = False
+    mismatches = sum(a != b for a, b in zip(single, forked))
+    print(f"[bench_prefork] top-{args.topk} mismatches vs single process: {mismatches}/{len(queries)}")
+    failed |= mismatches > 0
+    workers = {k: v for k, v in report["processes"].items() if k.startswith("worker-")}
+    if len(workers) != args.workers:
+        print(f"[bench_prefork] expected {args.workers} workers, found {len(workers)}")
+        failed = True
+    for name, row in workers.items():
+        ratio = row.get("shared", 0.0) / max(1e-9, row.get("rss", 0.0))
+        if ratio < args.min_shared:
+            print(f"[bench_prefork] {name}: shared/rss={ratio:.2f} < {args.min_shared}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import argparse
+import copy
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from rag_finance.config import load_config
+from rag_finance.entities.company_maps import COMPANY_LIST
+from rag_finance.indexing.faiss_index import build_embedding_from_config
+from rag_finance.inference.query_cache import QueryEmbeddingCache, model_key
+from rag_finance.retrieval.pipeline import build_bm25_retriever, build_reranker, load_vectorstore, retrieve_with_keywords
+
+_TOPICS = ["HBM 동향", "실적 전망", "수주 현황", "주가 흐름", "신제품 출시", "DRAM 가격", "설비 투자", "파운드리 경쟁"]
+
+
+def _keys(docs) -> List[Tuple[str, str]]:
+    return [(str(d.metadata.get("file_name", "")), str(d.metadata.get("chunk_index", ""))) for d in docs]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="질의 임베딩 캐시 on/off: 지연·적중률·결과 일치, 저장/복원 확인")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--queries", type=int, default=40, help="서로 다른 질의 수")
+    ap.add_argument("--repeat", type=int, default=3, help="각 질의 반복 횟수 (템플릿·반복 질의 흉내)")
+    ap.add_argument("--topk", type=int, default=10)
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    emb_cfg = cfg["embedding"]
+    base = build_embedding_from_config(emb_cfg, query_cache=False)
+    vs = load_vectorstore(cfg["paths"]["indexes_dir"], base)
+    bm25 = build_bm25_retriever(vs)
+    ce = build_reranker(cfg["retrieval"]["ce"]) if cfg["retrieval"]["ce"].get("enable", True) else None
+    distinct = [f"{COMPANY_LIST[i % len(COMPANY_LIST)]} {_TOPICS[i % len(_TOPICS)]}" for i in range(args.queries)]
+    queries = [q for _ in range(args.repeat) for q in distinct]
+
+    results = {}
+    for label, embedding in (("off", base), ("on", QueryEmbeddingCache(base, model_key(emb_cfg)))):
+        run_cfg = copy.deepcopy(cfg)
+        lat, keys = [], []
+        for q in queries:
+            start = time.perf_counter()
+            docs, dbg = retrieve_with_keywords(
+                q, run_cfg, embedding, topk=args.topk, show_progress=False,
+                vectorstore=vs, bm25_retriever=bm25, reranker=ce,
+            )
+            lat.append((time.perf_counter() - start) * 1000.0)
+            keys.append(_keys(docs))
+        results[label] = keys
+        extra = f" cache={dbg['embed_cache']}" if "embed_cache" in dbg else ""
+        print(f"[bench_query_cache] cache {label:3s}: p50={statistics.median(lat):7.2f}ms mean={statistics.mean(lat):7.2f}ms{extra}")
+        if label == "on":
+            cached = embedding
+
+    mismatched = sum(1 for a, b in zip(results["off"], results["on"]) if a != b)
+    print(f"[bench_query_cache] result mismatches={mismatched}")
+
+    # 저장 → 새 캐시에서 복원: 같은 벡터가 적중해야 한다
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "query_cache.npz")
+        cached.save(path)
+        restored = QueryEmbeddingCache(base, model_key(emb_cfg))
+        loaded = restored.load(path)
+        diff = max(float(np.abs(np.asarray(restored.embed_query(q)) - np.asarray(base.embed_query(q))).max()) for q in distinct)
+        print(f"[bench_query_cache] persisted {loaded} entries, restored hits={restored.cache_stats()['hits']} max|diff|={diff:.2e}")
+
+    if mismatched or diff > 1e-6 or restored.cache_stats()["hits"] != len(distinct):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
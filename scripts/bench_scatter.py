@@ -0,0 +1,146 @@
+from __future__ import annotations
+import argparse
+import heapq
+import os
+import shutil
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+from rag_finance.config import load_config
+from rag_finance.entities.company_maps import COMPANY_LIST
+from rag_finance.indexing.faiss_index import build_embedding_from_config
+from rag_finance.indexing.partitions import build_partitions
+from rag_finance.indexing.shards import BM25_STATS
+from rag_finance.retrieval.pipeline import build_bm25_retriever, load_vectorstore
+from rag_finance.retrieval.scatter import ScatterGatherClient, VectorOnlyEmbeddings, spawn_local_workers
+
+_TOPICS = ["HBM 동향", "실적 전망", "수주 현황", "주가 흐름", "신제품 출시", "DRAM 가격", "설비 투자", "파운드리 경쟁"]
+
+
+def _queries(n: int) -> List[str]:
+    return [f"{COMPANY_LIST[i % len(COMPANY_LIST)]} {_TOPICS[i % len(_TOPICS)]}" for i in range(n)]
+
+
+def _doc_keys(docs) -> List[Tuple[str, str]]:
+    return [(str(d.metadata.get("file_name", "")), str(d.metadata.get("chunk_index", ""))) for d in docs]
+
+
+def _run(fn: Callable[[str], object], queries: List[str], concurrency: int) -> Tuple[float, List[float]]:
+    lat: List[float] = []
+
+    def one(q: str):
+        start = time.perf_counter()
+        fn(q)
+        lat.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, queries))
+    return time.perf_counter() - start, lat
+
+
+def _report(label: str, wall: float, lat: List[float], n: int, extra: str = "") -> None:
+    lat = sorted(lat)
+    p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+    print(
+        f"[bench_scatter] {label:12s} qps={n / wall:7.1f}  p50={statistics.median(lat) * 1000:6.1f}ms  "
+        f"p95={p95 * 1000:6.1f}ms {extra}"
+    )
+
+
+def _bm25_parity(client: ScatterGatherClient, bm25, queries: List[str], k_faiss: int, k_bm25: int) -> Tuple[int, float]:
+    """
+    병합한 BM25 top-k 의 전체 인덱스 점수 열이 전체 인덱스 BM25 top-k 점수 열과 같은지 (동점 순서는 무시).
+    반환: (불일치 질의 수, 전체 인덱스 top-k 대비 평균 겹침)
+    """
+    keys = _doc_keys(bm25.docs)
+    mismatched, overlap = 0, []
+    for q in queries:
+        scores = bm25.vectorizer.get_scores(bm25.preprocess_func(q))
+        score_of = dict(zip(keys, (round(float(x), 9) for x in scores)))
+        expected = [keys[i] for i in heapq.nlargest(k_bm25, range(len(scores)), key=scores.__getitem__)]
+        got = _doc_keys(client.search(q, q, k_faiss, k_bm25)[1])
+        if [score_of[k] for k in got] != [score_of[k] for k in expected]:
+            mismatched += 1
+        overlap.append(len(set(got) & set(expected)) / max(1, len(expected)))
+    return mismatched, statistics.mean(overlap)
+
+
+def _open(parts_dir: str, authkey: bytes, embedding):
+    procs, addresses = spawn_local_workers(parts_dir, authkey)
+    return procs, ScatterGatherClient(addresses, authkey, embedding)
+
+
+def _close(procs, client: ScatterGatherClient) -> None:
+    client.close()
+    for p in procs:
+        p.terminate()
+        p.join(timeout=5)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="scatter-gather 1단계(FAISS+BM25) 처리량: 파티션 수별 비교")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--shards", type=str, default="1,2,4", help="비교할 파티션 수 목록")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--k-bm25", type=int, default=None, help="미지정 시 config 의 pool_k_bm25 (작은 코퍼스면 줄여야 병합 차이가 보인다)")
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    retrieval = cfg["retrieval"]
+    k_faiss, k_bm25 = retrieval["pool_k_faiss"], args.k_bm25 or retrieval["pool_k_bm25"]
+    indexes_dir = cfg["paths"]["indexes_dir"]
+    emb_cfg = cfg["embedding"]
+    embedding = build_embedding_from_config(emb_cfg)
+    queries = _queries(args.queries)
+
+    # 기준: 한 프로세스가 전체 인덱스를 들고 검색 (pipeline 과 같은 호출)
+    vs = load_vectorstore(indexes_dir, embedding)
+    bm25 = build_bm25_retriever(vs)
+    bm25.k = k_bm25
+
+    def local_search(q: str):
+        return vs.similarity_search(q, k=k_faiss), bm25.invoke(q)
+
+    expected = {q: _doc_keys(vs.similarity_search(q, k=k_faiss)) for q in queries}
+    wall, lat = _run(local_search, queries, args.concurrency)
+    _report("in-process", wall, lat, len(queries), f"chunks={vs.index.ntotal}")
+
+    authkey = os.urandom(16)
+    failed = False
+    for n in (int(x) for x in args.shards.split(",")):
+        parts_dir = os.path.join(indexes_dir, f"_bench_parts_{n}")
+        manifest = build_partitions(indexes_dir, VectorOnlyEmbeddings(), n, out_dir=parts_dir)
+        try:
+            procs, client = _open(parts_dir, authkey, embedding)
+            try:
+                client.ping()
+                mismatched = sum(1 for q in queries if _doc_keys(client.search(q, q, k_faiss, k_bm25)[0]) != expected[q])
+                bm25_mismatched, _ = _bm25_parity(client, bm25, queries, k_faiss, k_bm25)
+                wall, lat = _run(lambda q: client.search(q, q, k_faiss, k_bm25), queries, args.concurrency)
+                _report(f"shards={n}", wall, lat, len(queries),
+                        f"sizes={manifest['sizes']} faiss_mismatch={mismatched} bm25_mismatch={bm25_mismatched}")
+            finally:
+                _close(procs, client)
+            failed = failed or bool(mismatched or bm25_mismatched)
+
+            # 참고: 통계 없는 예전 build 처럼 파티션 내 순위로 병합했을 때 전체 인덱스 BM25 top-k 와의 겹침
+            os.remove(os.path.join(parts_dir, BM25_STATS))
+            procs, client = _open(parts_dir, authkey, embedding)
+            try:
+                _, fallback_overlap = _bm25_parity(client, bm25, queries, k_faiss, k_bm25)
+            finally:
+                _close(procs, client)
+            print(f"[bench_scatter] {'':12s} rank-merge fallback bm25 overlap={fallback_overlap:.3f}")
+        finally:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+import argparse
+import copy
+import statistics
+import sys
+import time
+from typing import List, Tuple
+
+from rag_finance.config import load_config
+from rag_finance.entities.company_maps import COMPANY_LIST
+from rag_finance.indexing.faiss_index import build_embedding_from_config
+from rag_finance.indexing.versions import current_build
+from rag_finance.retrieval.pipeline import build_bm25_retriever, build_reranker, load_vectorstore, retrieve_with_keywords
+from rag_finance.retrieval.semantic_cache import SemanticResultCache
+
+# 같은 요청을 다르게 표현한 질의 묶음 (기업명만 바꿔 끼운다) — 묶음의 두 번째 질의부터는 적중해야 이득
+_PARAPHRASE_GROUPS = [
+    [
+        "{c} 최근 동향 리포트",
+        "{c} 최근 동향 리포트 부탁해",
+        "{c} 최근 이슈 정리해줘",
+        "{c} 요즘 동향 정리",
+        "{c}  최근  동향  리포트",
+    ],
+    ["{c} 2023 실적", "{c} 2023년 실적", "{c} 2023년도 실적 알려줘"],
+    ["{c} 1분기 매출", "{c} Q1 매출", "{c} 1Q 매출 정리"],
+]
+# 같은 기업이지만 연도·분기·지표가 달라 결과가 달라야 하는 질의 (서로 적중하면 안 된다)
+_DISTINCT = [
+    "{c} 2023 실적",
+    "{c} 2024 실적",
+    "{c} 1분기 매출",
+    "{c} 2분기 매출",
+    "{c} 2024 매출",
+    "{c} 2024 영업이익",
+    "{c} 상반기 영업이익",
+    "{c} 하반기 영업이익",
+]
+
+
+def _keys(docs) -> List[Tuple[str, str]]:
+    return [(str(d.metadata.get("file_name", "")), str(d.metadata.get("chunk_index", ""))) for d in docs]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="의미 캐시 on/off: 지연·적중률, 적중 결과와 전체 검색 결과의 top-k 겹침")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--companies", type=int, default=8)
+    ap.add_argument("--topk", type=int, default=10)
+    ap.add_argument("--threshold", type=float, default=None, help="미지정 시 config 의 retrieval.semantic_cache.threshold")
+    ap.add_argument("--min-overlap", type=float, default=0.6, help="적중 결과의 평균 top-k 겹침 하한 (미달 시 exit 1)")
+    ap.add_argument("--min-hit-rate", type=float, default=0.0,
+                    help="바꿔 말한 질의(묶음의 두 번째부터) 적중률 하한 — 실제 임베딩 모델로 threshold 를 고를 때 (미달 시 exit 1)")
+    args = ap.parse_args()
+
+    cfg = copy.deepcopy(load_config(args.config))
+    sc_cfg = cfg["retrieval"].get("semantic_cache", {}) or {}
+    threshold = args.threshold if args.threshold is not None else float(sc_cfg.get("threshold", 0.92))
+    embedding = build_embedding_from_config(cfg["embedding"])
+    indexes_dir = cfg["paths"]["indexes_dir"]
+    vs = load_vectorstore(indexes_dir, embedding)
+    bm25 = build_bm25_retriever(vs)
+    ce = build_reranker(cfg["retrieval"]["ce"]) if cfg["retrieval"]["ce"].get("enable", True) else None
+    build_id = current_build(indexes_dir)
+    queries: List[str] = []
+    follow_up: List[bool] = []  # 같은 묶음의 앞선 질의가 캐시에 있는 질의
+    for c in COMPANY_LIST[: args.companies]:
+        for group in _PARAPHRASE_GROUPS:
+            for j, p in enumerate(group):
+                queries.append(p.format(c=c))
+                follow_up.append(j > 0)
+    distinct = [p.format(c=c) for c in COMPANY_LIST[: args.companies] for p in _DISTINCT]
+
+    def run(cache, queries=queries):
+        lat, keys, hits = [], [], []
+        for q in queries:
+            start = time.perf_counter()
+            docs, dbg = retrieve_with_keywords(
+                q, cfg, embedding, topk=args.topk, show_progress=False,
+                vectorstore=vs, bm25_retriever=bm25, reranker=ce,
+                semantic_cache=cache, index_build=build_id,
+            )
+            lat.append((time.perf_counter() - start) * 1000.0)
+            keys.append(_keys(docs))
+            hits.append(bool((dbg.get("semantic_cache") or {}).get("hit")))
+        return lat, keys, hits
+
+    lat_off, full, _ = run(None)
+    cache = SemanticResultCache(threshold=threshold, max_size=int(sc_cfg.get("max_size", 1024)))
+    lat_on, cached, hits = run(cache)
+    print(f"[bench_semantic_cache] cache off: p50={statistics.median(lat_off):7.2f}ms mean={statistics.mean(lat_off):7.2f}ms")
+    print(f"[bench_semantic_cache] cache on : p50={statistics.median(lat_on):7.2f}ms mean={statistics.mean(lat_on):7.2f}ms "
+          f"threshold={threshold} stats={cache.cache_stats()}")
+
+    overlaps = [
+        len(set(a) & set(b)) / max(1, len(b))
+        for a, b, hit in zip(cached, full, hits) if hit
+    ]
+    misses_equal = all(a == b for a, b, hit in zip(cached, full, hits) if not hit)
+    mean_overlap = statistics.mean(overlaps) if overlaps else 1.0
+    print(f"[bench_semantic_cache] hits={len(overlaps)}/{len(queries)} mean top-{args.topk} overlap on hits={mean_overlap:.3f} "
+          f"misses identical to full run={misses_equal}")
+    n_follow = sum(follow_up)
+    hit_rate = sum(h for h, f in zip(hits, follow_up) if f) / max(1, n_follow)
+    # 범위가 바꿔 말한 질의를 가르는지: threshold -1(범위가 같으면 무조건 적중)에서 놓친 후속 질의 = 범위 분리
+    _, _, same_scope = run(SemanticResultCache(threshold=-1.0, max_size=len(queries) + 1))
+    split = [q for q, hit, f in zip(queries, same_scope, follow_up) if f and not hit]
+    print(f"[bench_semantic_cache] paraphrase hit rate={hit_rate:.3f} ({n_follow} follow-ups, threshold={threshold}) "
+          f"scope splits={len(split)}/{n_follow} {split[:3]}")
+    # 임베딩과 무관하게 범위만으로 갈리는지: threshold -1(범위가 같으면 무조건 적중)로 다른 질의끼리 돌린다
+    _, _, wrong = run(SemanticResultCache(threshold=-1.0, max_size=len(distinct) + 1), distinct)
+    wrong_queries = [q for q, hit in zip(distinct, wrong) if hit]
+    print(f"[bench_semantic_cache] distinct same-company queries hitting each other (threshold -1)="
+          f"{len(wrong_queries)}/{len(distinct)} {wrong_queries[:3]}")
+    if not misses_equal or mean_overlap < args.min_overlap or wrong_queries or split or hit_rate < args.min_hit_rate:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
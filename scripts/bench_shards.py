@@ -0,0 +1,99 @@
+from __future__ import annotations
+import argparse
+import heapq
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+from typing import List
+
+from rag_finance.config import load_config
+from rag_finance.entities.company_maps import COMPANY_LIST, NAME_TO_CODE
+from rag_finance.indexing.faiss_index import build_embedding_from_config
+from rag_finance.indexing.shards import BM25_STATS, build_and_save_shards
+from rag_finance.retrieval.pipeline import build_bm25_retriever, load_vectorstore
+from rag_finance.retrieval.shards import ShardRouter, _doc_key
+
+_TOPICS = ["HBM 동향", "실적 전망", "수주 현황", "주가 흐름", "신제품 출시", "DRAM 가격", "설비 투자", "파운드리 경쟁"]
+
+
+def _recall(got, expected) -> float:
+    expected = {_doc_key(d) for d in expected}
+    return len(expected & {_doc_key(d) for d in got}) / len(expected) if expected else 1.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="기업 shard 검색 vs 전체 인덱스: BM25 점수 parity 와 후보 풀 recall")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--by-source", action="store_true", help="shard 를 소스 타입별로 나눠 만든다")
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    retrieval = cfg["retrieval"]
+    k_faiss, k_bm25 = retrieval["pool_k_faiss"], retrieval["pool_k_bm25"]
+    embedding = build_embedding_from_config(cfg["embedding"])
+    vs = load_vectorstore(cfg["paths"]["indexes_dir"], embedding)
+    full_bm25 = build_bm25_retriever(vs)
+    full_bm25.k = k_bm25
+    full_key = [_doc_key(d) for d in full_bm25.docs]
+
+    # 게시된 전체 인덱스의 벡터를 그대로 써서 임시 shard 를 만든다 (build 설정과 무관하게 비교 가능)
+    ids = [vs.index_to_docstore_id[i] for i in range(vs.index.ntotal)]
+    docs = [vs.docstore.search(i) for i in ids]
+    vectors = vs.index.reconstruct_n(0, vs.index.ntotal)
+    tmp = tempfile.mkdtemp(prefix="bench_shards_")
+    try:
+        shards_dir = os.path.join(tmp, "shards")
+        build_and_save_shards(docs, vectors, embedding, shards_dir, by_source=args.by_source)
+        router = ShardRouter(shards_dir, embedding)
+        os.remove(os.path.join(shards_dir, BM25_STATS))
+        legacy = ShardRouter(shards_dir, embedding)  # 통계 없는 예전 build: shard 내 순위 병합
+
+        routed_queries = mismatched = 0
+        fallback_overlap: List[float] = []
+        recall_faiss: List[float] = []
+        recall_bm25: List[float] = []
+        for i in range(args.queries):
+            name = COMPANY_LIST[i % len(COMPANY_LIST)]
+            q = f"{name} {_TOPICS[i % len(_TOPICS)]}"
+            routed = router.route(name, NAME_TO_CODE.get(name, ""))
+            if not routed:
+                continue
+            routed_queries += 1
+            got = router.search_bm25(q, routed, k_bm25)
+
+            # 기준: 전체 인덱스 BM25 점수를 routed shard 에 든 청크로 제한한 top-k
+            allowed = {_doc_key(d) for n in routed for d in router._shard(n)[0].docstore._dict.values()}
+            scores = full_bm25.vectorizer.get_scores(full_bm25.preprocess_func(q))
+            score_of = {full_key[j]: float(scores[j]) for j in range(len(scores))}
+            candidates = [j for j in range(len(scores)) if full_key[j] in allowed]
+            expected = [full_bm25.docs[j] for j in heapq.nlargest(k_bm25, candidates, key=scores.__getitem__)]
+            # 동점 순서는 달라도 되므로 점수 열로 비교
+            got_scores = [round(score_of[_doc_key(d)], 9) for d in got]
+            expected_scores = [round(score_of[_doc_key(d)], 9) for d in expected]
+            if got_scores != expected_scores:
+                mismatched += 1
+            fallback_overlap.append(_recall(legacy.search_bm25(q, routed, k_bm25), expected))
+
+            # 참고: 전체 인덱스의 (제한 없는) top-k 중 shard 후보 풀에 들어온 비율
+            recall_faiss.append(_recall(router.search_faiss(q, routed, k_faiss), vs.similarity_search(q, k=k_faiss)))
+            recall_bm25.append(_recall(got, full_bm25.invoke(q)))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if not routed_queries:
+        print("[bench_shards] no query was routed to a company shard")
+        sys.exit(1)
+    print(f"[bench_shards] routed queries={routed_queries}/{args.queries} shards={len(router.shards)}")
+    print(f"[bench_shards] bm25 global-IDF parity mismatches={mismatched} "
+          f"(rank-merge fallback overlap={statistics.mean(fallback_overlap):.3f})")
+    print(f"[bench_shards] pool recall vs full index: faiss@{k_faiss}={statistics.mean(recall_faiss):.3f} "
+          f"bm25@{k_bm25}={statistics.mean(recall_bm25):.3f}")
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
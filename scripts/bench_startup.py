@@ -0,0 +1,83 @@
+from __future__ import annotations
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Set, Tuple
+
+# (이름, python 인자, 로드되면 안 되는 최상위 패키지)
+# --help·인자 오류와 spawn 워커 기동은 langchain/torch/groq 를 기다리지 않아야 한다
+_MODEL_STACK = ("torch", "sentence_transformers", "transformers", "onnxruntime", "faiss")
+_TARGETS: List[Tuple[str, List[str], Tuple[str, ...]]] = [
+    ("cli --help", ["-m", "rag_finance.cli.main", "--help"],
+     _MODEL_STACK + ("langchain", "langchain_community", "langchain_core", "groq", "numpy", "omegaconf")),
+    ("generate_report --help", ["-m", "scripts.generate_report", "--help"],
+     _MODEL_STACK + ("langchain", "langchain_community", "groq")),
+    ("import rag_finance.llm", ["-c", "import rag_finance.llm"],
+     _MODEL_STACK + ("langchain", "langchain_community", "langchain_core", "groq")),
+    ("embed worker", ["-c", "import rag_finance.indexing.embed_stage"],
+     _MODEL_STACK + ("langchain", "langchain_community", "langchain_core", "groq")),
+    ("pdf worker", ["-c", "import rag_finance.utils.pdf_utils"],
+     _MODEL_STACK + ("langchain", "langchain_community", "langchain_core", "groq", "reportlab")),
+]
+
+
+def _importtime(argv: List[str]) -> Tuple[Dict[str, int], float, Set[str]]:
+    """python -X importtime 실행 → (최상위 import 별 누적 us, 실행 wall ms, 로드된 모듈 이름)."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        env={**os.environ, "PYTHONWARNINGS": "ignore"},
+    )
+    wall_ms = (time.perf_counter() - start) * 1000.0
+    top: Dict[str, int] = {}
+    modules: Set[str] = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # 헤더 줄
+        name = parts[2].rstrip()
+        modules.add(name.strip())
+        if name.startswith(" ") and not name.startswith("  "):  # 들여쓰기 0 = 최상위 import
+            top[name.strip()] = int(parts[1])
+    return top, wall_ms, modules
+
+
+def main():
+    ap = argparse.ArgumentParser(description="CLI / 워커 기동 시간: -X importtime 으로 import 비용과 무거운 의존성 로드 여부 확인")
+    ap.add_argument("--budget-ms", type=float, default=300.0, help="대상별 import 누적 시간 상한(ms)")
+    ap.add_argument("--repeat", type=int, default=3, help="대상별 반복 (최솟값 사용)")
+    ap.add_argument("--show", type=int, default=0, help="대상별로 가장 느린 최상위 import N 개 출력")
+    args = ap.parse_args()
+
+    failed: List[str] = []
+    for label, argv, forbidden in _TARGETS:
+        runs = [_importtime(argv) for _ in range(max(1, args.repeat))]
+        import_ms = min(sum(r[0].values()) for r in runs) / 1000.0
+        wall_ms = min(r[1] for r in runs)
+        top, loaded = runs[0][0], runs[0][2]
+        heavy_roots = sorted({m.split(".")[0] for m in loaded} & set(forbidden))
+        status = "ok"
+        if import_ms > args.budget_ms:
+            status = "OVER BUDGET"
+        if heavy_roots:
+            status = f"loads {','.join(heavy_roots)}"
+        if status != "ok":
+            failed.append(label)
+        print(f"[bench_startup] {label:24s} imports={import_ms:7.1f}ms wall={wall_ms:7.1f}ms modules={len(loaded):4d} {status}")
+        for name, us in sorted(top.items(), key=lambda kv: -kv[1])[: args.show]:
+            print(f"[bench_startup]     {us / 1000.0:7.1f}ms {name}")
+
+    print(f"[bench_startup] budget={args.budget_ms:.0f}ms failed={len(failed)}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
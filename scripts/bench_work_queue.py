@@ -0,0 +1,106 @@
+from __future__ import annotations
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from rag_finance.batch.work_queue import WorkQueue, run_worker
+
+
+def _worker(args) -> None:
+    """합성 작업 워커: task_ms 동안 일하는 척하고 실행 기록을 남긴다. --crash-worker 면 첫 작업 도중 죽는다(노드 장애)."""
+    queue = WorkQueue(args.db, lease_s=args.lease_s, max_attempts=args.max_attempts)
+
+    def handler(tasks: List[Dict[str, Any]]) -> Dict[str, Tuple[bool, Dict[str, Any]]]:
+        with open(args.log, "a", encoding="utf-8") as f:
+            for t in tasks:
+                f.write(f"{t['key']}\t{os.getpid()}\n")
+        time.sleep(args.task_ms / 1000.0 * len(tasks))
+        if args.crash_worker:
+            os._exit(3)  # complete/release 없이 종료 → 리스 만료 후 다른 워커가 가져가야 한다
+        return {t["key"]: (True, {"pid": os.getpid(), "company": t["company"]}) for t in tasks}
+
+    run_worker(queue, handler, claim_batch=args.claim_batch, heartbeat_s=args.lease_s / 3.0, poll_s=0.2)
+
+
+def _spawn(args, db: str, log: str, crash: bool) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "scripts.bench_work_queue", "--worker", "--db", db, "--log", log,
+        "--lease-s", str(args.lease_s), "--task-ms", str(args.task_ms), "--claim-batch", str(args.claim_batch),
+        "--max-attempts", str(args.max_attempts),
+    ]
+    if crash:
+        cmd.append("--crash-worker")
+    return subprocess.Popen(cmd, stdout=subprocess.DEVNULL if not args.verbose else None)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="SQLite 작업 큐: 로컬 프로세스 여러 개로 리스·heartbeat·멱등 키·장애 재할당 확인")
+    ap.add_argument("--tasks", type=int, default=40)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--crash", type=int, default=1, help="첫 작업 도중 죽는 워커 수")
+    ap.add_argument("--task-ms", type=float, default=100.0)
+    ap.add_argument("--lease-s", type=float, default=2.0)
+    ap.add_argument("--claim-batch", type=int, default=2)
+    ap.add_argument("--max-attempts", type=int, default=3)
+    ap.add_argument("--verbose", action="store_true")
+    # 내부용: 워커 프로세스 모드
+    ap.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--db", type=str, default="", help=argparse.SUPPRESS)
+    ap.add_argument("--log", type=str, default="", help=argparse.SUPPRESS)
+    ap.add_argument("--crash-worker", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.worker:
+        _worker(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db, log = os.path.join(tmp, "queue.sqlite"), os.path.join(tmp, "executions.log")
+        queue = WorkQueue(db, lease_s=args.lease_s, max_attempts=args.max_attempts)
+        items = [(f"company-{i:03d}", "{company} 최근 동향", "2026-01-01", None) for i in range(args.tasks)]
+        added = queue.enqueue_many(items)
+        added_again = queue.enqueue_many(items)  # 같은 (기업, 템플릿, 날짜) 는 다시 들어가지 않는다
+
+        start = time.perf_counter()
+        procs = [_spawn(args, db, log, crash=i < args.crash) for i in range(args.workers)]
+        codes = [p.wait() for p in procs]
+        wall = time.perf_counter() - start
+
+        counts = queue.counts()
+        done = queue.tasks("done")
+        with open(log, "r", encoding="utf-8") as f:
+            executions = Counter(line.split("\t")[0] for line in f if line.strip())
+        rerun = sum(1 for n in executions.values() if n > 1)
+        serial_s = args.tasks * args.task_ms / 1000.0
+
+    print(f"[bench_work_queue] enqueue: added={added} re-enqueue added={added_again}")
+    print(f"[bench_work_queue] {args.workers} workers ({args.crash} crashing) exit codes={codes} wall={wall:.2f}s "
+          f"(serial work {serial_s:.2f}s, lease {args.lease_s}s)")
+    print(f"[bench_work_queue] counts={counts} executed={len(executions)} re-executed after crash={rerun}")
+
+    failed = False
+    if added != args.tasks or added_again != 0:
+        print("[bench_work_queue] FAIL: enqueue is not idempotent")
+        failed = True
+    if counts["done"] != args.tasks or len({t["key"] for t in done}) != args.tasks:
+        print(f"[bench_work_queue] FAIL: expected {args.tasks} done tasks")
+        failed = True
+    if any(t["result"] is None for t in done):
+        print("[bench_work_queue] FAIL: done task without a result")
+        failed = True
+    if args.crash and not rerun:
+        print("[bench_work_queue] FAIL: tasks of the crashed worker were not reclaimed")
+        failed = True
+    if not args.crash and rerun:
+        print("[bench_work_queue] FAIL: tasks re-executed without a crash (heartbeat did not keep the lease)")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
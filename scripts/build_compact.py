@@ -0,0 +1,39 @@
+from __future__ import annotations
+import argparse
+
+from rag_finance.config import load_config
+from rag_finance.indexing.compact import build_compact, compact_dir_for, describe_compact
+from rag_finance.retrieval.pipeline import load_vectorstore
+from rag_finance.retrieval.scatter import VectorOnlyEmbeddings
+
+
+def main():
+    ap = argparse.ArgumentParser(description="게시된 전체 인덱스로 compact 1단계 코드(PCA float16 / 부호 비트) 생성 (재임베딩 없음)")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--codes", type=str, default=None, choices=["pca16", "binary"], help="기본: compact.codes")
+    ap.add_argument("--pca-dim", type=int, default=None, help="기본: compact.pca_dim (0 = 차원 축소 없음)")
+    ap.add_argument("--oversample", type=int, default=None, help="기본: compact.oversample")
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    compact_cfg = cfg.get("compact", {}) or {}
+    indexes_dir = cfg["paths"]["indexes_dir"]
+    vs = load_vectorstore(indexes_dir, VectorOnlyEmbeddings())
+    vectors = vs.index.reconstruct_n(0, vs.index.ntotal)  # FAISS 위치(= doc_id) 순
+
+    out_dir = compact_dir_for(indexes_dir)
+    manifest = build_compact(
+        vectors,
+        out_dir,
+        codes=args.codes or compact_cfg.get("codes", "pca16"),
+        pca_dim=args.pca_dim if args.pca_dim is not None else int(compact_cfg.get("pca_dim", 128)),
+        metric="ip" if vs.index.metric_type == 0 else "l2",
+        oversample=args.oversample or int(compact_cfg.get("oversample", 4)),
+        eval_k=int(compact_cfg.get("eval_k", 0) or cfg["retrieval"]["pool_k_faiss"]),
+        eval_queries=int(compact_cfg.get("eval_queries", 200)),
+    )
+    print(f"[build_compact] {out_dir}: {describe_compact(manifest)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from rag_finance.config import load_config
 from rag_finance.utils.io_utils import ensure_dir
 from rag_finance.ingestion.loaders import load_raw_files, load_and_clean_documents
 from rag_finance.chunking.splitter import make_chunks
+from rag_finance.ingestion.dedup import build_dedup_indexes, save_dedup_indexes
 from rag_finance.indexing.faiss_index import build_and_save_index
 
 
@@ -21,13 +22,17 @@ def main():
     raw_dir     = cfg["paths"]["raw_dir"]
     indexes_dir = cfg["paths"]["indexes_dir"]
     ensure_dir(indexes_dir)
+    dedup_cfg = cfg.get("dedup", {}) or {}
+    doc_dedup, chunk_dedup = build_dedup_indexes(dedup_cfg)
+    compact_cfg = dict(cfg.get("compact", {}) or {})
+    compact_cfg["eval_k"] = int(compact_cfg.get("eval_k", 0) or cfg["retrieval"]["pool_k_faiss"])
 
     # 1) 로드
     file_paths = load_raw_files(raw_dir)
     print(f"[build_index] found {len(file_paths)} raw files")
 
     # 2) 클린
-    rows = load_and_clean_documents(file_paths)
+    rows = load_and_clean_documents(file_paths, near_dup=doc_dedup)
     print(f"[build_index] cleaned docs: {len(rows)}")
 
     # 3) 청킹
@@ -36,6 +41,7 @@ def main():
         chunk_size=cfg["chunk"]["size"],
         chunk_overlap=cfg["chunk"]["overlap"],
         min_char_len=cfg["chunk"]["min_len"],
+        near_dup=chunk_dedup,
     )
     print(f"[build_index] chunks: {len(chunks)}")
 
@@ -47,8 +53,22 @@ def main():
         embedding_model_name=cfg["embedding"]["model_name"],
         embedding_device=cfg["embedding"]["device"],
         normalize_embeddings=cfg["embedding"]["normalize"],
+        embedding_backend=cfg["embedding"].get("backend", "torch"),
+        embedding_threads=int(cfg["embedding"].get("threads", 0) or 0),
+        onnx_dir=cfg["embedding"].get("onnx_dir", "models/onnx"),
+        shards_cfg=cfg.get("shards", {}) or {},
+        time_cfg=cfg.get("time_partitions", {}) or {},
+        compact_cfg=compact_cfg,
+        embed_build_cfg=cfg["embedding"].get("build", {}) or {},
+        manifest_extra={
+            "chunk": {k: cfg["chunk"][k] for k in ("size", "overlap", "min_len")},
+            "raw_files": len(file_paths),
+            "cleaned_docs": len(rows),
+        },
+        keep_versions=int((cfg.get("index_versions", {}) or {}).get("keep", 3)),
     )
     print(f"[build_index] index saved to: {save_path}")
+    save_dedup_indexes(dedup_cfg, doc_dedup, chunk_dedup)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,25 @@
+from __future__ import annotations
+import argparse
+
+from rag_finance.config import load_config
+from rag_finance.indexing.partitions import build_partitions, partitions_dir_for
+from rag_finance.retrieval.scatter import VectorOnlyEmbeddings
+
+
+def main():
+    ap = argparse.ArgumentParser(description="게시된 전체 인덱스를 scatter-gather 워커용 파티션으로 분할 (재임베딩 없음)")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--n", type=int, default=None, help="파티션 수 (기본: partitions.n)")
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    part_cfg = cfg.get("partitions", {}) or {}
+    n = args.n or int(part_cfg.get("n", 4))
+    indexes_dir = cfg["paths"]["indexes_dir"]
+
+    manifest = build_partitions(indexes_dir, VectorOnlyEmbeddings(), n)
+    print(f"[build_partitions] {partitions_dir_for(indexes_dir)}: n={manifest['n']} sizes={manifest['sizes']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from __future__ import annotations
+import argparse
+
+from rag_finance.config import load_config
+from rag_finance.utils.tabular_store import compile_tabular_store
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compile tabular_db/ JSON files into a single indexed store")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--tabular-dir", type=str, default=None, help="finance_*.json / stock_*.json 디렉터리")
+    ap.add_argument("--out", type=str, default=None, help="출력 SQLite 경로")
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    tabular_dir = args.tabular_dir or cfg["paths"]["tabular_dir"]
+    out_path = args.out or cfg["paths"]["tabular_store"]
+
+    info = compile_tabular_store(tabular_dir, out_path)
+    print(f"[build_tabular_store] companies: {info['companies']}")
+    if info["unresolved"]:
+        print(f"[build_tabular_store] 종목코드 미상(기업명 키로 저장): {', '.join(info['unresolved'])}")
+    print(f"[build_tabular_store] store saved to: {info['path']}")
+
+
+if __name__ == "__main__":
+    main()
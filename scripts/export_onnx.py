@@ -0,0 +1,60 @@
+from __future__ import annotations
+import argparse
+import os
+import time
+
+from rag_finance.config import load_config
+from rag_finance.inference.onnx_backend import (
+    CROSS_ENCODER,
+    DEFAULT_ONNX_DIR,
+    EMBEDDING,
+    MODEL_FILES,
+    ensure_exported,
+)
+
+
+def _size_mb(out_dir: str) -> str:
+    sizes = []
+    for backend, fname in MODEL_FILES.items():
+        path = os.path.join(out_dir, fname)
+        if os.path.exists(path):
+            sizes.append(f"{backend}={os.path.getsize(path) / 1e6:.0f}MB")
+    return " ".join(sizes)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="임베딩/cross-encoder 모델을 ONNX(fp32) + 동적 INT8 로 1회 export (캐시가 있으면 건너뜀)")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--which", choices=["embedding", "reranker", "all"], default="all")
+    ap.add_argument("--no-int8", action="store_true", help="INT8 양자화 생략")
+    ap.add_argument("--force", action="store_true", help="캐시가 있어도 다시 export")
+    ap.add_argument("--opset", type=int, default=17)
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    emb_cfg = cfg["embedding"]
+    ce_cfg = cfg["retrieval"]["ce"]
+    targets = []
+    if args.which in ("embedding", "all"):
+        targets.append((emb_cfg["model_name"], EMBEDDING, emb_cfg.get("onnx_dir", DEFAULT_ONNX_DIR)))
+    if args.which in ("reranker", "all"):
+        targets.append((ce_cfg["model_name"], CROSS_ENCODER, ce_cfg.get("onnx_dir", DEFAULT_ONNX_DIR)))
+        casc_cfg = ce_cfg.get("cascade", {}) or {}
+        if casc_cfg.get("enable", False):
+            targets.append((casc_cfg["model_name"], CROSS_ENCODER, casc_cfg.get("onnx_dir", DEFAULT_ONNX_DIR)))
+
+    for model_name, kind, onnx_dir in targets:
+        start = time.perf_counter()
+        out_dir, made = ensure_exported(
+            model_name, kind, onnx_dir, int8=not args.no_int8, force=args.force, opset=args.opset,
+        )
+        status = f"made {','.join(made)}" if made else "cached"
+        print(
+            f"[export_onnx] {kind} {model_name} → {out_dir} ({status}, {time.perf_counter() - start:.1f}s) "
+            f"{_size_mb(out_dir)}"
+        )
+    print(f"[export_onnx] parity check: python -m scripts.bench_backends --config {args.config}")
+
+
+if __name__ == "__main__":
+    main()
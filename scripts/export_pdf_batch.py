@@ -0,0 +1,51 @@
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+
+from rag_finance.entities.company_maps import extract_company_from_query
+from rag_finance.llm.report_generator import parse_report_sections
+from rag_finance.utils.io_utils import read_text, safe_glob, split_ext
+from rag_finance.utils.pdf_utils import PdfJob, export_reports_pdf_batch
+from rag_finance.utils.tabular_format import load_tabular_payload
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Render many generated reports to PDF in parallel")
+    ap.add_argument("--reports", nargs="+", default=["reports/*.txt"], help="리포트 텍스트 파일 glob (여러 개 가능)")
+    ap.add_argument("--out-dir", type=str, default=None, help="PDF 출력 디렉터리 (미지정 시 원본 옆에 저장)")
+    ap.add_argument("--tabular-dir", type=str, default=None, help="정형 데이터 디렉터리 또는 컴파일된 tabular 스토어")
+    ap.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    args = ap.parse_args()
+
+    jobs = []
+    for path in safe_glob(args.reports):
+        name, _ext = split_ext(path)
+        company, code = extract_company_from_query(name)
+        tabular_payload = load_tabular_payload(args.tabular_dir, company, code) if (company or code) else None
+        out_dir = args.out_dir or os.path.dirname(path)
+        jobs.append(PdfJob(
+            output_path=os.path.join(out_dir, f"{name}.pdf"),
+            sections=parse_report_sections(read_text(path)),
+            tabular_payload=tabular_payload,
+        ))
+
+    if not jobs:
+        print("[export_pdf_batch] 대상 리포트가 없습니다.", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    failed = 0
+    for res in export_reports_pdf_batch(jobs, max_workers=args.workers):
+        if res.error:
+            failed += 1
+            print(f"[export_pdf_batch] FAIL {res.output_path} ({res.seconds:.2f}s): {res.error}", file=sys.stderr)
+        else:
+            print(f"[export_pdf_batch] {res.output_path} ({res.seconds:.2f}s)")
+    elapsed = time.perf_counter() - start
+    print(f"[export_pdf_batch] {len(jobs) - failed}/{len(jobs)} PDFs in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,38 +3,17 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import shutil
 import sys
-from typing import Dict, Optional
 
-from groq import Groq
-
-from rag_finance.config import load_config
-from rag_finance.indexing.faiss_index import _build_embedding
 from rag_finance.llm import generate_finance_report
-from rag_finance.llm.report_generator import format_report_sections, parse_report_sections
-from rag_finance.retrieval.pipeline import retrieve_with_keywords
-from rag_finance.utils.io_utils import read_json, write_text
+from rag_finance.llm.evidence import ReportManifest, evidence_components, evidence_fingerprint
+from rag_finance.llm.report_generator import (
+    _combine_context, format_report_sections, load_api_key, load_few_shot_examples, parse_report_sections, prepare_report_messages,
+)
+from rag_finance.utils.io_utils import ensure_dir, write_text
 from rag_finance.utils.pdf_utils import export_report_pdf
-from rag_finance.utils.tabular_format import format_tabular_prompt
-
-try:  # 선택 의존성
-    from dotenv import load_dotenv  # type: ignore
-except OSError:  # pragma: no cover - 일부 플랫폼에서 I/O 에러 발생 가능
-    load_dotenv = None
-except ImportError:  # pragma: no cover - python-dotenv 미설치 시
-    load_dotenv = None
-
-
-def _load_api_key(explicit: Optional[str], env_file: Optional[str]) -> str:
-    if load_dotenv:
-        if env_file and os.path.isfile(env_file):
-            load_dotenv(env_file)
-        else:
-            load_dotenv()
-    api_key = explicit or os.environ.get("GROQ_API_KEY", "")
-    if not api_key:
-        raise RuntimeError("GROQ_API_KEY 환경변수 또는 --api-key가 필요합니다.")
-    return api_key
+from rag_finance.utils.tabular_format import format_tabular_prompt, load_tabular_payload
 
 
 def _print_retrieved_docs(docs, *, max_chars: int) -> None:
@@ -76,87 +55,38 @@ def _serialize_docs(docs):
     return serialized
 
 
-def _load_tabular_payload(tabular_dir: Optional[str], company: Optional[str]) -> Optional[Dict[str, object]]:
-    if not tabular_dir:
-        return None
-    if not os.path.isdir(tabular_dir):
-        print(f"[generate_report] tabular_dir가 존재하지 않습니다: {tabular_dir}", file=sys.stderr)
-        return None
-    if not company:
-        print("[generate_report] 기업명을 찾지 못해 tabular 데이터를 건너뜁니다.", file=sys.stderr)
-        return None
-
-    normalized = company.replace(" ", "")
-    finance_path = os.path.join(tabular_dir, f"finance_{normalized}.json")
-    stock_path = os.path.join(tabular_dir, f"stock_{normalized}.json")
-
-    payload: Dict[str, object] = {"company": company}
-    loaded_any = False
-
-    if os.path.isfile(finance_path):
-        try:
-            payload["finance"] = read_json(finance_path)
-            loaded_any = True
-        except (OSError, json.JSONDecodeError) as exc:
-            print(f"[generate_report] 재무 JSON을 읽지 못했습니다 ({finance_path}): {exc}", file=sys.stderr)
+def _print_retrieval_summary(docs, debug_info, args) -> None:
+    if not docs:
+        print("[generate_report] 검색 결과가 없습니다.", file=sys.stderr)
+        sys.exit(1)
 
-    if os.path.isfile(stock_path):
-        try:
-            payload["stock"] = read_json(stock_path)
-            loaded_any = True
-        except (OSError, json.JSONDecodeError) as exc:
-            print(f"[generate_report] 주가 JSON을 읽지 못했습니다 ({stock_path}): {exc}", file=sys.stderr)
+    print(f"[generate_report] company={debug_info.get('company')} code={debug_info.get('code')}")
+    print(f"[generate_report] pooled={debug_info.get('pooled')} merged={debug_info.get('merged')} topN={len(docs)}")
 
-    if not loaded_any:
-        print(f"[generate_report] tabular 데이터를 찾지 못했습니다 (company={company}).", file=sys.stderr)
-        return None
+    if args.print_docs:
+        _print_retrieved_docs(docs, max_chars=max(0, args.docs_chars))
 
-    return payload
 
+def _print_tabular_summary(tabular_payload) -> None:
+    if tabular_payload:
+        finance_rows = len((tabular_payload.get("finance") or {}))
+        stock_rows = len(((tabular_payload.get("stock") or {}).get("monthly_prices") or {}))
+        print(
+            f"[generate_report] tabular 로드: finance_years={finance_rows} monthly_points={stock_rows}"
+        )
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Generate a finance report with Groq LLM")
-    parser.add_argument("--config", default="configs/default.yaml", help="설정 파일 경로")
-    parser.add_argument("--q", required=True, help="사용자 질의")
-    parser.add_argument("--topk", type=int, default=10, help="Retrieval 결과 문서 수")
-    parser.add_argument("--model", default="llama-3.3-70b-versatile", help="Groq 모델 이름")
-    parser.add_argument("--api-key", help="Groq API Key (미지정 시 환경변수 사용)")
-    parser.add_argument("--env-file", help=".env 파일 경로")
-    parser.add_argument("--examples-dir", help="few-shot JSONL 디렉터리")
-    parser.add_argument("--max-examples", type=int, default=1, help="few-shot 샘플 최대 개수")
-    parser.add_argument("--no-few-shot", action="store_true", help="few-shot 예시 사용 안 함")
-    parser.add_argument("--style-hint", default="", help="추가 스타일 지침")
-    parser.add_argument("--temperature", type=float, default=0.1)
-    parser.add_argument("--top-p", type=float, default=0.95)
-    parser.add_argument("--max-tokens", type=int, default=1024)
-    parser.add_argument("--output", help="LLM 원문을 저장할 경로")
-    parser.add_argument("--context-out", help="Retrieval 컨텍스트 저장 경로")
-    parser.add_argument("--messages-out", help="Groq 메시지 JSON 저장 경로")
-    parser.add_argument("--docs-out", help="Retrieval 원문 JSON 저장 경로")
-    parser.add_argument("--pretty", action="store_true", help="콘솔 출력 시 포맷팅 적용")
-    parser.add_argument("--print-context", action="store_true", help="콘솔에 컨텍스트 일부 출력")
-    parser.add_argument("--print-docs", action="store_true", help="Retrieval 문서와 스니펫 출력")
-    parser.add_argument("--docs-chars", type=int, default=320, help="문서 스니펫 최대 문자 수")
-    parser.add_argument("--print-messages", action="store_true", help="Groq에 전달한 메시지 출력")
-    parser.add_argument("--quiet", action="store_true", help="Retrieval 진행률 숨김")
-    parser.add_argument("--tabular-dir", help="정형 데이터(JSON) 디렉터리")
-    parser.add_argument("--pdf-output", help="생성 리포트를 PDF로 저장할 경로")
-    args = parser.parse_args()
 
-    try:
-        api_key = _load_api_key(args.api_key, args.env_file)
-    except RuntimeError as exc:
-        parser.error(str(exc))
+def _run_local(args, parser):
+    # groq / 임베딩 / 검색 스택은 로컬 실행에서만 필요 (--help, --server 는 가볍게 시작)
+    from groq import Groq
 
-    client = Groq(api_key=api_key)
+    from rag_finance.config import load_config
+    from rag_finance.indexing.faiss_index import build_embedding_from_config
+    from rag_finance.retrieval.pipeline import retrieve_with_keywords
 
     cfg = load_config(args.config)
     embedding_cfg = cfg["embedding"]
-    embedding_model = _build_embedding(
-        model_name=embedding_cfg["model_name"],
-        device=embedding_cfg["device"],
-        normalize=embedding_cfg["normalize"],
-    )
+    embedding_model = build_embedding_from_config(embedding_cfg)
 
     # Retrieval → 근거 문서 확보
     docs, debug_info = retrieve_with_keywords(
@@ -166,30 +96,57 @@ def main() -> None:
         topk=args.topk,
         show_progress=not args.quiet,
     )
-
-    if not docs:
-        print("[generate_report] 검색 결과가 없습니다.", file=sys.stderr)
-        sys.exit(1)
-
-    print(f"[generate_report] company={debug_info.get('company')} code={debug_info.get('code')}")
-    print(f"[generate_report] pooled={debug_info.get('pooled')} merged={debug_info.get('merged')} topN={len(docs)}")
-
-    if args.print_docs:
-        _print_retrieved_docs(docs, max_chars=max(0, args.docs_chars))
+    _print_retrieval_summary(docs, debug_info, args)
 
     include_few_shot = not args.no_few_shot
 
-    tabular_payload = _load_tabular_payload(args.tabular_dir, debug_info.get("company"))
+    tabular_payload = load_tabular_payload(args.tabular_dir, debug_info.get("company"), debug_info.get("code"))
     tabular_text = format_tabular_prompt(tabular_payload)
-    if tabular_payload:
-        finance_rows = len((tabular_payload.get("finance") or {}))
-        stock_rows = len(((tabular_payload.get("stock") or {}).get("monthly_prices") or {}))
-        print(
-            f"[generate_report] tabular 로드: finance_years={finance_rows} monthly_points={stock_rows}"
-        )
-
+    _print_tabular_summary(tabular_payload)
+
+    # 근거 지문(검색 청크·정형 데이터·프롬프트 버전·생성 설정)이 지난 성공 실행과 같으면 LLM 호출 없이 재사용
+    reuse_cfg = cfg.get("report_reuse", {}) or {}
+    manifest = ReportManifest(args.manifest_dir or reuse_cfg.get("manifest_dir", "reports/manifest")) \
+        if reuse_cfg.get("enable", True) else None
+    key = ReportManifest.key_for(args.q)
+    components = evidence_components(
+        query=args.q,
+        docs=docs,
+        tabular_payload=tabular_payload,
+        generation={
+            "model": args.model,
+            "temperature": args.temperature,
+            "top_p": args.top_p,
+            "max_tokens": args.max_tokens,
+            "style_hint": args.style_hint,
+            "few_shot": load_few_shot_examples(args.examples_dir, args.max_examples) if include_few_shot else [],
+        },
+    )
+    generation = {"status": "generated", "reason": "report reuse disabled", "fingerprint": evidence_fingerprint(components), "key": key}
+    if manifest is not None:
+        reusable, reason, _entry = manifest.check(key, components)
+        if reusable and not args.force:
+            messages, context_text = prepare_report_messages(
+                query=args.q,
+                docs=docs,
+                few_shot_dir=args.examples_dir,
+                few_shot_max_examples=args.max_examples,
+                include_few_shot=include_few_shot,
+                style_hint=args.style_hint,
+                tabular_text=tabular_text,
+            )
+            generation.update(status="reused", reason=reason)
+            report_text = manifest.load_report(key)
+            return (docs, debug_info, tabular_payload, tabular_text, report_text, messages,
+                    _combine_context(tabular_text, context_text), generation, manifest)
+        generation["reason"] = f"forced (--force); {reason}" if reusable else reason
+
+    try:  # API 키는 LLM 을 실제로 부를 때만 필요 (재사용 시에는 없어도 된다)
+        api_key = load_api_key(args.api_key, args.env_file)
+    except RuntimeError as exc:
+        parser.error(str(exc))
     report_text, messages, context_text = generate_finance_report(
-        client=client,
+        client=Groq(api_key=api_key),
         query=args.q,
         docs=docs,
         model=args.model,
@@ -202,6 +159,89 @@ def main() -> None:
         max_tokens=args.max_tokens,
         tabular_text=tabular_text,
     )
+    if manifest is not None:
+        manifest.record(key, query=args.q, components=components, report_text=report_text, model=args.model)
+    return docs, debug_info, tabular_payload, tabular_text, report_text, messages, context_text, generation, manifest
+
+
+def _run_remote(args):
+    """--server 지정 시: Retrieval+LLM 은 상주 서비스에 맡기고 결과 저장/출력만 수행."""
+    from rag_finance.service.client import ServiceClient
+
+    try:
+        result = ServiceClient(args.server).report(
+            args.q,
+            topk=args.topk,
+            model=args.model,
+            examples_dir=args.examples_dir,
+            max_examples=args.max_examples,
+            no_few_shot=args.no_few_shot,
+            style_hint=args.style_hint,
+            temperature=args.temperature,
+            top_p=args.top_p,
+            max_tokens=args.max_tokens,
+            tabular_dir=os.path.abspath(args.tabular_dir) if args.tabular_dir else None,
+        )
+    except RuntimeError as exc:
+        print(f"[generate_report] 서비스 호출 실패: {exc}", file=sys.stderr)
+        sys.exit(1)
+
+    docs = result["documents"]
+    debug_info = result.get("debug", {})
+    _print_retrieval_summary(docs, debug_info, args)
+    tabular_payload = result.get("tabular_payload")
+    _print_tabular_summary(tabular_payload)
+    return (
+        docs,
+        debug_info,
+        tabular_payload,
+        result.get("tabular_text", ""),
+        result.get("report_text", ""),
+        result.get("messages", []),
+        result.get("context_text", ""),
+        {"status": "generated", "reason": "server mode (reuse check runs only for local retrieval)"},
+        None,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a finance report with Groq LLM")
+    parser.add_argument("--config", default="configs/default.yaml", help="설정 파일 경로")
+    parser.add_argument("--q", required=True, help="사용자 질의")
+    parser.add_argument("--topk", type=int, default=10, help="Retrieval 결과 문서 수")
+    parser.add_argument("--model", default="llama-3.3-70b-versatile", help="Groq 모델 이름")
+    parser.add_argument("--api-key", help="Groq API Key (미지정 시 환경변수 사용)")
+    parser.add_argument("--env-file", help=".env 파일 경로")
+    parser.add_argument("--examples-dir", help="few-shot JSONL 디렉터리")
+    parser.add_argument("--max-examples", type=int, default=1, help="few-shot 샘플 최대 개수")
+    parser.add_argument("--no-few-shot", action="store_true", help="few-shot 예시 사용 안 함")
+    parser.add_argument("--style-hint", default="", help="추가 스타일 지침")
+    parser.add_argument("--temperature", type=float, default=0.1)
+    parser.add_argument("--top-p", type=float, default=0.95)
+    parser.add_argument("--max-tokens", type=int, default=1024)
+    parser.add_argument("--output", help="LLM 원문을 저장할 경로")
+    parser.add_argument("--context-out", help="Retrieval 컨텍스트 저장 경로")
+    parser.add_argument("--messages-out", help="Groq 메시지 JSON 저장 경로")
+    parser.add_argument("--docs-out", help="Retrieval 원문 JSON 저장 경로")
+    parser.add_argument("--pretty", action="store_true", help="콘솔 출력 시 포맷팅 적용")
+    parser.add_argument("--print-context", action="store_true", help="콘솔에 컨텍스트 일부 출력")
+    parser.add_argument("--print-docs", action="store_true", help="Retrieval 문서와 스니펫 출력")
+    parser.add_argument("--docs-chars", type=int, default=320, help="문서 스니펫 최대 문자 수")
+    parser.add_argument("--print-messages", action="store_true", help="Groq에 전달한 메시지 출력")
+    parser.add_argument("--quiet", action="store_true", help="Retrieval 진행률 숨김")
+    parser.add_argument("--tabular-dir", help="정형 데이터(JSON) 디렉터리 또는 컴파일된 tabular 스토어(.sqlite) 경로")
+    parser.add_argument("--pdf-output", help="생성 리포트를 PDF로 저장할 경로")
+    parser.add_argument("--server", help="상주 서비스 주소(예: 127.0.0.1:8765). 지정 시 thin client로 동작")
+    parser.add_argument("--force", action="store_true", help="근거 지문이 지난 실행과 같아도 LLM 으로 다시 생성")
+    parser.add_argument("--manifest-dir", help="재사용 manifest 디렉터리 (기본: config 의 report_reuse.manifest_dir)")
+    args = parser.parse_args()
+
+    if args.server:
+        result = _run_remote(args)
+    else:
+        result = _run_local(args, parser)
+    docs, debug_info, tabular_payload, tabular_text, report_text, messages, context_text, generation, manifest = result
+    print(f"[generate_report] generation={generation['status']} reason={generation['reason']}")
 
     if args.print_context:
         preview = context_text[:600]
@@ -219,12 +259,20 @@ def main() -> None:
         print(f"[generate_report] 리포트 저장: {args.output}")
 
     if args.pdf_output:
-        sections = parse_report_sections(report_text)
-        try:
-            export_report_pdf(args.pdf_output, sections, tabular_payload)
-            print(f"[generate_report] PDF 저장: {args.pdf_output}")
-        except RuntimeError as exc:
-            print(f"[generate_report] PDF 저장 실패: {exc}", file=sys.stderr)
+        previous_pdf = manifest.previous_pdf(generation["key"]) if manifest is not None and generation["status"] == "reused" else None
+        if previous_pdf:
+            ensure_dir(os.path.dirname(args.pdf_output) or ".")
+            shutil.copyfile(previous_pdf, args.pdf_output)
+            print(f"[generate_report] PDF 재사용: {args.pdf_output}")
+        else:
+            sections = parse_report_sections(report_text)
+            try:
+                export_report_pdf(args.pdf_output, sections, tabular_payload)
+                print(f"[generate_report] PDF 저장: {args.pdf_output}")
+                if manifest is not None:
+                    manifest.attach_pdf(generation["key"], args.pdf_output)
+            except RuntimeError as exc:
+                print(f"[generate_report] PDF 저장 실패: {exc}", file=sys.stderr)
 
     if args.context_out:
         write_text(args.context_out, context_text)
@@ -238,6 +286,7 @@ def main() -> None:
             "tabular_text": tabular_text,
             "tabular_company": debug_info.get("company"),
             "tabular_payload": tabular_payload,
+            "generation": generation,
         }
         write_text(args.messages_out, json.dumps(payload, ensure_ascii=False, indent=2))
         print(f"[generate_report] 메시지 로그 저장: {args.messages_out}")
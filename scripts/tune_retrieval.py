@@ -0,0 +1,142 @@
+from __future__ import annotations
+import argparse
+import importlib
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, List, Set, Tuple
+
+from rag_finance.config import load_config
+from rag_finance.indexing.faiss_index import build_embedding_from_config
+from rag_finance.retrieval.pipeline import build_bm25_retriever, build_reranker, load_vectorstore, retrieve_with_keywords
+from rag_finance.retrieval.tuning import (
+    DEFAULT_GRID,
+    PARAM_PATHS,
+    apply_params,
+    candidate_params,
+    get_param,
+    load_labels,
+    pareto_front,
+    parse_grid,
+    recall_at_k,
+    to_yaml,
+)
+from rag_finance.utils.io_utils import ensure_dir, write_text
+
+
+def _chunk_ids(docs) -> List[str]:
+    return [str(d.metadata.get("chunk_id", "")) for d in docs]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="검색 풀 크기 등 튜닝: 레이블 질의 세트로 지연 vs recall@k Pareto 최적 config 산출")
+    ap.add_argument("--config", type=str, default="configs/default.yaml")
+    ap.add_argument("--labels", type=str, default=None, help='JSONL {"q": ..., "relevant": [chunk_id, ...]}')
+    ap.add_argument("--queries", type=str, default=None,
+                    help="레이블이 없을 때: 질의 목록 파일(줄당 1개). 현재 config 의 top-k 를 기준 정답으로 삼아 일치율을 잰다")
+    ap.add_argument("--grid", type=str, action="append", default=[], help="knob=v1,v2 (여러 번 지정 가능)")
+    ap.add_argument("--method", type=str, default="random", choices=["grid", "random", "bayes"],
+                    help="bayes 는 optuna(설치 시)의 다목적 TPE 사용")
+    ap.add_argument("--trials", type=int, default=40)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--topk", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=1, help="trial 당 질의 세트 반복(지연 측정 안정화)")
+    ap.add_argument("--out", type=str, default="tuning", help="trials.jsonl / pareto.yaml 저장 디렉토리")
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    # 질의 캐시가 있으면 뒤 trial 일수록 빨라 보이므로 끄고 측정한다
+    embedding = build_embedding_from_config(cfg["embedding"], query_cache=False)
+    vs = load_vectorstore(cfg["paths"]["indexes_dir"], embedding)
+    bm25 = build_bm25_retriever(vs)
+    ce_cfg = cfg["retrieval"]["ce"]
+    reranker = build_reranker(ce_cfg) if ce_cfg.get("enable", True) else None
+
+    def run(run_cfg: Dict[str, Any], queries: List[str]) -> Tuple[List[List[str]], List[float]]:
+        results, lat = [], []
+        for _ in range(max(1, args.repeat)):
+            results = []
+            for q in queries:
+                start = time.perf_counter()
+                docs, _ = retrieve_with_keywords(
+                    q, run_cfg, embedding, topk=args.topk, show_progress=False,
+                    vectorstore=vs, bm25_retriever=bm25, reranker=reranker,
+                )
+                lat.append((time.perf_counter() - start) * 1000.0)
+                results.append(_chunk_ids(docs))
+        return results, lat
+
+    if args.labels:
+        labelled = load_labels(args.labels)
+    elif args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+        reference, _ = run(cfg, queries)
+        labelled = [(q, set(ids)) for q, ids in zip(queries, reference) if ids]
+        print(f"[tune_retrieval] no labels: using the current config's top-{args.topk} as reference")
+    else:
+        ap.error("--labels or --queries is required")
+    if not labelled:
+        ap.error("empty query set")
+    queries = [q for q, _ in labelled]
+    relevant: List[Set[str]] = [r for _, r in labelled]
+
+    grid = parse_grid(args.grid, DEFAULT_GRID)
+    trials: List[Dict[str, Any]] = []
+
+    def evaluate(params: Dict[str, Any]) -> Dict[str, Any]:
+        results, lat = run(apply_params(cfg, params), queries)
+        recalls = [recall_at_k(ids, rel, args.topk) for ids, rel in zip(results, relevant)]
+        lat.sort()
+        trial = {
+            "params": params,
+            "recall": round(statistics.mean(recalls), 4),
+            "p50_ms": round(statistics.median(lat), 2),
+            "p95_ms": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))], 2),
+        }
+        trials.append(trial)
+        print(f"[tune_retrieval] trial {len(trials):3d}: recall@{args.topk}={trial['recall']:.3f} "
+              f"p50={trial['p50_ms']:.1f}ms p95={trial['p95_ms']:.1f}ms {params}")
+        return trial
+
+    current = {name: get_param(cfg, name) for name in sorted(PARAM_PATHS)}
+    evaluate(current)  # 현재 설정도 비교 기준으로 포함
+    if args.method == "bayes":
+        try:
+            optuna = importlib.import_module("optuna")
+        except ImportError:
+            ap.error("--method bayes requires optuna (pip install optuna); use --method random instead")
+        optuna.logging.set_verbosity(optuna.logging.WARNING)
+        study = optuna.create_study(directions=["minimize", "maximize"], sampler=optuna.samplers.TPESampler(seed=args.seed))
+
+        def objective(trial) -> Tuple[float, float]:
+            params = {name: trial.suggest_categorical(name, values) for name, values in sorted(grid.items())}
+            result = evaluate(params)
+            return result["p50_ms"], result["recall"]
+
+        study.optimize(objective, n_trials=args.trials)
+    else:
+        for params in candidate_params(grid, args.method, args.trials, args.seed):
+            if params != current:
+                evaluate(params)
+
+    front = pareto_front(trials)
+    ensure_dir(args.out)
+    with open(os.path.join(args.out, "trials.jsonl"), "w", encoding="utf-8") as f:
+        for t in trials:
+            f.write(json.dumps(t, ensure_ascii=False) + "\n")
+    # YAML 다중 문서: 문서 하나가 configs/default.yaml 에 덮어쓸 수 있는 조각
+    blocks = [
+        f"---\n# Pareto #{i}: recall@{args.topk}={t['recall']:.3f} p50={t['p50_ms']:.1f}ms p95={t['p95_ms']:.1f}ms "
+        f"({len(queries)} queries)\n" + to_yaml(t)
+        for i, t in enumerate(front, 1)
+    ]
+    write_text(os.path.join(args.out, "pareto.yaml"), "".join(blocks))
+    print(f"[tune_retrieval] {len(trials)} trials, {len(front)} Pareto-optimal → {os.path.join(args.out, 'pareto.yaml')}")
+    for t in front:
+        print(f"[tune_retrieval]   recall@{args.topk}={t['recall']:.3f} p50={t['p50_ms']:.1f}ms {t['params']}")
+
+
+if __name__ == "__main__":
+    main()